@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Redis 客户端
+"""
+
+from functools import lru_cache
+
+import redis
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+
+# Redis 只用于缓存协调，超时要短，不可用时调用方应降级而不是阻塞请求
+REDIS_SOCKET_TIMEOUT = 0.5
+
+
+@lru_cache()
+def get_redis() -> redis.Redis:
+    """
+    获取进程内共享的同步 Redis 客户端（自带连接池）
+
+    Returns:
+        redis.Redis: Redis 客户端
+    """
+    return redis.Redis(
+        host=settings.REDIS_HOST,
+        port=settings.REDIS_PORT,
+        db=settings.REDIS_DB,
+        password=settings.REDIS_PASSWORD or None,
+        socket_timeout=REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=REDIS_SOCKET_TIMEOUT,
+        decode_responses=True,
+    )
+
+
+@lru_cache()
+def get_async_redis() -> aioredis.Redis:
+    """
+    获取进程内共享的异步 Redis 客户端（自带连接池）
+
+    Returns:
+        aioredis.Redis: 异步 Redis 客户端
+    """
+    return aioredis.Redis(
+        host=settings.REDIS_HOST,
+        port=settings.REDIS_PORT,
+        db=settings.REDIS_DB,
+        password=settings.REDIS_PASSWORD or None,
+        socket_timeout=REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=REDIS_SOCKET_TIMEOUT,
+        decode_responses=True,
+    )
@@ -4,9 +4,9 @@
 安全相关工具
 """
 from datetime import datetime, timedelta
-from typing import Any, Optional, Union
+from typing import Any, Dict, Optional, Union
 
-from jose import jwt
+from jose import JWTError, jwt
 from passlib.context import CryptContext
 
 from app.core.config import settings
@@ -40,6 +40,48 @@ def create_access_token(
     return encoded_jwt
 
 
+def create_signed_token(
+    data: Dict[str, Any], purpose: str, expires_delta: timedelta
+) -> str:
+    """
+    创建带用途的签名令牌（不能作为访问令牌使用）
+
+    Args:
+        data: 令牌内容
+        purpose: 令牌用途
+        expires_delta: 过期时间
+
+    Returns:
+        str: JWT令牌
+    """
+    to_encode = {
+        **data,
+        "purpose": purpose,
+        "exp": datetime.utcnow() + expires_delta,
+    }
+    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
+
+
+def decode_signed_token(token: str, purpose: str) -> Optional[Dict[str, Any]]:
+    """
+    校验并解析带用途的签名令牌
+
+    Args:
+        token: JWT令牌
+        purpose: 令牌用途
+
+    Returns:
+        Optional[Dict[str, Any]]: 令牌内容，无效、过期或用途不符时返回 None
+    """
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    if payload.get("purpose") != purpose:
+        return None
+    return payload
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     验证密码
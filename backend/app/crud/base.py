@@ -3,10 +3,13 @@
 """
 CRUD 基类
 """
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from typing import Any, Dict, Generic, List, Optional, Sequence, Type, TypeVar, Union
 
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
+from sqlalchemy import insert, select, update
+from sqlalchemy.dialects import mysql
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.db.base_class import Base
@@ -15,6 +18,9 @@ ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
+# 批量操作默认每批行数，避免单条 SQL 超过 max_allowed_packet
+DEFAULT_BATCH_SIZE = 1000
+
 
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     """
@@ -123,3 +129,347 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         db.delete(obj)
         db.commit()
         return obj
+
+    def _to_row(self, obj_in: Union[BaseModel, Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        将创建模型或字典转换为只包含表字段的行数据
+
+        Args:
+            obj_in: 创建模型或字典
+
+        Returns:
+            Dict[str, Any]: 行数据
+        """
+        data = obj_in if isinstance(obj_in, dict) else obj_in.model_dump()
+        columns = self.model.__table__.columns
+        return {key: value for key, value in data.items() if key in columns}
+
+    def _apply_defaults(self, rows: List[Dict[str, Any]]) -> List[str]:
+        """
+        为各行缺失的字段补齐 Python 端默认值（如 created_at），并统一各行字段
+
+        多行 INSERT 要求各行字段相同：没有默认值的缺失字段写入 None。
+
+        Args:
+            rows: 行数据列表，原地修改
+
+        Returns:
+            List[str]: 各行共同的字段名列表
+        """
+        for column in self.model.__table__.columns:
+            default = column.default
+            if default is None:
+                continue
+            if default.is_scalar:
+                for row in rows:
+                    row.setdefault(column.name, default.arg)
+            elif default.is_callable:
+                for row in rows:
+                    if column.name not in row:
+                        row[column.name] = default.arg(None)
+        keys = list(dict.fromkeys(key for row in rows for key in row))
+        for row in rows:
+            for key in keys:
+                row.setdefault(key, None)
+        return keys
+
+    def _apply_onupdate(self, rows: List[Dict[str, Any]]) -> List[str]:
+        """
+        为缺失字段补齐 onupdate 值（如 updated_at）
+
+        批量 UPDATE 和 ON DUPLICATE KEY UPDATE 直接写入原始值，不会触发列的 onupdate，
+        需要显式写入。
+
+        Args:
+            rows: 行数据列表，原地修改
+
+        Returns:
+            List[str]: 带 onupdate 的字段名列表
+        """
+        fields = []
+        for column in self.model.__table__.columns:
+            onupdate = column.onupdate
+            if onupdate is None:
+                continue
+            if onupdate.is_scalar:
+                value = onupdate.arg
+            elif onupdate.is_callable:
+                value = onupdate.arg(None)
+            else:
+                continue
+            for row in rows:
+                row.setdefault(column.name, value)
+            fields.append(column.name)
+        return fields
+
+    def _insert_batch(self, db: Session, batch: List[Dict[str, Any]]) -> List[int]:
+        """
+        写入一批数据并返回各行的 ID
+
+        显式指定主键的行直接写入；其余行由数据库生成主键，支持 RETURNING 的数据库
+        按输入顺序返回 ID，MySQL 以一条多行 INSERT 写入后按 LAST_INSERT_ID 回查
+        （InnoDB 为行数已知的单条 INSERT 一次分配全部自增值），其他数据库逐行写入。
+
+        Args:
+            db: 数据库会话
+            batch: 本批行数据
+
+        Returns:
+            List[int]: 本批各行的 ID，顺序与输入一致
+        """
+        primary_key = self.model.__table__.primary_key.columns.values()[0]
+        key = primary_key.name
+        explicit = [row for row in batch if row.get(key) is not None]
+        generated = [
+            {field: value for field, value in row.items() if field != key}
+            for row in batch
+            if row.get(key) is None
+        ]
+        if explicit:
+            db.execute(insert(self.model).values(explicit))
+
+        generated_ids: List[int] = []
+        dialect = db.get_bind().dialect
+        if generated and dialect.insert_executemany_returning_sort_by_parameter_order:
+            result = db.execute(
+                insert(self.model).returning(
+                    primary_key, sort_by_parameter_order=True
+                ),
+                generated,
+            )
+            generated_ids = list(result.scalars())
+        elif generated and dialect.name in ("mysql", "mariadb"):
+            result = db.execute(insert(self.model).values(generated))
+            generated_ids = list(
+                db.scalars(
+                    select(primary_key)
+                    .where(primary_key >= result.lastrowid)
+                    .order_by(primary_key)
+                    .limit(len(generated))
+                )
+            )
+        elif generated:
+            generated_ids = [
+                db.execute(insert(self.model).values(row)).inserted_primary_key[0]
+                for row in generated
+            ]
+
+        remaining = iter(generated_ids)
+        return [
+            row[key] if row.get(key) is not None else next(remaining) for row in batch
+        ]
+
+    def create_many(
+        self,
+        db: Session,
+        *,
+        objs_in: Sequence[Union[CreateSchemaType, Dict[str, Any]]],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> List[int]:
+        """
+        批量创建对象
+
+        每批使用一条多行 INSERT，所有批次在同一事务中提交，不逐行 refresh。
+        新 ID 通过 RETURNING 或回查获取，见 _insert_batch。
+
+        Args:
+            db: 数据库会话
+            objs_in: 创建模型或字典列表
+            batch_size: 每批行数
+
+        Returns:
+            List[int]: 新建对象的 ID 列表，顺序与输入一致
+        """
+        rows = [self._to_row(obj_in) for obj_in in objs_in]
+        if not rows:
+            return []
+        self._apply_defaults(rows)
+
+        ids: List[int] = []
+        try:
+            for start in range(0, len(rows), batch_size):
+                ids.extend(self._insert_batch(db, rows[start : start + batch_size]))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return ids
+
+    def upsert_many(
+        self,
+        db: Session,
+        *,
+        objs_in: Sequence[Union[CreateSchemaType, Dict[str, Any]]],
+        update_fields: Optional[Sequence[str]] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> int:
+        """
+        批量插入或更新对象（INSERT ... ON DUPLICATE KEY UPDATE）
+
+        Args:
+            db: 数据库会话
+            objs_in: 创建模型或字典列表
+            update_fields: 主键或唯一键冲突时更新的字段，默认为输入中的全部非主键字段
+            batch_size: 每批行数
+
+        Returns:
+            int: MySQL 返回的受影响行数（插入计 1 行，更新计 2 行）
+        """
+        rows = [self._to_row(obj_in) for obj_in in objs_in]
+        if not rows:
+            return 0
+        if update_fields is None:
+            primary_keys = {column.name for column in self.model.__table__.primary_key}
+            update_fields = [
+                key
+                for key in dict.fromkeys(key for row in rows for key in row)
+                if key not in primary_keys
+            ]
+        update_fields = list(update_fields)
+        for field in self._apply_onupdate(rows):
+            if field not in update_fields:
+                update_fields.append(field)
+        self._apply_defaults(rows)
+
+        affected = 0
+        try:
+            for start in range(0, len(rows), batch_size):
+                statement = mysql.insert(self.model).values(
+                    rows[start : start + batch_size]
+                )
+                statement = statement.on_duplicate_key_update(
+                    {field: statement.inserted[field] for field in update_fields}
+                )
+                affected += db.execute(statement).rowcount
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return affected
+
+    def update_many(
+        self,
+        db: Session,
+        *,
+        objs_in: Sequence[Dict[str, Any]],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> int:
+        """
+        按主键批量更新对象，未提供的 onupdate 字段（如 updated_at）设为当前值
+
+        Args:
+            db: 数据库会话
+            objs_in: 字典列表，每项必须包含 id 以及要更新的字段
+            batch_size: 每批行数
+
+        Returns:
+            int: 提交更新的行数
+        """
+        rows = [self._to_row(obj_in) for obj_in in objs_in]
+        self._apply_onupdate(rows)
+        try:
+            for start in range(0, len(rows), batch_size):
+                # ORM 按主键批量 UPDATE，使用 executemany 执行
+                db.execute(update(self.model), rows[start : start + batch_size])
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return len(rows)
+
+    async def get_async(self, db: AsyncSession, id: Any) -> Optional[ModelType]:
+        """
+        获取对象（异步）
+
+        Args:
+            db: 异步数据库会话
+            id: 对象 ID
+
+        Returns:
+            Optional[ModelType]: 对象或 None
+        """
+        return await db.get(self.model, id)
+
+    async def get_multi_async(
+        self, db: AsyncSession, *, skip: int = 0, limit: int = 100
+    ) -> List[ModelType]:
+        """
+        获取多个对象（异步）
+
+        Args:
+            db: 异步数据库会话
+            skip: 跳过数量
+            limit: 限制数量
+
+        Returns:
+            List[ModelType]: 对象列表
+        """
+        result = await db.execute(select(self.model).offset(skip).limit(limit))
+        return list(result.scalars().all())
+
+    async def create_async(
+        self, db: AsyncSession, *, obj_in: CreateSchemaType
+    ) -> ModelType:
+        """
+        创建对象（异步）
+
+        Args:
+            db: 异步数据库会话
+            obj_in: 创建模型
+
+        Returns:
+            ModelType: 创建的对象
+        """
+        obj_in_data = jsonable_encoder(obj_in)
+        db_obj = self.model(**obj_in_data)  # type: ignore
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def update_async(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: ModelType,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ) -> ModelType:
+        """
+        更新对象（异步）
+
+        Args:
+            db: 异步数据库会话
+            db_obj: 数据库中的对象
+            obj_in: 更新模型或字典
+
+        Returns:
+            ModelType: 更新后的对象
+        """
+        obj_data = jsonable_encoder(db_obj)
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.model_dump(exclude_unset=True)
+        for field in obj_data:
+            if field in update_data:
+                setattr(db_obj, field, update_data[field])
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def remove_async(self, db: AsyncSession, *, id: int) -> ModelType:
+        """
+        删除对象（异步）
+
+        Args:
+            db: 异步数据库会话
+            id: 对象 ID
+
+        Returns:
+            ModelType: 删除的对象
+        """
+        obj = await db.get(self.model, id)
+        await db.delete(obj)
+        await db.commit()
+        return obj
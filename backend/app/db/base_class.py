@@ -20,6 +20,7 @@ from app.modules.knowledge.models.knowledge_base import (
     Document,
     DocumentProcessTask,
     KnowledgeBase,
+    UploadSession,
 )
 
 # LLM 配置模块
@@ -34,5 +35,6 @@ __all__ = [
     "KnowledgeBase",
     "Document",
     "DocumentProcessTask",
+    "UploadSession",
     "LLMConfig",
 ]
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据库连接池监控与慢查询日志
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger("app.db")
+
+
+class PoolWaitStats:
+    """连接获取等待时间统计（线程安全）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.timeouts = 0
+
+    def record(self, wait_seconds: float) -> None:
+        """
+        记录一次连接获取的等待时间
+
+        Args:
+            wait_seconds: 等待时间（秒）
+        """
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += wait_seconds
+            if wait_seconds > self.max_wait:
+                self.max_wait = wait_seconds
+
+    def record_timeout(self) -> None:
+        """记录一次等待连接超时"""
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        获取统计快照
+
+        Returns:
+            Dict[str, Any]: 等待时间统计
+        """
+        with self._lock:
+            avg_wait = self.total_wait / self.checkouts if self.checkouts else 0.0
+            return {
+                "checkouts": self.checkouts,
+                "wait_avg_ms": round(avg_wait * 1000, 3),
+                "wait_max_ms": round(self.max_wait * 1000, 3),
+                "wait_timeouts": self.timeouts,
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """记录连接获取等待时间的 QueuePool"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except Exception:
+            self.wait_stats.record_timeout()
+            raise
+        self.wait_stats.record(time.perf_counter() - start)
+        return conn
+
+    def recreate(self):
+        # dispose() 会通过 recreate() 生成新的连接池，保留原有统计
+        pool = super().recreate()
+        pool.wait_stats = self.wait_stats
+        return pool
+
+
+def get_pool_metrics(engine: Engine) -> Dict[str, Any]:
+    """
+    获取连接池使用情况
+
+    Args:
+        engine: 数据库引擎
+
+    Returns:
+        Dict[str, Any]: 连接池指标（容量、已借出、溢出、等待时间）
+    """
+    pool = engine.pool
+    metrics: Dict[str, Any] = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        metrics.update(
+            {
+                "pool_size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                # overflow() 为负数时表示尚未创建满 pool_size 个连接
+                "overflow": max(pool.overflow(), 0),
+                "max_overflow": pool._max_overflow,
+            }
+        )
+    wait_stats = getattr(pool, "wait_stats", None)
+    if wait_stats is not None:
+        metrics.update(wait_stats.snapshot())
+    return metrics
+
+
+def setup_slow_query_log(engine: Engine, threshold_ms: int) -> None:
+    """
+    为引擎注册慢查询日志，仅记录执行时间超过阈值的语句
+
+    Args:
+        engine: 数据库引擎
+        threshold_ms: 慢查询阈值（毫秒）
+    """
+    threshold = threshold_ms / 1000
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+        if elapsed >= threshold:
+            logger.warning(
+                f"慢查询 ({elapsed * 1000:.1f} ms): {statement} | 参数: {parameters!r:.200}"
+            )
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(context):
+        # 语句执行失败时不会触发 after_cursor_execute，需要弹出计时
+        conn = context.connection
+        if conn is not None and conn.info.get("query_start_time"):
+            conn.info["query_start_time"].pop()
@@ -4,25 +4,59 @@
 数据库会话管理
 """
 
-from typing import Generator, Optional
+from typing import AsyncGenerator, Generator, Optional
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
 from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import Session, sessionmaker
 
 from app.core.config import settings
 from app.core.logging import setup_logging
+from app.db.monitoring import InstrumentedQueuePool, setup_slow_query_log
 
 # 设置日志
 logger = setup_logging()
 
+
+def create_db_engine(pool_size: int, max_overflow: int) -> Engine:
+    """
+    按指定连接池大小创建数据库引擎
+
+    Args:
+        pool_size: 常驻连接数
+        max_overflow: 允许超出 pool_size 的临时连接数
+
+    Returns:
+        Engine: 数据库引擎
+    """
+    db_engine = create_engine(
+        settings.SQLALCHEMY_DATABASE_URI,
+        poolclass=InstrumentedQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        echo=settings.DB_ECHO,
+        # init_command 只在物理连接建立时执行，连接池复用连接时不会重复执行
+        connect_args={"init_command": f"SET time_zone = '{settings.DB_TIME_ZONE}'"},
+    )
+    if settings.DB_SLOW_QUERY_LOG:
+        setup_slow_query_log(db_engine, settings.DB_SLOW_QUERY_THRESHOLD_MS)
+    return db_engine
+
+
 # 创建数据库引擎
 try:
-    engine = create_engine(
-        settings.SQLALCHEMY_DATABASE_URI,
-        pool_pre_ping=True,
-        echo=True,
-        connect_args={"init_command": "SET time_zone = '+08:00'"},
+    engine = create_db_engine(
+        pool_size=settings.DB_POOL_SIZE, max_overflow=settings.DB_MAX_OVERFLOW
     )
     # 创建会话工厂
     SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -36,6 +70,73 @@ except OperationalError as e:
     is_db_available = False
 
 
+def get_async_database_uri() -> str:
+    """
+    获取异步驱动的数据库连接串
+
+    Returns:
+        str: 使用 aiomysql 驱动的连接串
+    """
+    if settings.ASYNC_SQLALCHEMY_DATABASE_URI:
+        return settings.ASYNC_SQLALCHEMY_DATABASE_URI
+    return settings.SQLALCHEMY_DATABASE_URI.replace("+pymysql", "+aiomysql", 1)
+
+
+def create_async_db_engine() -> AsyncEngine:
+    """
+    创建异步数据库引擎，连接池配置与同步引擎一致
+
+    Returns:
+        AsyncEngine: 异步数据库引擎
+    """
+    db_engine = create_async_engine(
+        get_async_database_uri(),
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        echo=settings.DB_ECHO,
+        connect_args={"init_command": f"SET time_zone = '{settings.DB_TIME_ZONE}'"},
+    )
+    if settings.DB_SLOW_QUERY_LOG:
+        setup_slow_query_log(db_engine.sync_engine, settings.DB_SLOW_QUERY_THRESHOLD_MS)
+    return db_engine
+
+
+# 创建异步数据库引擎，供 API 中的 async 路由使用
+async_engine = create_async_db_engine()
+# expire_on_commit=False：提交后仍可访问已加载的属性，避免在响应序列化时触发隐式 IO
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False
+)
+
+
+def configure_worker_engine() -> None:
+    """
+    为 Celery worker 进程重建数据库引擎
+
+    worker 进程并发度低，使用独立的较小连接池；同时丢弃从父进程继承的连接，
+    避免多个子进程共享同一个 socket。
+    """
+    global engine
+
+    if not is_db_available:
+        return
+
+    engine.dispose(close=False)
+    engine = create_db_engine(
+        pool_size=settings.CELERY_DB_POOL_SIZE,
+        max_overflow=settings.CELERY_DB_MAX_OVERFLOW,
+    )
+    # 已经导入 SessionLocal 的模块无需修改即可使用新引擎
+    SessionLocal.configure(bind=engine)
+    logger.info(
+        f"Celery worker 数据库连接池已配置: pool_size={settings.CELERY_DB_POOL_SIZE}, "
+        f"max_overflow={settings.CELERY_DB_MAX_OVERFLOW}"
+    )
+
+
 def get_db() -> Generator[Optional[Session], None, None]:
     """
     获取数据库会话
@@ -57,3 +158,19 @@ def get_db() -> Generator[Optional[Session], None, None]:
         raise
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    获取异步数据库会话
+
+    Yields:
+        AsyncSession: 异步数据库会话
+    """
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+        except Exception as e:
+            logger.error(f"数据库操作失败: {e}")
+            await db.rollback()
+            raise
@@ -10,12 +10,13 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt
 from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app.core.logging import setup_logging
 from app.core.security import ALGORITHM
-from app.db.session import get_db
+from app.db.session import get_async_db, get_db
 from app.modules.auth import crud
 from app.modules.auth.models.user import User
 from app.modules.auth.schemas.user import TokenPayload
@@ -91,6 +92,62 @@ def get_current_active_user(
     return current_user
 
 
+async def get_current_user_async(
+    db: AsyncSession = Depends(get_async_db), token: str = Depends(reusable_oauth2)
+) -> User:
+    """
+    获取当前用户（异步），供 async 路由使用，不占用线程池
+
+    Args:
+        db: 异步数据库会话
+        token: JWT 令牌
+
+    Returns:
+        User: 当前用户
+
+    Raises:
+        HTTPException: 认证失败
+    """
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
+        token_data = TokenPayload(**payload)
+    except (jwt.JWTError, ValidationError):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="无法验证凭据",
+        )
+    user = await db.get(User, token_data.sub)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="用户不存在",
+        )
+    return user
+
+
+async def get_current_active_user_async(
+    current_user: User = Depends(get_current_user_async),
+) -> User:
+    """
+    获取当前活跃用户（异步）
+
+    Args:
+        current_user: 当前用户
+
+    Returns:
+        User: 当前活跃用户
+
+    Raises:
+        HTTPException: 用户未激活
+    """
+    if not current_user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="用户未激活",
+        )
+    return current_user
+
+
 def get_current_active_superuser(
     current_user: User = Depends(get_current_user),
 ) -> User:
@@ -6,19 +6,26 @@
 from typing import Any, List
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db
-from app.modules.auth.api.deps import get_current_active_user
+from app.db.session import get_async_db, get_db
+from app.modules.auth.api.deps import (
+    get_current_active_user,
+    get_current_active_user_async,
+)
 from app.modules.auth.models.user import User
 from app.modules.chat import crud
 from app.modules.chat.schemas.conversation import (
+    ChatCompletionRequest,
     Conversation,
     ConversationCreate,
     ConversationUpdate,
     Message,
     MessageCreate,
 )
+from app.modules.chat.services.rag_chat import RAGChatService
 
 router = APIRouter()
 
@@ -133,17 +140,17 @@ def delete_conversation(
 
 
 @router.post("/conversations/{conversation_id}/messages", response_model=Message)
-def create_message(
+async def create_message(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     conversation_id: int,
     message_in: MessageCreate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: User = Depends(get_current_active_user_async),
 ) -> Any:
     """
     创建新消息
     """
-    conversation = crud.conversation.get(db=db, id=conversation_id)
+    conversation = await crud.conversation.get_async(db=db, id=conversation_id)
     if not conversation:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -154,25 +161,25 @@ def create_message(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="没有足够的权限",
         )
-    message = crud.message.create_with_conversation(
+    message = await crud.message.create_with_conversation_async(
         db=db, obj_in=message_in, conversation_id=conversation_id
     )
     return message
 
 
 @router.get("/conversations/{conversation_id}/messages", response_model=List[Message])
-def read_messages(
+async def read_messages(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     conversation_id: int,
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(get_current_active_user),
+    current_user: User = Depends(get_current_active_user_async),
 ) -> Any:
     """
     获取对话中的所有消息
     """
-    conversation = crud.conversation.get(db=db, id=conversation_id)
+    conversation = await crud.conversation.get_async(db=db, id=conversation_id)
     if not conversation:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -183,7 +190,47 @@ def read_messages(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="没有足够的权限",
         )
-    messages = crud.message.get_multi_by_conversation(
+    messages = await crud.message.get_multi_by_conversation_async(
         db=db, conversation_id=conversation_id, skip=skip, limit=limit
     )
     return messages
+
+
+@router.post("/conversations/{conversation_id}/completions")
+async def stream_completion(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    conversation_id: int,
+    completion_in: ChatCompletionRequest,
+    current_user: User = Depends(get_current_active_user_async),
+) -> Any:
+    """
+    基于对话关联的知识库流式生成回答（SSE）
+    """
+    conversation = await crud.conversation.get_async(db=db, id=conversation_id)
+    if not conversation:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="对话不存在",
+        )
+    if conversation.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="没有足够的权限",
+        )
+
+    service = RAGChatService(top_k=completion_in.top_k)
+    # 先组装 prompt（历史中不含本次问题），再保存用户消息
+    prompt = await service.build_prompt(db, conversation, completion_in.content)
+    await crud.message.create_with_conversation_async(
+        db=db,
+        obj_in=MessageCreate(role="user", content=completion_in.content),
+        conversation_id=conversation_id,
+    )
+
+    return StreamingResponse(
+        service.stream_answer(prompt),
+        media_type="text/event-stream",
+        # 禁止代理缓冲，保证 token 逐个推送到客户端
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -3,3 +3,4 @@
 """
 chat 模块 crud
 """
+from . import conversation, message
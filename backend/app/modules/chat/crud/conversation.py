@@ -5,6 +5,8 @@
 """
 from typing import List, Optional
 
+from sqlalchemy import select, update as sql_update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.modules.chat.models.conversation import Conversation
@@ -25,6 +27,55 @@ def get(db: Session, id: int) -> Optional[Conversation]:
     return db.query(Conversation).filter(Conversation.id == id).first()
 
 
+async def get_async(db: AsyncSession, id: int) -> Optional[Conversation]:
+    """
+    获取对话（异步）
+    
+    Args:
+        db: 异步数据库会话
+        id: 对话 ID
+        
+    Returns:
+        Optional[Conversation]: 对话对象或 None
+    """
+    result = await db.execute(select(Conversation).filter(Conversation.id == id))
+    return result.scalars().first()
+
+
+async def update_summary_async(
+    db: AsyncSession,
+    id: int,
+    summary: str,
+    summary_message_id: int,
+    previous_message_id: Optional[int],
+) -> bool:
+    """
+    更新对话的滚动摘要（异步）
+    
+    仅当摘要仍停留在 previous_message_id 时才更新，避免并发刷新互相覆盖。
+    
+    Args:
+        db: 异步数据库会话
+        id: 对话 ID
+        summary: 新摘要
+        summary_message_id: 新摘要覆盖到的最后一条消息 ID
+        previous_message_id: 刷新前摘要覆盖到的消息 ID
+        
+    Returns:
+        bool: 是否更新成功
+    """
+    query = sql_update(Conversation).where(Conversation.id == id)
+    if previous_message_id is None:
+        query = query.where(Conversation.summary_message_id.is_(None))
+    else:
+        query = query.where(Conversation.summary_message_id == previous_message_id)
+    result = await db.execute(
+        query.values(summary=summary, summary_message_id=summary_message_id)
+    )
+    await db.commit()
+    return result.rowcount > 0
+
+
 def get_multi(db: Session, skip: int = 0, limit: int = 100) -> List[Conversation]:
     """
     获取多个对话
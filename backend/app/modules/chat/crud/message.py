@@ -5,11 +5,17 @@
 """
 from typing import List, Optional
 
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from app.crud.base import DEFAULT_BATCH_SIZE, CRUDBase
 from app.modules.chat.models.conversation import Message
 from app.modules.chat.schemas.conversation import MessageCreate, MessageUpdate
 
+# 批量操作复用 CRUDBase 的实现
+_bulk = CRUDBase[Message, MessageCreate, MessageUpdate](Message)
+
 
 def get(db: Session, id: int) -> Optional[Message]:
     """
@@ -58,12 +64,90 @@ def get_multi_by_conversation(
     return (
         db.query(Message)
         .filter(Message.conversation_id == conversation_id)
+        .order_by(Message.id)
         .offset(skip)
         .limit(limit)
         .all()
     )
 
 
+async def get_multi_by_conversation_async(
+    db: AsyncSession, conversation_id: int, skip: int = 0, limit: int = 100
+) -> List[Message]:
+    """
+    获取对话的多个消息（异步）
+    
+    Args:
+        db: 异步数据库会话
+        conversation_id: 对话 ID
+        skip: 跳过数量
+        limit: 限制数量
+        
+    Returns:
+        List[Message]: 消息列表
+    """
+    result = await db.execute(
+        select(Message)
+        .filter(Message.conversation_id == conversation_id)
+        .order_by(Message.id)
+        .offset(skip)
+        .limit(limit)
+    )
+    return list(result.scalars().all())
+
+
+async def get_recent_by_conversation_async(
+    db: AsyncSession, conversation_id: int, limit: int = 10
+) -> List[Message]:
+    """
+    获取对话最近的消息（异步），按时间正序返回
+    
+    Args:
+        db: 异步数据库会话
+        conversation_id: 对话 ID
+        limit: 消息数量
+        
+    Returns:
+        List[Message]: 消息列表
+    """
+    result = await db.execute(
+        select(Message)
+        .filter(Message.conversation_id == conversation_id)
+        .order_by(Message.id.desc())
+        .limit(limit)
+    )
+    return list(reversed(result.scalars().all()))
+
+
+async def get_range_by_conversation_async(
+    db: AsyncSession,
+    conversation_id: int,
+    after_id: Optional[int] = None,
+    before_id: Optional[int] = None,
+    limit: int = 100,
+) -> List[Message]:
+    """
+    按 ID 区间获取对话的消息（异步），按时间正序返回
+    
+    Args:
+        db: 异步数据库会话
+        conversation_id: 对话 ID
+        after_id: 只返回 ID 大于该值的消息
+        before_id: 只返回 ID 小于该值的消息
+        limit: 限制数量
+        
+    Returns:
+        List[Message]: 消息列表
+    """
+    query = select(Message).filter(Message.conversation_id == conversation_id)
+    if after_id is not None:
+        query = query.filter(Message.id > after_id)
+    if before_id is not None:
+        query = query.filter(Message.id < before_id)
+    result = await db.execute(query.order_by(Message.id).limit(limit))
+    return list(result.scalars().all())
+
+
 def create(db: Session, obj_in: MessageCreate) -> Message:
     """
     创建消息
@@ -104,6 +188,53 @@ def create_with_conversation(
     return db_obj
 
 
+async def create_with_conversation_async(
+    db: AsyncSession, obj_in: MessageCreate, conversation_id: int
+) -> Message:
+    """
+    创建对话的消息（异步）
+    
+    Args:
+        db: 异步数据库会话
+        obj_in: 消息创建模型
+        conversation_id: 对话 ID
+        
+    Returns:
+        Message: 创建的消息对象
+    """
+    obj_in_data = obj_in.model_dump()
+    db_obj = Message(**obj_in_data, conversation_id=conversation_id)
+    db.add(db_obj)
+    await db.commit()
+    await db.refresh(db_obj)
+    return db_obj
+
+
+def create_many_with_conversation(
+    db: Session,
+    objs_in: List[MessageCreate],
+    conversation_id: int,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> List[int]:
+    """
+    批量创建对话的消息
+    
+    Args:
+        db: 数据库会话
+        objs_in: 消息创建模型列表
+        conversation_id: 对话 ID
+        batch_size: 每批行数
+        
+    Returns:
+        List[int]: 新建消息的 ID 列表
+    """
+    rows = [
+        {**obj_in.model_dump(), "conversation_id": conversation_id}
+        for obj_in in objs_in
+    ]
+    return _bulk.create_many(db, objs_in=rows, batch_size=batch_size)
+
+
 def update(db: Session, db_obj: Message, obj_in: MessageUpdate) -> Message:
     """
     更新消息
@@ -24,6 +24,9 @@ class Conversation(Base):
     user_id = Column(Integer, ForeignKey("user.id"), nullable=False)
     llm_config_id = Column(Integer, ForeignKey("llm_config.id"), nullable=True)
     knowledge_base_id = Column(Integer, ForeignKey("knowledge_base.id"), nullable=True)
+    # 滚动摘要：覆盖 id <= summary_message_id 的消息，构建上下文时代替更早的历史
+    summary = Column(Text, nullable=True)
+    summary_message_id = Column(Integer, nullable=True)
     created_at = Column(DateTime, default=get_now_datetime)
     updated_at = Column(DateTime, default=get_now_datetime, onupdate=get_now_datetime)
 
@@ -49,7 +52,10 @@ class Message(Base):
     """消息模型"""
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    conversation_id = Column(Integer, ForeignKey("conversation.id"), nullable=False)
+    # InnoDB 二级索引隐含主键，按 conversation_id 过滤并按 id 排序可直接走索引
+    conversation_id = Column(
+        Integer, ForeignKey("conversation.id"), nullable=False, index=True
+    )
     role = Column(String(16), nullable=False)  # user, assistant, system
     content = Column(Text, nullable=False)
     created_at = Column(DateTime, default=get_now_datetime)
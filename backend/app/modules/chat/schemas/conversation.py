@@ -39,6 +39,12 @@ class Message(MessageInDBBase):
     pass
 
 
+class ChatCompletionRequest(BaseModel):
+    """对话补全请求模型"""
+    content: str = Field(..., min_length=1)
+    top_k: Optional[int] = Field(None, ge=1, le=20)
+
+
 class ConversationBase(BaseModel):
     """对话基础模型"""
     title: str
@@ -62,6 +68,7 @@ class ConversationInDBBase(ConversationBase):
     """数据库中的对话模型"""
     id: int
     user_id: int
+    summary: Optional[str] = None
     created_at: datetime
     updated_at: datetime
 
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+语义回答缓存
+
+按 (knowledge_base_id, llm_config_id) 在进程内维护历史问题的向量索引，
+新问题与已缓存问题的余弦相似度超过阈值时直接返回缓存的回答。
+
+知识库文档变更时（process_document / delete_document）递增 Redis 中该知识库的
+版本号，各进程在查询时发现版本号变化即清空对应索引，从而实现跨进程失效。
+回答按查询时的版本号写入：生成回答期间版本号发生变化时，回答基于旧文档，不写入缓存。
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.redis import get_async_redis, get_redis
+
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY = "answer_cache:kb:{knowledge_base_id}:generation"
+
+
+@dataclass
+class CachedAnswer:
+    """缓存的回答"""
+
+    question: str
+    answer: str
+    sources: List[Dict[str, Any]]
+    created_at: float
+    similarity: float = 0.0
+
+
+@dataclass
+class _AnswerIndex:
+    """单个 (知识库, LLM 配置) 的问题向量索引"""
+
+    generation: str
+    vectors: Optional[np.ndarray] = None  # (n, dim)，已归一化
+    entries: List[CachedAnswer] = field(default_factory=list)
+
+    def search(self, query: np.ndarray) -> Tuple[int, float]:
+        """返回最相似条目的下标和相似度，索引为空时返回 (-1, 0.0)"""
+        if self.vectors is None or not self.entries:
+            return -1, 0.0
+        # 向量已归一化，点积即余弦相似度；条目数有上限，精确计算只需亚毫秒
+        similarities = self.vectors @ query
+        best = int(np.argmax(similarities))
+        return best, float(similarities[best])
+
+    def add(self, vector: np.ndarray, entry: CachedAnswer, max_entries: int) -> None:
+        """追加条目，超出容量时淘汰最早的条目"""
+        row = vector.reshape(1, -1)
+        self.vectors = row if self.vectors is None else np.vstack([self.vectors, row])
+        self.entries.append(entry)
+        overflow = len(self.entries) - max_entries
+        if overflow > 0:
+            self.vectors = self.vectors[overflow:]
+            self.entries = self.entries[overflow:]
+
+    def remove(self, position: int) -> None:
+        """删除指定条目"""
+        self.vectors = np.delete(self.vectors, position, axis=0)
+        del self.entries[position]
+
+
+def normalize_embedding(embedding: Sequence[float]) -> np.ndarray:
+    """
+    将嵌入向量归一化为单位向量
+
+    Args:
+        embedding: 嵌入向量
+
+    Returns:
+        np.ndarray: float32 单位向量
+    """
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+class SemanticAnswerCache:
+    """进程内的语义回答缓存"""
+
+    def __init__(
+        self,
+        threshold: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        max_indexes: Optional[int] = None,
+        ttl: Optional[int] = None,
+    ):
+        """
+        初始化缓存
+
+        Args:
+            threshold: 命中所需的最小余弦相似度
+            max_entries: 每个索引的最大条目数
+            max_indexes: 进程内最多保留的索引数
+            ttl: 条目有效期（秒）
+        """
+        self.threshold = threshold or settings.ANSWER_CACHE_SIMILARITY_THRESHOLD
+        self.max_entries = max_entries or settings.ANSWER_CACHE_MAX_ENTRIES
+        self.max_indexes = max_indexes or settings.ANSWER_CACHE_MAX_INDEXES
+        self.ttl = ttl or settings.ANSWER_CACHE_TTL
+        self._indexes: "OrderedDict[Tuple[int, Optional[int]], _AnswerIndex]" = (
+            OrderedDict()
+        )
+
+        # 指标
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.stale_writes = 0
+        self.errors = 0
+
+    async def get_generation(self, knowledge_base_id: int) -> Optional[str]:
+        """读取知识库的缓存版本号，Redis 不可用时返回 None"""
+        try:
+            generation = await get_async_redis().get(
+                GENERATION_KEY.format(knowledge_base_id=knowledge_base_id)
+            )
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"读取回答缓存版本号失败，跳过缓存: {str(e)}")
+            return None
+        return generation or "0"
+
+    async def _get_index(
+        self,
+        knowledge_base_id: int,
+        llm_config_id: Optional[int],
+        create: bool,
+        generation: Optional[str] = None,
+    ) -> Optional[_AnswerIndex]:
+        """
+        获取与当前版本号一致的索引，版本号变化时丢弃旧索引
+
+        Redis 不可用时无法感知其他进程的失效通知，返回 None（不使用缓存）。
+        调用方已读取版本号时通过 generation 传入，避免重复读取。
+        """
+        if generation is None:
+            generation = await self.get_generation(knowledge_base_id)
+        if generation is None:
+            return None
+
+        key = (knowledge_base_id, llm_config_id)
+        index = self._indexes.get(key)
+        if index is not None and index.generation != generation:
+            del self._indexes[key]
+            self.invalidations += 1
+            index = None
+
+        if index is None:
+            if not create:
+                return None
+            index = _AnswerIndex(generation=generation)
+            self._indexes[key] = index
+            if len(self._indexes) > self.max_indexes:
+                self._indexes.popitem(last=False)
+        else:
+            self._indexes.move_to_end(key)
+        return index
+
+    async def lookup(
+        self,
+        knowledge_base_id: int,
+        llm_config_id: Optional[int],
+        embedding: Sequence[float],
+        generation: Optional[str] = None,
+    ) -> Optional[CachedAnswer]:
+        """
+        查找相似问题的缓存回答
+
+        Args:
+            knowledge_base_id: 知识库 ID
+            llm_config_id: LLM 配置 ID
+            embedding: 问题的嵌入向量
+            generation: 已读取的版本号，为空时从 Redis 读取
+
+        Returns:
+            Optional[CachedAnswer]: 命中的回答，未命中时为 None
+        """
+        index = await self._get_index(
+            knowledge_base_id, llm_config_id, create=False, generation=generation
+        )
+        if index is None:
+            self.misses += 1
+            return None
+
+        position, similarity = index.search(normalize_embedding(embedding))
+        if position < 0 or similarity < self.threshold:
+            self.misses += 1
+            return None
+
+        entry = index.entries[position]
+        if time.time() - entry.created_at > self.ttl:
+            index.remove(position)
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return CachedAnswer(
+            question=entry.question,
+            answer=entry.answer,
+            sources=entry.sources,
+            created_at=entry.created_at,
+            similarity=similarity,
+        )
+
+    async def store(
+        self,
+        knowledge_base_id: int,
+        llm_config_id: Optional[int],
+        embedding: Sequence[float],
+        question: str,
+        answer: str,
+        sources: List[Dict[str, Any]],
+        generation: Optional[str],
+    ) -> None:
+        """
+        缓存一次生成的回答
+
+        Args:
+            knowledge_base_id: 知识库 ID
+            llm_config_id: LLM 配置 ID
+            embedding: 问题的嵌入向量
+            question: 问题
+            answer: 回答
+            sources: 回答引用的来源
+            generation: 检索时读取的版本号，与当前版本号不一致时不写入
+        """
+        if not answer or generation is None:
+            return
+        current = await self.get_generation(knowledge_base_id)
+        if current != generation:
+            # 生成回答期间知识库文档已变更，回答可能基于旧内容
+            if current is not None:
+                self.stale_writes += 1
+            return
+        index = await self._get_index(
+            knowledge_base_id, llm_config_id, create=True, generation=current
+        )
+        if index is None:
+            return
+
+        vector = normalize_embedding(embedding)
+        # 与已有条目几乎相同的问题不重复缓存
+        _, similarity = index.search(vector)
+        if similarity >= self.threshold:
+            return
+        index.add(
+            vector,
+            CachedAnswer(
+                question=question,
+                answer=answer,
+                sources=sources,
+                created_at=time.time(),
+            ),
+            self.max_entries,
+        )
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        获取缓存指标
+
+        Returns:
+            Dict[str, Any]: 指标
+        """
+        return {
+            "indexes": len(self._indexes),
+            "entries": sum(len(index.entries) for index in self._indexes.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "stale_writes": self.stale_writes,
+            "errors": self.errors,
+        }
+
+
+def invalidate_knowledge_base(knowledge_base_id: int) -> None:
+    """
+    使知识库相关的回答缓存失效（递增版本号），在文档变更后调用
+
+    Args:
+        knowledge_base_id: 知识库 ID
+    """
+    try:
+        get_redis().incr(GENERATION_KEY.format(knowledge_base_id=knowledge_base_id))
+        logger.info(f"知识库 {knowledge_base_id} 的回答缓存已失效")
+    except Exception as e:
+        logger.error(f"使知识库 {knowledge_base_id} 的回答缓存失效时出错: {str(e)}")
+
+
+# 进程内共享的回答缓存
+answer_cache = SemanticAnswerCache()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+对话历史上下文
+
+最近 N 轮消息原样保留，更早的消息压缩为存储在对话上的滚动摘要。
+摘要在回答生成后增量刷新：窗口外累计的未摘要消息达到阈值时，
+用「旧摘要 + 新消息」生成新摘要，因此每次构建上下文的开销与对话长度无关。
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.modules.chat import crud
+from app.modules.chat.models.conversation import Conversation, Message
+from app.modules.llm.services.chat_completion import (
+    LLMEndpoint,
+    create_chat_completion,
+)
+from app.utils.tokens import truncate_to_tokens
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_SYSTEM_PROMPT = (
+    "你负责维护一段客服对话的摘要。请在已有摘要的基础上合并新的对话内容，"
+    "保留用户的关键问题、诉求、已确认的事实和尚未解决的事项，省略寒暄。"
+    "直接输出更新后的摘要。"
+)
+
+ROLE_NAMES = {"user": "用户", "assistant": "助手", "system": "系统"}
+
+
+@dataclass
+class ConversationContext:
+    """构建 prompt 所需的对话历史"""
+
+    summary: Optional[str] = None
+    messages: List[Message] = field(default_factory=list)
+
+    @property
+    def is_empty(self) -> bool:
+        """是否没有任何历史"""
+        return not self.summary and not self.messages
+
+
+class ConversationContextBuilder:
+    """对话历史上下文构建器"""
+
+    def __init__(
+        self,
+        window_turns: Optional[int] = None,
+        refresh_interval: Optional[int] = None,
+    ):
+        """
+        初始化构建器
+
+        Args:
+            window_turns: 原样保留的最近轮数
+            refresh_interval: 窗口外累计多少条未摘要消息时刷新摘要
+        """
+        self.window_turns = window_turns or settings.CHAT_HISTORY_WINDOW_TURNS
+        self.refresh_interval = (
+            refresh_interval or settings.CHAT_SUMMARY_REFRESH_INTERVAL
+        )
+
+    @property
+    def window_size(self) -> int:
+        """窗口内的消息条数"""
+        return self.window_turns * 2
+
+    async def load(
+        self, db: AsyncSession, conversation: Conversation
+    ) -> ConversationContext:
+        """
+        加载对话的摘要和最近的消息
+
+        Args:
+            db: 异步数据库会话
+            conversation: 对话
+
+        Returns:
+            ConversationContext: 对话历史
+        """
+        messages = await crud.message.get_recent_by_conversation_async(
+            db, conversation.id, limit=self.window_size
+        )
+        return ConversationContext(summary=conversation.summary, messages=messages)
+
+    async def refresh_summary(
+        self, conversation_id: int, endpoint: LLMEndpoint
+    ) -> bool:
+        """
+        必要时刷新对话的滚动摘要，使用独立的数据库会话
+
+        Args:
+            conversation_id: 对话 ID
+            endpoint: 生成摘要使用的 LLM
+
+        Returns:
+            bool: 是否刷新了摘要
+        """
+        async with AsyncSessionLocal() as db:
+            conversation = await crud.conversation.get_async(db, id=conversation_id)
+            if conversation is None:
+                return False
+
+            window = await crud.message.get_recent_by_conversation_async(
+                db, conversation_id, limit=self.window_size
+            )
+            if len(window) < self.window_size:
+                return False
+
+            # 只摘要窗口之外、尚未进入摘要的消息，每次最多处理两个刷新周期的量
+            previous_message_id = conversation.summary_message_id
+            pending = await crud.message.get_range_by_conversation_async(
+                db,
+                conversation_id,
+                after_id=previous_message_id,
+                before_id=window[0].id,
+                limit=self.refresh_interval * 2,
+            )
+            if len(pending) < self.refresh_interval:
+                return False
+
+            summary = await create_chat_completion(
+                endpoint,
+                self._build_summary_messages(conversation.summary, pending),
+                max_tokens=settings.CHAT_SUMMARY_MAX_TOKENS,
+            )
+            summary = summary.strip()
+            if not summary:
+                return False
+
+            updated = await crud.conversation.update_summary_async(
+                db,
+                id=conversation_id,
+                summary=summary,
+                summary_message_id=pending[-1].id,
+                previous_message_id=previous_message_id,
+            )
+            if updated:
+                logger.info(
+                    f"对话 {conversation_id} 摘要已刷新，覆盖到消息 {pending[-1].id}"
+                )
+            return updated
+
+    @staticmethod
+    def _build_summary_messages(
+        summary: Optional[str], messages: List[Message]
+    ) -> List[Dict[str, str]]:
+        """组装生成摘要的 prompt"""
+        lines = [
+            f"{ROLE_NAMES.get(message.role, message.role)}："
+            + truncate_to_tokens(
+                message.content, settings.CHAT_SUMMARY_MESSAGE_MAX_TOKENS
+            )
+            for message in messages
+        ]
+        content = (
+            f"已有摘要：\n{summary or '（无）'}\n\n新的对话内容：\n" + "\n".join(lines)
+        )
+        return [
+            {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+            {"role": "user", "content": content},
+        ]
+
+
+# 正在刷新摘要的对话，避免同一进程内重复刷新；任务引用也防止被垃圾回收
+_refreshing: Set[int] = set()
+_refresh_tasks: Set[asyncio.Task] = set()
+
+
+def schedule_summary_refresh(
+    builder: ConversationContextBuilder, conversation_id: int, endpoint: LLMEndpoint
+) -> None:
+    """
+    在后台刷新对话摘要，不阻塞当前响应
+
+    Args:
+        builder: 上下文构建器
+        conversation_id: 对话 ID
+        endpoint: 生成摘要使用的 LLM
+    """
+    if conversation_id in _refreshing:
+        return
+
+    async def run() -> None:
+        try:
+            await builder.refresh_summary(conversation_id, endpoint)
+        except Exception as e:
+            logger.error(f"刷新对话 {conversation_id} 摘要时出错: {str(e)}")
+        finally:
+            _refreshing.discard(conversation_id)
+
+    _refreshing.add(conversation_id)
+    task = asyncio.get_running_loop().create_task(run())
+    _refresh_tasks.add(task)
+    task.add_done_callback(_refresh_tasks.discard)
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+基于知识库检索增强的流式对话服务
+"""
+
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.modules.chat import crud
+from app.modules.chat.models.conversation import Conversation
+from app.modules.chat.schemas.conversation import MessageCreate
+from app.modules.chat.services.answer_cache import answer_cache
+from app.modules.chat.services.conversation_context import (
+    ConversationContextBuilder,
+    schedule_summary_refresh,
+)
+from app.modules.knowledge.services.context_packer import ContextPacker
+from app.modules.knowledge.services.vector_store import get_vector_store
+from app.modules.llm.services.chat_completion import (
+    LLMEndpoint,
+    stream_chat_completion,
+)
+from app.utils.tokens import count_tokens
+
+logger = logging.getLogger(__name__)
+
+# 每条消息在 chat 格式中的额外开销（role、分隔符等）
+MESSAGE_TOKEN_OVERHEAD = 4
+# 检索上下文最多占用剩余预算的比例，其余留给历史消息
+CONTEXT_BUDGET_RATIO = 0.7
+
+
+@dataclass
+class ChatPrompt:
+    """组装完成、可直接发送给 LLM 的 prompt"""
+
+    conversation_id: int
+    endpoint: LLMEndpoint
+    messages: List[Dict[str, str]]
+    sources: List[Dict[str, Any]] = field(default_factory=list)
+    prompt_tokens: int = 0
+    # 语义回答缓存相关
+    question: str = ""
+    knowledge_base_id: Optional[int] = None
+    llm_config_id: Optional[int] = None
+    query_embedding: Optional[List[float]] = None
+    cacheable: bool = False
+    cache_generation: Optional[str] = None  # 检索时知识库的缓存版本号
+    cached_answer: Optional[str] = None
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """
+    将事件编码为 SSE 数据帧
+
+    Args:
+        event: 事件内容
+
+    Returns:
+        str: SSE 数据帧
+    """
+    return f"data: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+
+class RAGChatService:
+    """检索增强的对话服务"""
+
+    def __init__(
+        self, top_k: Optional[int] = None, max_prompt_tokens: Optional[int] = None
+    ):
+        """
+        初始化对话服务
+
+        Args:
+            top_k: 检索的分块数量
+            max_prompt_tokens: prompt 的 token 预算
+        """
+        self.top_k = top_k or settings.RAG_TOP_K
+        self.max_prompt_tokens = max_prompt_tokens or settings.RAG_PROMPT_MAX_TOKENS
+        self.context_builder = ConversationContextBuilder()
+        self.context_packer = ContextPacker()
+
+    async def embed(self, question: str) -> List[float]:
+        """
+        计算问题的嵌入向量（检索和回答缓存共用）
+
+        Args:
+            question: 用户问题
+
+        Returns:
+            List[float]: 嵌入向量
+        """
+        # 嵌入计算是同步的 CPU 操作，放到线程池中执行
+        vector_store = await run_in_threadpool(get_vector_store)
+        return await run_in_threadpool(vector_store.get_embedding, question)
+
+    async def retrieve(
+        self,
+        knowledge_base_id: Optional[int],
+        question: str,
+        query_embedding: Optional[List[float]] = None,
+    ) -> List[Any]:
+        """
+        从对话关联的知识库中检索相关分块
+
+        Args:
+            knowledge_base_id: 知识库 ID，为空时不检索
+            question: 用户问题
+            query_embedding: 已计算好的问题向量
+
+        Returns:
+            List[Any]: 检索结果，按相关度降序
+        """
+        if not knowledge_base_id:
+            return []
+
+        # 嵌入计算和向量检索是同步的 CPU 操作，放到线程池中执行
+        vector_store = await run_in_threadpool(get_vector_store)
+        collection_name = vector_store.get_knowledge_base_collection_name(
+            knowledge_base_id
+        )
+        return await run_in_threadpool(
+            vector_store.search,
+            collection_name=collection_name,
+            query=question,
+            limit=self.top_k,
+            query_embedding=query_embedding,
+            mmr=settings.RAG_USE_MMR,
+        )
+
+    async def build_prompt(
+        self, db: AsyncSession, conversation: Conversation, question: str
+    ) -> ChatPrompt:
+        """
+        组装 prompt：system 指令 + 对话摘要 + 检索上下文 + 最近消息 + 当前问题，
+        总长度不超过预算
+
+        需要在保存当前问题之前调用，历史消息中不包含当前问题。
+        命中语义回答缓存时跳过检索，返回的 prompt 带有 cached_answer。
+
+        Args:
+            db: 异步数据库会话
+            conversation: 对话
+            question: 用户问题
+
+        Returns:
+            ChatPrompt: 组装完成的 prompt
+        """
+        knowledge_base_id = conversation.knowledge_base_id
+        endpoint = LLMEndpoint.from_config(conversation.llm_config)
+        context = await self.context_builder.load(db, conversation)
+        history = context.messages
+
+        # 只缓存不依赖历史消息的首轮问题，追问的含义取决于上下文，不能复用
+        cacheable = bool(
+            settings.ANSWER_CACHE_ENABLED and knowledge_base_id and context.is_empty
+        )
+        query_embedding = None
+        cache_generation = None
+        if knowledge_base_id:
+            query_embedding = await self.embed(question)
+        if cacheable:
+            # 在检索前读取版本号，回答写入缓存时据此判断期间文档是否变更
+            cache_generation = await answer_cache.get_generation(knowledge_base_id)
+            cached = await answer_cache.lookup(
+                knowledge_base_id,
+                conversation.llm_config_id,
+                query_embedding,
+                generation=cache_generation,
+            )
+            if cached is not None:
+                logger.info(
+                    f"对话 {conversation.id} 命中回答缓存，相似度: {cached.similarity:.3f}"
+                )
+                return ChatPrompt(
+                    conversation_id=conversation.id,
+                    endpoint=endpoint,
+                    messages=[],
+                    sources=cached.sources,
+                    question=question,
+                    knowledge_base_id=knowledge_base_id,
+                    llm_config_id=conversation.llm_config_id,
+                    cached_answer=cached.answer,
+                )
+
+        results = await self.retrieve(knowledge_base_id, question, query_embedding)
+
+        system_prompt = settings.RAG_SYSTEM_PROMPT
+        if context.summary:
+            system_prompt = f"{system_prompt}\n\n此前对话摘要：\n{context.summary}"
+        used_tokens = (
+            count_tokens(system_prompt)
+            + count_tokens(question)
+            + 2 * MESSAGE_TOKEN_OVERHEAD
+        )
+        remaining = max(self.max_prompt_tokens - used_tokens, 0)
+
+        # 去重、合并相邻分块后按「分数 / token」装入检索上下文预算
+        context_budget = int(remaining * CONTEXT_BUDGET_RATIO)
+        passages = self.context_packer.pack(results, context_budget)
+        context_parts = [
+            f"[{i}] 《{passage.document_title}》\n{passage.content}"
+            for i, passage in enumerate(passages, start=1)
+        ]
+        remaining -= sum(passage.tokens for passage in passages)
+        sources = [passage.to_source() for passage in passages]
+
+        if context_parts:
+            system_prompt = (
+                f"{system_prompt}\n\n参考资料：\n" + "\n\n".join(context_parts)
+            )
+
+        # 从最近的消息开始放入历史，直到预算用完
+        history_messages: List[Dict[str, str]] = []
+        for message in reversed(history):
+            message_tokens = count_tokens(message.content) + MESSAGE_TOKEN_OVERHEAD
+            if message_tokens > remaining:
+                break
+            remaining -= message_tokens
+            history_messages.insert(0, {"role": message.role, "content": message.content})
+
+        messages = [
+            {"role": "system", "content": system_prompt},
+            *history_messages,
+            {"role": "user", "content": question},
+        ]
+        return ChatPrompt(
+            conversation_id=conversation.id,
+            endpoint=endpoint,
+            messages=messages,
+            sources=sources,
+            prompt_tokens=self.max_prompt_tokens - remaining,
+            question=question,
+            knowledge_base_id=knowledge_base_id,
+            llm_config_id=conversation.llm_config_id,
+            query_embedding=query_embedding,
+            cacheable=cacheable,
+            cache_generation=cache_generation,
+        )
+
+    async def stream_answer(self, prompt: ChatPrompt) -> AsyncIterator[str]:
+        """
+        流式生成回答（SSE 数据帧），生成结束后保存一次助手消息
+
+        Args:
+            prompt: 组装完成的 prompt
+
+        Yields:
+            str: SSE 数据帧
+        """
+        yield format_sse({"type": "sources", "sources": prompt.sources})
+
+        if prompt.cached_answer is not None:
+            yield format_sse({"type": "token", "content": prompt.cached_answer})
+            message_id = await self._save_answer(prompt, prompt.cached_answer)
+            yield format_sse({"type": "done", "message_id": message_id, "cached": True})
+            return
+
+        start_time = time.perf_counter()
+        first_token_time = None
+        answer_parts: List[str] = []
+        try:
+            async for content in stream_chat_completion(
+                prompt.endpoint, prompt.messages
+            ):
+                if first_token_time is None:
+                    first_token_time = time.perf_counter() - start_time
+                answer_parts.append(content)
+                yield format_sse({"type": "token", "content": content})
+        except Exception as e:
+            logger.error(f"对话 {prompt.conversation_id} 生成回答时出错: {str(e)}")
+            yield format_sse({"type": "error", "detail": f"生成回答时出错: {str(e)}"})
+            return
+
+        answer = "".join(answer_parts)
+        logger.info(
+            f"对话 {prompt.conversation_id} 回答生成完成，prompt tokens: {prompt.prompt_tokens}, "
+            f"首 token 耗时: {(first_token_time or 0) * 1000:.0f} ms, "
+            f"总耗时: {(time.perf_counter() - start_time) * 1000:.0f} ms"
+        )
+
+        message_id = await self._save_answer(prompt, answer)
+        schedule_summary_refresh(
+            self.context_builder, prompt.conversation_id, prompt.endpoint
+        )
+        if prompt.cacheable:
+            await answer_cache.store(
+                prompt.knowledge_base_id,
+                prompt.llm_config_id,
+                prompt.query_embedding,
+                question=prompt.question,
+                answer=answer,
+                sources=prompt.sources,
+                generation=prompt.cache_generation,
+            )
+        yield format_sse({"type": "done", "message_id": message_id, "cached": False})
+
+    async def _save_answer(self, prompt: ChatPrompt, answer: str) -> int:
+        """
+        保存助手消息
+
+        Args:
+            prompt: 组装完成的 prompt
+            answer: 回答内容
+
+        Returns:
+            int: 消息 ID
+        """
+        # 请求作用域的会话在响应开始时已释放，这里使用独立的会话保存
+        async with AsyncSessionLocal() as db:
+            message = await crud.message.create_with_conversation_async(
+                db,
+                MessageCreate(role="assistant", content=answer),
+                conversation_id=prompt.conversation_id,
+            )
+        return message.id
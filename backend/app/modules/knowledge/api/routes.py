@@ -4,28 +4,84 @@
 知识库相关路由
 """
 
+import hashlib
 import logging
 import os
-from datetime import datetime
-from typing import Any, List
-
-from app.db.session import get_db
-from app.modules.auth.api.deps import get_current_active_user
+from datetime import datetime, timedelta
+from typing import Any, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.security import create_signed_token, decode_signed_token
+from app.db.session import get_async_db, get_db
+from app.modules.auth.api.deps import (
+    get_current_active_user,
+    get_current_active_user_async,
+)
 from app.modules.auth.models.user import User
+from app.modules.chat.services.answer_cache import invalidate_knowledge_base
 from app.modules.knowledge import crud
+from app.modules.knowledge.models.knowledge_base import (
+    UploadSession as UploadSessionModel,
+    UploadSessionStatus,
+    get_now_datetime,
+)
 from app.modules.knowledge.schemas.knowledge_base import (
     Document,
     DocumentCreate,
     DocumentProcessTask,
     DocumentProcessTaskCreate,
+    DocumentUploadByHash,
+    DirectUpload,
+    DirectUploadComplete,
+    DirectUploadCreate,
     KnowledgeBase,
+    IndexProfileUpdate,
     KnowledgeBaseCreate,
     KnowledgeBaseUpdate,
+    SearchQuery,
+    UploadPartResult,
+    UploadSession,
+    UploadSessionCreate,
+    UploadSessionUpdate,
+)
+from app.modules.knowledge.services.conversion_cache import compute_file_hash
+from app.modules.knowledge.services.file_references import release_file
+from app.modules.knowledge.services.minio import MinioService, file_lock
+from app.modules.knowledge.services.reranker import get_reranker
+from app.modules.knowledge.services.upload_sessions import (
+    UploadIncompleteError,
+    assemble_upload,
+    choose_part_size,
+    complete_lock,
+    direct_upload_object_name,
+    list_uploaded_parts,
+    staging_object_name,
+    store_assembled_upload,
+)
+from app.modules.knowledge.services.vector_store import (
+    build_metadata_filter,
+    get_vector_store,
+)
+from app.modules.knowledge.services.document_processor import TEXT_FILE_TYPES
+from app.modules.knowledge.tasks.document_processing import (
+    ingest_text_inline,
+    process_document,
 )
-from app.modules.knowledge.services.minio import MinioService
-from app.modules.knowledge.services.vector_store import VectorStore
-from app.modules.knowledge.tasks.document_processing import process_document
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
+from app.modules.knowledge.tasks.routing import select_ingest_route
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    UploadFile,
+    status,
+)
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 router = APIRouter()
@@ -33,19 +89,29 @@ router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
-def process_document_task(task_id: int):
+def process_document_task(task_id: int, user_id: int, file_type: str, file_size: int):
     """
     处理文档任务
 
-    使用Celery执行文档处理，不会阻塞主应用程序
+    使用Celery执行文档处理，不会阻塞主应用程序。
+    按文件类型和大小投递到对应队列，小文本文件不会排在大 PDF 后面。
 
     Args:
         task_id: 任务 ID
+        user_id: 上传用户 ID
+        file_type: 文件类型（不含点号）
+        file_size: 文件大小（字节）
     """
-    logger.info(f"提交文档处理任务到Celery: {task_id}")
+    route = select_ingest_route(file_type, file_size)
+    logger.info(
+        f"提交文档处理任务到Celery: {task_id}, 队列: {route['queue']}, "
+        f"优先级: {route['priority']}"
+    )
 
     # 使用Celery提交任务
-    result = process_document.delay(task_id)
+    result = process_document.apply_async(
+        args=[task_id], kwargs={"user_id": user_id}, **route
+    )
 
     # 不等待任务完成，立即返回
     logger.info(f"文档处理任务已提交到Celery: {task_id}, 任务ID: {result.id}")
@@ -53,6 +119,42 @@ def process_document_task(task_id: int):
     return result
 
 
+# 支持上传的文件扩展名
+SUPPORTED_FILE_EXTENSIONS = [".pdf", ".txt", ".md", ".docx", ".pptx", ".html", ".htm"]
+
+
+def get_upload_file_type(file_name: str) -> str:
+    """
+    检查上传文件的类型
+
+    Args:
+        file_name: 文件名
+
+    Returns:
+        str: 文件类型（不含点号）
+
+    Raises:
+        HTTPException: 不支持的文件类型
+    """
+    file_extension = os.path.splitext(file_name)[1].lower()
+    logger.info(f"文件类型: {file_extension}")
+
+    if file_extension == ".doc":
+        # 旧版二进制 Word 格式无法直接解析，提前拒绝，不占用 worker
+        logger.error(f"不支持的文件类型: {file_extension}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="不支持旧版 Word（.doc）文档，请另存为 .docx 后上传",
+        )
+    if file_extension not in SUPPORTED_FILE_EXTENSIONS:
+        logger.error(f"不支持的文件类型: {file_extension}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="不支持的文件类型，目前仅支持 PDF、TXT、Markdown、Word（.docx）、PowerPoint（.pptx）、HTML 文档",
+        )
+    return file_extension[1:]
+
+
 @router.get("/test")
 def test_route():
     """
@@ -159,6 +261,44 @@ def update_knowledge_base(
     return knowledge_base
 
 
+@router.put(
+    "/knowledge-bases/{knowledge_base_id}/index-profile", response_model=KnowledgeBase
+)
+def update_index_profile(
+    *,
+    db: Session = Depends(get_db),
+    knowledge_base_id: int,
+    profile_in: IndexProfileUpdate,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    调整知识库的向量检索参数（search_ef），在延迟和召回率之间取舍，立即生效
+    """
+    knowledge_base = crud.knowledge_base.get(db=db, id=knowledge_base_id)
+    if not knowledge_base:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="知识库不存在",
+        )
+    if knowledge_base.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="没有足够的权限",
+        )
+
+    knowledge_base = crud.knowledge_base.update(
+        db=db, db_obj=knowledge_base, obj_in={"hnsw_search_ef": profile_in.search_ef}
+    )
+
+    # 集合尚未创建时，首次处理文档会按知识库的参数创建
+    vector_store = get_vector_store()
+    vector_store.set_search_ef(
+        vector_store.get_knowledge_base_collection_name(knowledge_base_id),
+        profile_in.search_ef,
+    )
+    return knowledge_base
+
+
 @router.delete("/knowledge-bases/{knowledge_base_id}", response_model=KnowledgeBase)
 def delete_knowledge_base(
     *,
@@ -182,11 +322,34 @@ def delete_knowledge_base(
         )
 
     # 删除向量数据库中的集合
-    vector_store = VectorStore()
+    vector_store = get_vector_store()
     collection_name = vector_store.get_knowledge_base_collection_name(knowledge_base_id)
     vector_store.delete_collection(collection_name)
+    invalidate_knowledge_base(knowledge_base_id)
+
+    # 取消未完成的分片上传，已上传的分片随之删除
+    active_sessions = [
+        upload_session
+        for upload_session in knowledge_base.upload_sessions
+        if upload_session.status == UploadSessionStatus.ACTIVE
+    ]
+    if active_sessions:
+        minio_service = MinioService()
+        for upload_session in active_sessions:
+            minio_service.abort_multipart_upload(
+                upload_session.object_name, upload_session.upload_id
+            )
+
+    # 文档和任务随知识库级联删除，之后释放不再被引用的文件
+    file_paths = {
+        document.file_path
+        for document in knowledge_base.documents
+        if document.file_path
+    } | {task.file_path for task in knowledge_base.document_process_tasks}
 
     knowledge_base = crud.knowledge_base.remove(db=db, id=knowledge_base_id)
+    for file_path in file_paths:
+        release_file(file_path)
     return knowledge_base
 
 
@@ -221,18 +384,18 @@ def create_document(
 @router.get(
     "/knowledge-bases/{knowledge_base_id}/documents", response_model=List[Document]
 )
-def read_documents(
+async def read_documents(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     knowledge_base_id: int,
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(get_current_active_user),
+    current_user: User = Depends(get_current_active_user_async),
 ) -> Any:
     """
     获取知识库中的所有文档
     """
-    knowledge_base = crud.knowledge_base.get(db=db, id=knowledge_base_id)
+    knowledge_base = await crud.knowledge_base.get_async(db=db, id=knowledge_base_id)
     if not knowledge_base:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -243,7 +406,7 @@ def read_documents(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="没有足够的权限",
         )
-    documents = crud.document.get_multi_by_knowledge_base(
+    documents = await crud.document.get_multi_by_knowledge_base_async(
         db=db, knowledge_base_id=knowledge_base_id, skip=skip, limit=limit
     )
     return documents
@@ -342,7 +505,7 @@ def delete_document(
 
     # 从向量数据库中删除文档
     try:
-        vector_store = VectorStore()
+        vector_store = get_vector_store()
         collection_name = vector_store.get_knowledge_base_collection_name(
             knowledge_base_id
         )
@@ -356,20 +519,17 @@ def delete_document(
         logger.error(f"从向量数据库中删除文档时出错: {str(e)}")
         # 继续执行，不要因为向量数据库删除失败而中断整个流程
 
-    # 如果文档有关联的文件，从MinIO中删除
-    if document.file_path:
-        try:
-            minio_service = MinioService()
-            minio_service.delete_file(document.file_path)
-            logger.info(f"从MinIO中删除文件: {document.file_path}")
-        except Exception as e:
-            logger.error(f"从MinIO中删除文件时出错: {str(e)}")
-            # 继续执行，不要因为MinIO删除失败而中断整个流程
-
     # 从数据库中删除文档
     document = crud.document.remove(db=db, id=document_id)
     logger.info(f"从数据库中删除文档: {document_id}")
 
+    # 如果文档有关联的文件且不再被其他文档引用，从MinIO中删除
+    if document.file_path:
+        release_file(document.file_path)
+
+    # 知识库内容已变化，已缓存的回答可能过期
+    invalidate_knowledge_base(knowledge_base_id)
+
     return document
 
 
@@ -378,10 +538,10 @@ def delete_document(
 )
 async def upload_document(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     knowledge_base_id: int,
     file: UploadFile = File(...),
-    current_user: User = Depends(get_current_active_user),
+    current_user: User = Depends(get_current_active_user_async),
 ) -> Any:
     """
     上传文档到知识库（异步处理）
@@ -393,7 +553,7 @@ async def upload_document(
     )
 
     # 检查知识库是否存在
-    knowledge_base = crud.knowledge_base.get(db=db, id=knowledge_base_id)
+    knowledge_base = await crud.knowledge_base.get_async(db=db, id=knowledge_base_id)
     if not knowledge_base:
         logger.error(f"知识库不存在: {knowledge_base_id}")
         raise HTTPException(
@@ -410,34 +570,38 @@ async def upload_document(
         )
 
     # 检查文件类型
-    file_extension = os.path.splitext(file.filename)[1].lower()
-    logger.info(f"文件类型: {file_extension}")
+    file_type = get_upload_file_type(file.filename)
 
-    if file_extension not in [".pdf", ".txt", ".md", ".doc", ".docx"]:
-        logger.error(f"不支持的文件类型: {file_extension}")
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="不支持的文件类型，目前仅支持 PDF、TXT、Markdown、Word 文档",
-        )
-
-    # 读取文件内容
+    # 读取文件内容，计算 SHA-256：文件按内容寻址存储，也用于复用转换结果
     file_content = await file.read()
+    file_hash = await run_in_threadpool(compute_file_hash, file_content)
+    minio_file_path = MinioService.content_addressed_path(file_hash)
 
-    # 生成 MinIO 中的文件路径
-    file_type = file_extension[1:]  # 去掉点号
-    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-    minio_file_path = f"knowledge_base/{knowledge_base_id}/{timestamp}_{file.filename}"
-
-    # 上传文件到 MinIO
-    minio_service = MinioService()
-    upload_success = minio_service.upload_file(
+    # 先创建任务再上传：任务引用文件后，并发删除其他文档时不会删掉该文件
+    task_in = DocumentProcessTaskCreate(
+        file_name=file.filename,
         file_path=minio_file_path,
+        file_hash=file_hash,
+        file_type=file_type,
+        knowledge_base_id=knowledge_base_id,
+        user_id=current_user.id,
+    )
+    task = await crud.document_process_task.create_async(db=db, obj_in=task_in)
+    logger.info(f"创建文档处理任务成功，ID: {task.id}")
+
+    # 上传文件到 MinIO（同步 IO，放到线程池中执行，避免阻塞事件循环），
+    # 相同内容的文件已存在时跳过上传
+    minio_service = await run_in_threadpool(MinioService)
+    stored_path = await run_in_threadpool(
+        minio_service.upload_file_deduplicated,
+        file_hash=file_hash,
         file_content=file_content,
         content_type=f"application/{file_type}",
     )
 
-    if not upload_success:
+    if not stored_path:
         logger.error(f"上传文件到 MinIO 失败: {minio_file_path}")
+        await crud.document_process_task.remove_async(db=db, id=task.id)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="上传文件到 MinIO 失败",
@@ -446,51 +610,668 @@ async def upload_document(
         logger.info(f"上传文件到 MinIO 成功: {minio_file_path}")
 
     try:
-        # 创建文档处理任务
-        task_in = DocumentProcessTaskCreate(
-            file_name=file.filename,
-            file_path=minio_file_path,
-            file_type=file_type,
-            knowledge_base_id=knowledge_base_id,
-            user_id=current_user.id,
-        )
-
-        task = crud.document_process_task.create(db=db, obj_in=task_in)
-        logger.info(f"创建文档处理任务成功，ID: {task.id}")
 
         # 启动后台任务处理文档
         # 使用Celery处理文档，不会阻塞主应用程序
         logger.info(f"启动后台任务处理文档，任务ID: {task.id}")
-        result = process_document.delay(task.id)
-        logger.info(f"Celery任务已提交，任务ID: {result.id}")
-
         # 记录文件大小信息，帮助调试
         file_size_mb = len(file_content) / (1024 * 1024)
         logger.info(f"文件大小: {file_size_mb:.2f} MB")
 
+        # 小文本文件在请求内直接入库，返回时已可检索；失败时再交给队列处理
+        inline_result = None
+        if (
+            file_type in TEXT_FILE_TYPES
+            and len(file_content) <= settings.INGEST_INLINE_MAX_BYTES
+        ):
+            inline_result = await run_in_threadpool(
+                ingest_text_inline, task.id, file_content
+            )
+
+        if not inline_result or not inline_result["success"]:
+            # 直接处理失败的任务已恢复为待处理，交给队列重新处理
+            result = await run_in_threadpool(
+                process_document_task,
+                task.id,
+                current_user.id,
+                file_type,
+                len(file_content),
+            )
+            logger.info(f"Celery任务已提交，任务ID: {result.id}")
+
+        if inline_result is not None:
+            # 任务已在入库使用的同步会话中更新，刷新状态并加载关联的文档
+            await db.refresh(task)
+            await db.refresh(task, attribute_names=["document"])
+
+        # 重新加载以带出文档关系，避免响应序列化时触发懒加载
+        return await crud.document_process_task.get_async(db=db, id=task.id)
+
+    except Exception as e:
+        logger.error(f"创建文档处理任务时出错: {str(e)}")
+        # 删除任务，文件不再被引用时从 MinIO 中删除
+        await db.rollback()
+        await crud.document_process_task.remove_async(db=db, id=task.id)
+        await run_in_threadpool(release_file, minio_file_path)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"创建文档处理任务时出错: {str(e)}",
+        )
+
+
+@router.post(
+    "/knowledge-bases/{knowledge_base_id}/upload-by-hash",
+    response_model=DocumentProcessTask,
+)
+async def upload_document_by_hash(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    knowledge_base_id: int,
+    upload_in: DocumentUploadByHash,
+    current_user: User = Depends(get_current_active_user_async),
+) -> Any:
+    """
+    按内容哈希上传文档（异步处理）
+
+    客户端先计算文件的 SHA-256，相同内容的文件已存储时直接创建处理任务，
+    不再传输文件内容；文件不存在时返回 404，客户端改用普通上传接口。
+    """
+    knowledge_base = await crud.knowledge_base.get_async(db=db, id=knowledge_base_id)
+    if not knowledge_base:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="知识库不存在",
+        )
+    if knowledge_base.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="没有足够的权限",
+        )
+
+    file_type = get_upload_file_type(upload_in.file_name)
+    minio_file_path = MinioService.content_addressed_path(upload_in.file_hash)
+
+    # 先创建任务引用文件，再确认文件存在，避免与删除并发时文件被删掉
+    task_in = DocumentProcessTaskCreate(
+        file_name=upload_in.file_name,
+        file_path=minio_file_path,
+        file_hash=upload_in.file_hash,
+        file_type=file_type,
+        knowledge_base_id=knowledge_base_id,
+        user_id=current_user.id,
+    )
+    task = await crud.document_process_task.create_async(db=db, obj_in=task_in)
+
+    minio_service = await run_in_threadpool(MinioService)
+
+    def get_locked_file_size():
+        # 与引用释放互斥：确认存在后，文件不会在任务开始处理前被删除
+        with file_lock(minio_file_path):
+            return minio_service.get_file_size(minio_file_path)
+
+    file_size = await run_in_threadpool(get_locked_file_size)
+    if file_size is None:
+        await crud.document_process_task.remove_async(db=db, id=task.id)
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="文件内容不存在，请上传文件",
+        )
+    logger.info(
+        f"文件内容已存在，跳过上传: {minio_file_path}，创建文档处理任务 {task.id}"
+    )
+
+    try:
+        result = await run_in_threadpool(
+            process_document_task, task.id, current_user.id, file_type, file_size
+        )
+        logger.info(f"Celery任务已提交，任务ID: {result.id}")
+    except Exception as e:
+        logger.error(f"创建文档处理任务时出错: {str(e)}")
+        await db.rollback()
+        await crud.document_process_task.remove_async(db=db, id=task.id)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"创建文档处理任务时出错: {str(e)}",
+        )
+
+    return await crud.document_process_task.get_async(db=db, id=task.id)
+
+
+# 直传上传令牌的用途标识
+DIRECT_UPLOAD_TOKEN_PURPOSE = "direct_upload"
+
+
+@router.post(
+    "/knowledge-bases/{knowledge_base_id}/direct-uploads", response_model=DirectUpload
+)
+async def create_direct_upload(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    knowledge_base_id: int,
+    upload_in: DirectUploadCreate,
+    current_user: User = Depends(get_current_active_user_async),
+) -> Any:
+    """
+    申请客户端直传
+
+    返回预签名 PUT URL，客户端直接上传到 MinIO，文件内容不经过 API 进程；
+    上传后调用 /direct-uploads/complete 创建处理任务。未配置 MINIO_PUBLIC_ENDPOINT 时返回 404，
+    客户端改用普通上传接口。
+    """
+    if not settings.MINIO_PUBLIC_ENDPOINT:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="未启用客户端直传",
+        )
+
+    knowledge_base = await crud.knowledge_base.get_async(db=db, id=knowledge_base_id)
+    if not knowledge_base:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="知识库不存在",
+        )
+    if knowledge_base.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="没有足够的权限",
+        )
+
+    file_type = get_upload_file_type(upload_in.file_name)
+    object_name = direct_upload_object_name(file_type)
+    expires = settings.DIRECT_UPLOAD_EXPIRE_SECONDS
+
+    minio_service = await run_in_threadpool(MinioService)
+    upload_url = await run_in_threadpool(
+        minio_service.get_upload_url, object_name, expires
+    )
+    # 完成上传时凭令牌创建任务，无需在数据库中保存直传记录
+    upload_token = create_signed_token(
+        {
+            "object_name": object_name,
+            "file_name": upload_in.file_name,
+            "file_type": file_type,
+            "file_size": upload_in.file_size,
+            "knowledge_base_id": knowledge_base_id,
+            "user_id": current_user.id,
+        },
+        DIRECT_UPLOAD_TOKEN_PURPOSE,
+        # 上传大文件需要时间，令牌比 URL 多保留一个有效期
+        timedelta(seconds=expires * 2),
+    )
+    logger.info(f"签发直传 URL: {object_name}，文件 {upload_in.file_name}")
+    return DirectUpload(
+        upload_url=upload_url,
+        upload_token=upload_token,
+        expires_at=get_now_datetime() + timedelta(seconds=expires),
+    )
+
+
+@router.post("/direct-uploads/complete", response_model=DocumentProcessTask)
+async def complete_direct_upload(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    complete_in: DirectUploadComplete,
+    current_user: User = Depends(get_current_active_user_async),
+) -> Any:
+    """
+    完成客户端直传：确认文件已上传后创建文档处理任务
+
+    文件哈希由处理任务流式计算，之后按内容寻址转存；重复调用时返回已创建的任务。
+    """
+    upload = decode_signed_token(complete_in.upload_token, DIRECT_UPLOAD_TOKEN_PURPOSE)
+    if not upload or upload.get("user_id") != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="上传令牌无效或已过期",
+        )
+    object_name = upload["object_name"]
+
+    task = await crud.document_process_task.get_by_direct_upload_path_async(
+        db=db, direct_upload_path=object_name
+    )
+    if task:
         return task
 
+    # 令牌签发后知识库可能已被删除
+    knowledge_base = await crud.knowledge_base.get_async(
+        db=db, id=upload["knowledge_base_id"]
+    )
+    if not knowledge_base:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="知识库不存在",
+        )
+    if knowledge_base.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="没有足够的权限",
+        )
+
+    minio_service = await run_in_threadpool(MinioService)
+    file_size = await run_in_threadpool(minio_service.get_file_size, object_name)
+    if file_size is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="文件尚未上传",
+        )
+    if file_size != upload["file_size"]:
+        await run_in_threadpool(minio_service.delete_file, object_name)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"文件大小不符，应为 {upload['file_size']} 字节，实际 {file_size} 字节",
+        )
+
+    task_in = DocumentProcessTaskCreate(
+        file_name=upload["file_name"],
+        file_path=object_name,
+        file_type=upload["file_type"],
+        knowledge_base_id=upload["knowledge_base_id"],
+        user_id=current_user.id,
+        direct_upload_path=object_name,
+    )
+    try:
+        task = await crud.document_process_task.create_async(db=db, obj_in=task_in)
+    except IntegrityError:
+        # 并发的重复调用已创建任务
+        await db.rollback()
+        task = await crud.document_process_task.get_by_direct_upload_path_async(
+            db=db, direct_upload_path=object_name
+        )
+        if task:
+            return task
+        raise
+    logger.info(f"直传完成: {object_name}，创建文档处理任务 {task.id}")
+
+    try:
+        result = await run_in_threadpool(
+            process_document_task,
+            task.id,
+            current_user.id,
+            upload["file_type"],
+            file_size,
+        )
+        logger.info(f"Celery任务已提交，任务ID: {result.id}")
     except Exception as e:
         logger.error(f"创建文档处理任务时出错: {str(e)}")
-        # 删除 MinIO 中的文件
-        minio_service.delete_file(minio_file_path)
+        await db.rollback()
+        await crud.document_process_task.remove_async(db=db, id=task.id)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"创建文档处理任务时出错: {str(e)}",
+        )
+
+    return await crud.document_process_task.get_async(db=db, id=task.id)
+
+
+async def read_part_body(request: Request, expected_size: int) -> Tuple[bytes, str]:
+    """
+    读取分片请求体并计算 SHA-256
+
+    读取前按 Content-Length 校验大小，读取时超过分片大小立即拒绝，
+    单个请求占用的内存不超过一个分片。
+
+    Args:
+        request: 请求
+        expected_size: 分片大小（字节）
+
+    Returns:
+        Tuple[bytes, str]: 分片内容和 SHA-256
+
+    Raises:
+        HTTPException: 分片大小不符
+    """
+    size_error = HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"分片大小不符，应为 {expected_size} 字节",
+    )
+    content_length = request.headers.get("content-length")
+    if content_length is not None and (
+        not content_length.isdigit() or int(content_length) != expected_size
+    ):
+        raise size_error
+
+    data = bytearray()
+    digest = hashlib.sha256()
+    async for block in request.stream():
+        if len(data) + len(block) > expected_size:
+            raise size_error
+        data.extend(block)
+        digest.update(block)
+    if len(data) != expected_size:
+        raise size_error
+    return bytes(data), digest.hexdigest()
+
+
+def get_upload_session_expiry() -> datetime:
+    """上传会话的过期时间：每次上传分片后顺延"""
+    return get_now_datetime() + timedelta(hours=settings.UPLOAD_SESSION_TTL_HOURS)
+
+
+async def get_owned_upload_session(
+    db: AsyncSession, session_id: int, current_user: User, active: bool = True
+):
+    """
+    获取当前用户的上传会话
+
+    Args:
+        db: 异步数据库会话
+        session_id: 会话 ID
+        current_user: 当前用户
+        active: 是否要求会话处于上传中
+
+    Returns:
+        UploadSessionModel: 上传会话
+
+    Raises:
+        HTTPException: 会话不存在、无权限或已结束
+    """
+    upload_session = await crud.upload_session.get_async(db=db, id=session_id)
+    if not upload_session:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="上传会话不存在",
+        )
+    if upload_session.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="没有足够的权限",
+        )
+    if active and upload_session.status != UploadSessionStatus.ACTIVE:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"上传会话已结束（{upload_session.status.value}）",
+        )
+    return upload_session
+
+
+@router.post(
+    "/knowledge-bases/{knowledge_base_id}/upload-sessions",
+    response_model=UploadSession,
+)
+async def create_upload_session(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    knowledge_base_id: int,
+    session_in: UploadSessionCreate,
+    current_user: User = Depends(get_current_active_user_async),
+) -> Any:
+    """
+    创建分片上传会话（断点续传）
+
+    返回分片大小和分片数，客户端按 offset 上传各分片后调用 complete。
+    """
+    knowledge_base = await crud.knowledge_base.get_async(db=db, id=knowledge_base_id)
+    if not knowledge_base:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="知识库不存在",
+        )
+    if knowledge_base.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="没有足够的权限",
+        )
+
+    file_type = get_upload_file_type(session_in.file_name)
+    object_name = staging_object_name(file_type)
+    minio_service = await run_in_threadpool(MinioService)
+    upload_id = await run_in_threadpool(
+        minio_service.create_multipart_upload,
+        object_name,
+        content_type=f"application/{file_type}",
+    )
+
+    try:
+        upload_session = UploadSessionModel(
+            file_name=session_in.file_name,
+            file_type=file_type,
+            file_size=session_in.file_size,
+            part_size=choose_part_size(session_in.file_size),
+            object_name=object_name,
+            upload_id=upload_id,
+            status=UploadSessionStatus.ACTIVE,
+            knowledge_base_id=knowledge_base_id,
+            user_id=current_user.id,
+            expires_at=get_upload_session_expiry(),
+        )
+        db.add(upload_session)
+        await db.commit()
+        await db.refresh(upload_session)
+    except Exception:
+        await run_in_threadpool(
+            minio_service.abort_multipart_upload, object_name, upload_id
+        )
+        raise
+
+    logger.info(
+        f"创建上传会话 {upload_session.id}: {session_in.file_name}，"
+        f"大小 {session_in.file_size}，分片 {upload_session.part_count} 个"
+    )
+    return upload_session
+
+
+@router.get("/upload-sessions/{session_id}", response_model=UploadSession)
+async def get_upload_session(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    session_id: int,
+    current_user: User = Depends(get_current_active_user_async),
+) -> Any:
+    """
+    获取上传会话及已上传的分片，用于断点续传
+    """
+    upload_session = await get_owned_upload_session(
+        db, session_id, current_user, active=False
+    )
+    response = UploadSession.model_validate(upload_session)
+    if upload_session.status == UploadSessionStatus.ACTIVE:
+        minio_service = await run_in_threadpool(MinioService)
+        uploaded_parts = await run_in_threadpool(
+            list_uploaded_parts, minio_service, upload_session
+        )
+        response.uploaded_parts = sorted(uploaded_parts)
+    return response
+
+
+@router.put("/upload-sessions/{session_id}/parts", response_model=UploadPartResult)
+async def upload_session_part(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    session_id: int,
+    offset: int = Query(..., ge=0, description="分片在文件中的偏移量，须为分片大小的整数倍"),
+    request: Request,
+    content_sha256: Optional[str] = Header(None, alias="X-Content-SHA256"),
+    current_user: User = Depends(get_current_active_user_async),
+) -> Any:
+    """
+    上传一个分片（请求体为分片内容）
+
+    同一偏移量的分片可以重复上传（覆盖），客户端可并行上传多个分片、单独重试失败的分片。
+    提供 X-Content-SHA256 时校验分片内容。
+    """
+    upload_session = await get_owned_upload_session(db, session_id, current_user)
+
+    part_size = upload_session.part_size
+    if offset % part_size or offset >= upload_session.file_size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"偏移量无效，须为 {part_size} 的整数倍且小于文件大小",
+        )
+    part_number = offset // part_size + 1
+    expected_size = min(part_size, upload_session.file_size - offset)
+
+    data, digest = await read_part_body(request, expected_size)
+    if content_sha256:
+        if digest != content_sha256.lower():
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="分片校验失败，请重新上传该分片",
+            )
+
+    minio_service = await run_in_threadpool(MinioService)
+    etag = await run_in_threadpool(
+        minio_service.upload_part,
+        upload_session.object_name,
+        upload_session.upload_id,
+        part_number,
+        data,
+    )
+    await crud.upload_session.update_async(
+        db=db,
+        db_obj=upload_session,
+        obj_in=UploadSessionUpdate(expires_at=get_upload_session_expiry()),
+    )
+    return UploadPartResult(
+        part_number=part_number, offset=offset, size=len(data), etag=etag
+    )
+
+
+@router.post(
+    "/upload-sessions/{session_id}/complete", response_model=DocumentProcessTask
+)
+async def complete_upload_session(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    session_id: int,
+    current_user: User = Depends(get_current_active_user_async),
+) -> Any:
+    """
+    完成分片上传：合并分片，按内容寻址存储并创建文档处理任务
+
+    重复调用时返回已创建的任务。
+    """
+    upload_session = await get_owned_upload_session(
+        db, session_id, current_user, active=False
+    )
+    async with complete_lock(session_id) as locked:
+        if not locked:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="上传会话正在完成，请稍后重试",
+            )
+        # 加锁前其他请求可能已完成该会话
+        await db.refresh(upload_session)
+        return await _complete_upload_session(db, upload_session, current_user)
+
+
+async def _complete_upload_session(
+    db: AsyncSession, upload_session: UploadSessionModel, current_user: User
+) -> Any:
+    """
+    合并分片并创建文档处理任务，调用方持有会话的完成锁
+
+    Args:
+        db: 异步数据库会话
+        upload_session: 上传会话
+        current_user: 当前用户
+
+    Returns:
+        DocumentProcessTask: 文档处理任务
+    """
+    session_id = upload_session.id
+    if (
+        upload_session.status == UploadSessionStatus.COMPLETED
+        and upload_session.task_id
+    ):
+        return await crud.document_process_task.get_async(
+            db=db, id=upload_session.task_id
+        )
+    if upload_session.status != UploadSessionStatus.ACTIVE:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"上传会话已结束（{upload_session.status.value}）",
+        )
+
+    minio_service = await run_in_threadpool(MinioService)
+    try:
+        file_hash = await run_in_threadpool(
+            assemble_upload, minio_service, upload_session
+        )
+    except UploadIncompleteError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"分片不完整，无法合并: {e.missing_parts[:20]}",
+        )
+
+    # 先创建任务引用文件，再复制到正式路径
+    minio_file_path = MinioService.content_addressed_path(file_hash)
+    task_in = DocumentProcessTaskCreate(
+        file_name=upload_session.file_name,
+        file_path=minio_file_path,
+        file_hash=file_hash,
+        file_type=upload_session.file_type,
+        knowledge_base_id=upload_session.knowledge_base_id,
+        user_id=current_user.id,
+    )
+    task = await crud.document_process_task.create_async(db=db, obj_in=task_in)
+
+    try:
+        await run_in_threadpool(
+            store_assembled_upload, minio_service, upload_session, file_hash
+        )
+        result = await run_in_threadpool(
+            process_document_task,
+            task.id,
+            current_user.id,
+            upload_session.file_type,
+            upload_session.file_size,
+        )
+        logger.info(f"Celery任务已提交，任务ID: {result.id}")
+    except Exception as e:
+        logger.error(f"完成上传会话 {session_id} 时出错: {str(e)}")
+        await db.rollback()
+        await crud.document_process_task.remove_async(db=db, id=task.id)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"创建文档处理任务时出错: {str(e)}",
         )
 
+    await crud.upload_session.update_async(
+        db=db,
+        db_obj=upload_session,
+        obj_in=UploadSessionUpdate(
+            status=UploadSessionStatus.COMPLETED, task_id=task.id
+        ),
+    )
+    logger.info(f"上传会话 {session_id} 完成，创建文档处理任务 {task.id}")
+    return await crud.document_process_task.get_async(db=db, id=task.id)
+
+
+@router.delete("/upload-sessions/{session_id}", response_model=UploadSession)
+async def abort_upload_session(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    session_id: int,
+    current_user: User = Depends(get_current_active_user_async),
+) -> Any:
+    """
+    取消分片上传，删除已上传的分片
+    """
+    upload_session = await get_owned_upload_session(db, session_id, current_user)
+    minio_service = await run_in_threadpool(MinioService)
+    await run_in_threadpool(
+        minio_service.abort_multipart_upload,
+        upload_session.object_name,
+        upload_session.upload_id,
+    )
+    return await crud.upload_session.update_async(
+        db=db,
+        db_obj=upload_session,
+        obj_in=UploadSessionUpdate(status=UploadSessionStatus.ABORTED),
+    )
+
 
 @router.get("/document-tasks/{task_id}", response_model=DocumentProcessTask)
-def get_document_task(
+async def get_document_task(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     task_id: int,
-    current_user: User = Depends(get_current_active_user),
+    current_user: User = Depends(get_current_active_user_async),
 ) -> Any:
     """
     获取文档处理任务状态
     """
-    task = crud.document_process_task.get(db=db, id=task_id)
+    task = await crud.document_process_task.get_async(db=db, id=task_id)
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -498,7 +1279,9 @@ def get_document_task(
         )
 
     # 检查权限
-    knowledge_base = crud.knowledge_base.get(db=db, id=task.knowledge_base_id)
+    knowledge_base = await crud.knowledge_base.get_async(
+        db=db, id=task.knowledge_base_id
+    )
     if not knowledge_base or knowledge_base.user_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -512,19 +1295,19 @@ def get_document_task(
     "/knowledge-bases/{knowledge_base_id}/document-tasks",
     response_model=List[DocumentProcessTask],
 )
-def get_knowledge_base_document_tasks(
+async def get_knowledge_base_document_tasks(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     knowledge_base_id: int,
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(get_current_active_user),
+    current_user: User = Depends(get_current_active_user_async),
 ) -> Any:
     """
     获取知识库的所有文档处理任务
     """
     # 检查知识库是否存在
-    knowledge_base = crud.knowledge_base.get(db=db, id=knowledge_base_id)
+    knowledge_base = await crud.knowledge_base.get_async(db=db, id=knowledge_base_id)
     if not knowledge_base:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -538,7 +1321,7 @@ def get_knowledge_base_document_tasks(
             detail="没有足够的权限",
         )
 
-    tasks = crud.document_process_task.get_multi_by_knowledge_base(
+    tasks = await crud.document_process_task.get_multi_by_knowledge_base_async(
         db=db, knowledge_base_id=knowledge_base_id, skip=skip, limit=limit
     )
 
@@ -546,19 +1329,18 @@ def get_knowledge_base_document_tasks(
 
 
 @router.post("/knowledge-bases/{knowledge_base_id}/search")
-def search_knowledge_base(
+async def search_knowledge_base(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     knowledge_base_id: int,
-    query: str,
-    limit: int = 5,
-    current_user: User = Depends(get_current_active_user),
+    search_in: SearchQuery,
+    current_user: User = Depends(get_current_active_user_async),
 ) -> Any:
     """
-    在知识库中搜索文档
+    在知识库中搜索文档，可选交叉编码器重排序
     """
     # 检查知识库是否存在
-    knowledge_base = crud.knowledge_base.get(db=db, id=knowledge_base_id)
+    knowledge_base = await crud.knowledge_base.get_async(db=db, id=knowledge_base_id)
     if not knowledge_base:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -572,30 +1354,69 @@ def search_knowledge_base(
             detail="没有足够的权限",
         )
 
-    # 使用向量存储进行搜索
-    vector_store = VectorStore()
+    # 使用向量存储进行搜索（嵌入计算与向量检索为 CPU 密集型，放到线程池中执行）
+    vector_store = await run_in_threadpool(get_vector_store)
     collection_name = vector_store.get_knowledge_base_collection_name(knowledge_base_id)
 
+    query = search_in.query
+    limit = search_in.limit
+    metadata_filter = (
+        build_metadata_filter(**search_in.filter.model_dump())
+        if search_in.filter
+        else None
+    )
+    fetch_limit = limit
+    if search_in.rerank:
+        fetch_limit = max(search_in.rerank_candidates or settings.RERANK_CANDIDATES, limit)
+
     try:
         # 执行搜索
-        results = vector_store.search(
+        results = await run_in_threadpool(
+            vector_store.search,
             collection_name=collection_name,
             query=query,
-            limit=limit,
-            filter={"knowledge_base_id": knowledge_base_id},
+            limit=fetch_limit,
+            # 每个知识库独立一个集合，无需再按 knowledge_base_id 过滤
+            filter=metadata_filter,
+            mmr=search_in.mmr,
+            fetch_k=search_in.mmr_fetch_k,
+            lambda_mult=search_in.mmr_lambda,
+            max_per_document=search_in.max_per_document,
+        )
+
+        if search_in.rerank:
+            reranker = await run_in_threadpool(get_reranker)
+            results = await run_in_threadpool(
+                reranker.rerank,
+                query,
+                results,
+                limit,
+                search_in.rerank_time_budget_ms,
+            )
+
+        # 一次查询取回所有命中文档
+        document_ids = {
+            result.metadata.get("document_id")
+            for result in results
+            if result.metadata.get("document_id")
+        }
+        documents = await crud.document.get_multi_by_ids_async(
+            db=db, ids=list(document_ids)
         )
+        documents_by_id = {document.id: document for document in documents}
 
         # 处理结果
         search_results = []
         for result in results:
             document_id = result.metadata.get("document_id")
             if document_id:
-                document = crud.document.get(db=db, id=document_id)
+                document = documents_by_id.get(document_id)
                 if document:
                     search_results.append(
                         {
                             "content": result.page_content,
                             "score": result.score,
+                            "rerank_score": result.rerank_score,
                             "document": {
                                 "id": document.id,
                                 "title": document.title,
@@ -607,6 +1428,7 @@ def search_knowledge_base(
 
         return {
             "query": query,
+            "reranked": search_in.rerank,
             "results": search_results,
             "total": len(search_results),
         }
@@ -7,3 +7,4 @@ knowledge 模块 crud
 from .document import document
 from .document_process_task import document_process_task
 from .knowledge_base import knowledge_base
+from .upload_session import upload_session
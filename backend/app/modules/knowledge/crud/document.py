@@ -6,10 +6,16 @@
 
 from typing import List
 
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.crud.base import CRUDBase
-from app.modules.knowledge.models.knowledge_base import Document
+from app.modules.knowledge.models.knowledge_base import (
+    Document,
+    DocumentProcessTask,
+    TaskStatus,
+)
 from app.modules.knowledge.schemas.knowledge_base import DocumentCreate, DocumentUpdate
 
 
@@ -39,6 +45,99 @@ class CRUDDocument(CRUDBase[Document, DocumentCreate, DocumentUpdate]):
             .all()
         )
 
+    async def get_multi_by_knowledge_base_async(
+        self,
+        db: AsyncSession,
+        *,
+        knowledge_base_id: int,
+        skip: int = 0,
+        limit: int = 100,
+    ) -> List[Document]:
+        """
+        获取知识库的多个文档（异步）
+
+        Args:
+            db: 异步数据库会话
+            knowledge_base_id: 知识库 ID
+            skip: 跳过数量
+            limit: 限制数量
+
+        Returns:
+            List[Document]: 文档列表
+        """
+        result = await db.execute(
+            select(self.model)
+            .filter(self.model.knowledge_base_id == knowledge_base_id)
+            .offset(skip)
+            .limit(limit)
+        )
+        return list(result.scalars().all())
+
+    async def get_multi_by_ids_async(
+        self, db: AsyncSession, *, ids: List[int]
+    ) -> List[Document]:
+        """
+        按 ID 批量获取文档（异步），一次查询代替逐条获取
+
+        Args:
+            db: 异步数据库会话
+            ids: 文档 ID 列表
+
+        Returns:
+            List[Document]: 文档列表
+        """
+        if not ids:
+            return []
+        result = await db.execute(select(self.model).filter(self.model.id.in_(ids)))
+        return list(result.scalars().all())
+
+    def _file_reference_queries(self, file_path: str):
+        """引用文件的文档数、以及尚未生成文档的进行中任务数的查询"""
+        documents = select(func.count(self.model.id)).filter(
+            self.model.file_path == file_path
+        )
+        # 已完成的任务由其文档持有引用；失败或文档已删除的任务不再需要文件
+        tasks = select(func.count(DocumentProcessTask.id)).filter(
+            DocumentProcessTask.file_path == file_path,
+            DocumentProcessTask.document_id.is_(None),
+            DocumentProcessTask.status.in_([TaskStatus.PENDING, TaskStatus.PROCESSING]),
+        )
+        return documents, tasks
+
+    def count_file_references(self, db: Session, *, file_path: str) -> int:
+        """
+        统计引用 MinIO 中某个文件的记录数（文件按内容寻址，可被多个文档共享）
+
+        Args:
+            db: 数据库会话
+            file_path: 文件路径
+
+        Returns:
+            int: 引用数，为 0 时文件可以删除
+        """
+        return sum(
+            db.execute(query).scalar() or 0
+            for query in self._file_reference_queries(file_path)
+        )
+
+    async def count_file_references_async(
+        self, db: AsyncSession, *, file_path: str
+    ) -> int:
+        """
+        统计引用 MinIO 中某个文件的记录数（异步）
+
+        Args:
+            db: 异步数据库会话
+            file_path: 文件路径
+
+        Returns:
+            int: 引用数，为 0 时文件可以删除
+        """
+        total = 0
+        for query in self._file_reference_queries(file_path):
+            total += (await db.execute(query)).scalar() or 0
+        return total
+
     def create_with_knowledge_base(
         self, db: Session, *, obj_in: DocumentCreate, knowledge_base_id: int
     ) -> Document:
@@ -6,6 +6,8 @@
 
 from typing import List, Optional
 
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
 
 from app.crud.base import CRUDBase
@@ -84,5 +86,76 @@ class CRUDDocumentProcessTask(
         db.refresh(db_obj)
         return db_obj
 
+    async def get_async(
+        self, db: AsyncSession, id: int
+    ) -> Optional[DocumentProcessTask]:
+        """
+        获取文档处理任务，并加载文档关系（异步）
+
+        Args:
+            db: 异步数据库会话
+            id: 任务 ID
+
+        Returns:
+            Optional[DocumentProcessTask]: 文档处理任务对象
+        """
+        # populate_existing：会话中已有该对象时也重新加载文档关系
+        result = await db.execute(
+            select(self.model)
+            .options(joinedload(self.model.document))
+            .filter(self.model.id == id)
+            .execution_options(populate_existing=True)
+        )
+        return result.scalars().first()
+
+    async def get_by_direct_upload_path_async(
+        self, db: AsyncSession, *, direct_upload_path: str
+    ) -> Optional[DocumentProcessTask]:
+        """
+        按直传临时路径获取文档处理任务（异步）
+
+        Args:
+            db: 异步数据库会话
+            direct_upload_path: 直传临时路径
+
+        Returns:
+            Optional[DocumentProcessTask]: 文档处理任务对象
+        """
+        result = await db.execute(
+            select(self.model)
+            .options(joinedload(self.model.document))
+            .filter(self.model.direct_upload_path == direct_upload_path)
+        )
+        return result.scalars().first()
+
+    async def get_multi_by_knowledge_base_async(
+        self,
+        db: AsyncSession,
+        *,
+        knowledge_base_id: int,
+        skip: int = 0,
+        limit: int = 100,
+    ) -> List[DocumentProcessTask]:
+        """
+        获取知识库的多个文档处理任务（异步）
+
+        Args:
+            db: 异步数据库会话
+            knowledge_base_id: 知识库 ID
+            skip: 跳过数量
+            limit: 限制数量
+
+        Returns:
+            List[DocumentProcessTask]: 文档处理任务列表
+        """
+        result = await db.execute(
+            select(self.model)
+            .options(joinedload(self.model.document))
+            .filter(self.model.knowledge_base_id == knowledge_base_id)
+            .offset(skip)
+            .limit(limit)
+        )
+        return list(result.scalars().all())
+
 
 document_process_task = CRUDDocumentProcessTask(DocumentProcessTask)
@@ -58,7 +58,14 @@ class CRUDKnowledgeBase(
         Returns:
             KnowledgeBase: 创建的知识库对象
         """
-        obj_in_data = obj_in.model_dump()
+        obj_in_data = obj_in.model_dump(exclude={"index_profile"})
+        if obj_in.index_profile is not None:
+            obj_in_data.update(
+                index_space=obj_in.index_profile.space,
+                hnsw_m=obj_in.index_profile.m,
+                hnsw_construction_ef=obj_in.index_profile.construction_ef,
+                hnsw_search_ef=obj_in.index_profile.search_ef,
+            )
         db_obj = self.model(**obj_in_data, user_id=owner_id)
         db.add(db_obj)
         db.commit()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分片上传会话 CRUD 操作
+"""
+
+from datetime import datetime
+from typing import List
+
+from sqlalchemy.orm import Session
+
+from app.crud.base import CRUDBase
+from app.modules.knowledge.models.knowledge_base import (
+    UploadSession,
+    UploadSessionStatus,
+)
+from app.modules.knowledge.schemas.knowledge_base import (
+    UploadSessionCreate,
+    UploadSessionUpdate,
+)
+
+
+class CRUDUploadSession(
+    CRUDBase[UploadSession, UploadSessionCreate, UploadSessionUpdate]
+):
+    """分片上传会话 CRUD 操作类"""
+
+    def get_expired(
+        self, db: Session, *, now: datetime, limit: int = 100
+    ) -> List[UploadSession]:
+        """
+        获取已过期但仍处于上传中的会话
+
+        Args:
+            db: 数据库会话
+            now: 当前时间
+            limit: 限制数量
+
+        Returns:
+            List[UploadSession]: 上传会话列表
+        """
+        return (
+            db.query(self.model)
+            .filter(
+                self.model.status == UploadSessionStatus.ACTIVE,
+                self.model.expires_at < now,
+            )
+            .order_by(self.model.expires_at)
+            .limit(limit)
+            .all()
+        )
+
+
+upload_session = CRUDUploadSession(UploadSession)
@@ -6,9 +6,18 @@
 
 from datetime import datetime, timezone
 from enum import Enum
+from typing import Any, Dict
 
 import pytz
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    DateTime,
+    ForeignKey,
+    Integer,
+    String,
+    Text,
+)
 from sqlalchemy import Enum as SQLAlchemyEnum
 from sqlalchemy.orm import relationship
 
@@ -32,6 +41,15 @@ class TaskStatus(str, Enum):
     FAILED = "failed"  # 失败
 
 
+class UploadSessionStatus(str, Enum):
+    """上传会话状态枚举"""
+
+    ACTIVE = "active"  # 上传中
+    COMPLETED = "completed"  # 已完成
+    ABORTED = "aborted"  # 已取消
+    EXPIRED = "expired"  # 已过期清理
+
+
 class KnowledgeBase(Base):
     """知识库模型"""
 
@@ -39,6 +57,11 @@ class KnowledgeBase(Base):
     name = Column(String(128), nullable=False)
     description = Column(Text, nullable=True)
     user_id = Column(Integer, ForeignKey("user.id"), nullable=False)
+    # 向量索引参数，为空时使用配置中的默认值
+    index_space = Column(String(16), nullable=True)
+    hnsw_m = Column(Integer, nullable=True)
+    hnsw_construction_ef = Column(Integer, nullable=True)
+    hnsw_search_ef = Column(Integer, nullable=True)
     created_at = Column(DateTime, default=get_now_datetime)
     updated_at = Column(DateTime, default=get_now_datetime, onupdate=get_now_datetime)
 
@@ -53,6 +76,21 @@ class KnowledgeBase(Base):
         back_populates="knowledge_base",
         cascade="all, delete-orphan",
     )
+    upload_sessions = relationship(
+        "UploadSession",
+        back_populates="knowledge_base",
+        cascade="all, delete-orphan",
+    )
+
+    @property
+    def index_profile(self) -> Dict[str, Any]:
+        """向量索引参数（未指定的项为 None）"""
+        return {
+            "space": self.index_space,
+            "m": self.hnsw_m,
+            "construction_ef": self.hnsw_construction_ef,
+            "search_ef": self.hnsw_search_ef,
+        }
 
 
 class Document(Base):
@@ -61,7 +99,8 @@ class Document(Base):
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     title = Column(String(256), nullable=False)
     content = Column(Text, nullable=True)
-    file_path = Column(String(512), nullable=True)
+    # 文件按内容寻址存储，多个文档可以引用同一文件
+    file_path = Column(String(512), nullable=True, index=True)
     file_type = Column(String(32), nullable=True)
     knowledge_base_id = Column(Integer, ForeignKey("knowledge_base.id"), nullable=False)
     created_at = Column(DateTime, default=get_now_datetime)
@@ -79,8 +118,13 @@ class DocumentProcessTask(Base):
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     file_name = Column(String(256), nullable=False)
-    file_path = Column(String(512), nullable=False)
+    file_path = Column(String(512), nullable=False, index=True)
     file_type = Column(String(32), nullable=False)
+    # 文件内容的 SHA-256（十六进制），上传时计算，用于复用转换结果
+    file_hash = Column(String(64), nullable=True, index=True)
+    # 客户端直传的临时路径（上传令牌中的对象名），处理开始后 file_path 改为按内容寻址的路径，
+    # 重复完成直传时按该字段返回已创建的任务
+    direct_upload_path = Column(String(512), nullable=True, unique=True)
     status = Column(
         SQLAlchemyEnum(TaskStatus), default=TaskStatus.PENDING, nullable=False
     )
@@ -100,3 +144,36 @@ class DocumentProcessTask(Base):
     )
     document = relationship("Document", backref="process_task")
     user = relationship("User", back_populates="document_tasks")
+
+
+class UploadSession(Base):
+    """分片上传会话模型，对应 MinIO 中的一个 multipart upload"""
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    file_name = Column(String(256), nullable=False)
+    file_type = Column(String(32), nullable=False)
+    file_size = Column(BigInteger, nullable=False)
+    part_size = Column(Integer, nullable=False)
+    # 分片合并到的临时对象，完成后按内容哈希复制到正式路径
+    object_name = Column(String(512), nullable=False)
+    upload_id = Column(String(256), nullable=False)  # MinIO multipart upload ID
+    status = Column(
+        SQLAlchemyEnum(UploadSessionStatus),
+        default=UploadSessionStatus.ACTIVE,
+        nullable=False,
+        index=True,
+    )
+    knowledge_base_id = Column(Integer, ForeignKey("knowledge_base.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("user.id"), nullable=False)
+    task_id = Column(Integer, ForeignKey("document_process_task.id"), nullable=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    created_at = Column(DateTime, default=get_now_datetime)
+    updated_at = Column(DateTime, default=get_now_datetime, onupdate=get_now_datetime)
+
+    # 关系
+    knowledge_base = relationship("KnowledgeBase", back_populates="upload_sessions")
+
+    @property
+    def part_count(self) -> int:
+        """分片数"""
+        return max(1, -(-self.file_size // self.part_size))
@@ -5,9 +5,9 @@
 """
 
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Literal, Optional
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class DocumentBase(BaseModel):
@@ -48,6 +48,21 @@ class Document(DocumentInDBBase):
     pass
 
 
+class IndexProfile(BaseModel):
+    """向量索引参数（HNSW），未指定的项使用配置中的默认值"""
+
+    space: Optional[Literal["cosine", "l2", "ip"]] = None
+    m: Optional[int] = Field(None, ge=4, le=128)
+    construction_ef: Optional[int] = Field(None, ge=10, le=2000)
+    search_ef: Optional[int] = Field(None, ge=1, le=2000)
+
+
+class IndexProfileUpdate(BaseModel):
+    """调整向量索引参数模型（距离度量、M、construction_ef 在建索引后不能修改）"""
+
+    search_ef: int = Field(..., ge=1, le=2000)
+
+
 class KnowledgeBaseBase(BaseModel):
     """知识库基础模型"""
 
@@ -58,7 +73,7 @@ class KnowledgeBaseBase(BaseModel):
 class KnowledgeBaseCreate(KnowledgeBaseBase):
     """创建知识库模型"""
 
-    pass
+    index_profile: Optional[IndexProfile] = None
 
 
 class KnowledgeBaseUpdate(BaseModel):
@@ -73,6 +88,7 @@ class KnowledgeBaseInDBBase(KnowledgeBaseBase):
 
     id: int
     user_id: int
+    index_profile: Optional[IndexProfile] = None
     created_at: datetime
     updated_at: datetime
 
@@ -85,12 +101,30 @@ class KnowledgeBase(KnowledgeBaseInDBBase):
     documents: List[Document] = []
 
 
+class SearchFilter(BaseModel):
+    """搜索过滤条件，各条件之间为「与」关系"""
+
+    document_ids: Optional[List[int]] = Field(None, max_length=1000)
+    file_types: Optional[List[str]] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+
+
 class SearchQuery(BaseModel):
     """搜索查询模型"""
 
-    query: str
-    limit: Optional[int] = 5
-    filter: Optional[Dict[str, Any]] = None
+    query: str = Field(..., min_length=1)
+    limit: int = Field(5, ge=1, le=50)
+    filter: Optional[SearchFilter] = None
+    # 最大边际相关性（MMR）：在 mmr_fetch_k 个候选中选择多样化的结果
+    mmr: bool = False
+    mmr_fetch_k: Optional[int] = Field(None, ge=1, le=200)
+    mmr_lambda: Optional[float] = Field(None, ge=0, le=1)
+    max_per_document: Optional[int] = Field(None, ge=1)
+    # 交叉编码器重排序：先多取 rerank_candidates 个候选，再重新打分取前 limit 个
+    rerank: bool = False
+    rerank_candidates: Optional[int] = Field(None, ge=1, le=200)
+    rerank_time_budget_ms: Optional[int] = Field(None, ge=10, le=5000)
 
 
 class SearchResult(BaseModel):
@@ -98,6 +132,7 @@ class SearchResult(BaseModel):
 
     content: str
     score: float
+    rerank_score: Optional[float] = None
     document: Document
     metadata: Dict[str, Any]
 
@@ -105,7 +140,7 @@ class SearchResult(BaseModel):
 
 
 # 导入 TaskStatus
-from app.modules.knowledge.models.knowledge_base import TaskStatus
+from app.modules.knowledge.models.knowledge_base import TaskStatus, UploadSessionStatus
 
 
 class DocumentProcessTaskBase(BaseModel):
@@ -121,6 +156,15 @@ class DocumentProcessTaskCreate(DocumentProcessTaskBase):
     """创建文档处理任务模型"""
 
     file_path: str
+    file_hash: Optional[str] = None
+    direct_upload_path: Optional[str] = None
+
+
+class DocumentUploadByHash(BaseModel):
+    """按内容哈希上传文档模型（文件内容已存在时无需再传输）"""
+
+    file_name: str = Field(..., min_length=1, max_length=256)
+    file_hash: str = Field(..., pattern=r"^[0-9a-f]{64}$")
 
 
 class DocumentProcessTaskUpdate(BaseModel):
@@ -137,6 +181,7 @@ class DocumentProcessTaskInDBBase(DocumentProcessTaskBase):
 
     id: int
     file_path: str
+    file_hash: Optional[str] = None
     status: TaskStatus
     result: Optional[str] = None
     error_message: Optional[str] = None
@@ -151,3 +196,70 @@ class DocumentProcessTask(DocumentProcessTaskInDBBase):
     """API 返回的文档处理任务模型"""
 
     document: Optional[Document] = None
+
+
+class UploadSessionCreate(BaseModel):
+    """创建分片上传会话模型"""
+
+    file_name: str = Field(..., min_length=1, max_length=256)
+    file_size: int = Field(..., gt=0)
+
+
+class UploadSessionUpdate(BaseModel):
+    """更新分片上传会话模型"""
+
+    status: Optional[UploadSessionStatus] = None
+    task_id: Optional[int] = None
+    expires_at: Optional[datetime] = None
+
+
+class UploadSession(BaseModel):
+    """API 返回的分片上传会话模型"""
+
+    id: int
+    file_name: str
+    file_type: str
+    file_size: int
+    part_size: int
+    part_count: int
+    status: UploadSessionStatus
+    knowledge_base_id: int
+    task_id: Optional[int] = None
+    # 已上传的分片序号（从 1 开始），断点续传时只需上传其余分片
+    uploaded_parts: List[int] = []
+    expires_at: datetime
+    created_at: datetime
+    updated_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class UploadPartResult(BaseModel):
+    """分片上传结果模型"""
+
+    part_number: int
+    offset: int
+    size: int
+    etag: str
+
+
+class DirectUploadCreate(BaseModel):
+    """申请客户端直传模型"""
+
+    file_name: str = Field(..., min_length=1, max_length=256)
+    file_size: int = Field(..., gt=0)
+
+
+class DirectUpload(BaseModel):
+    """客户端直传信息：客户端用 PUT 将文件上传到 upload_url，再携带 upload_token 完成上传"""
+
+    upload_url: str
+    upload_token: str
+    method: str = "PUT"
+    expires_at: datetime
+
+
+class DirectUploadComplete(BaseModel):
+    """完成客户端直传模型"""
+
+    upload_token: str
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+检索上下文打包
+
+位于向量检索和 prompt 组装之间：去除重复分块，合并同一文档中相邻的分块
+（去掉分块之间 CHUNK_OVERLAP 的重叠部分），再按「分数 / token」贪心地装入 token 预算。
+"""
+
+import hashlib
+import heapq
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+from app.utils.tokens import count_tokens
+
+logger = logging.getLogger(__name__)
+
+# 每段上下文的编号、标题等格式开销（不含标题本身）
+PASSAGE_HEADER_TOKENS = 8
+
+
+@dataclass
+class PackedPassage:
+    """打包后的一段上下文，可能由同一文档中的多个相邻分块合并而成"""
+
+    document_id: Any
+    document_title: str
+    chunk_indices: List[int]
+    content: str
+    score: float
+    tokens: int = 0
+    members: List["PackedPassage"] = field(default_factory=list, repr=False)
+
+    def to_source(self) -> Dict[str, Any]:
+        """转换为返回给前端的来源信息"""
+        return {
+            "document_id": self.document_id,
+            "document_title": self.document_title,
+            "chunk_index": self.chunk_indices[0] if self.chunk_indices else None,
+            "chunk_indices": self.chunk_indices,
+            "score": self.score,
+        }
+
+
+def strip_overlap(previous: str, current: str, max_overlap: int) -> str:
+    """
+    去掉 current 开头与 previous 结尾重叠的部分
+
+    Args:
+        previous: 前一个分块
+        current: 后一个分块
+        max_overlap: 最大重叠字符数
+
+    Returns:
+        str: current 去掉重叠后的剩余部分
+    """
+    limit = min(len(previous), len(current), max_overlap)
+    for size in range(limit, 0, -1):
+        if previous.endswith(current[:size]):
+            return current[size:]
+    return current
+
+
+class ContextPacker:
+    """检索上下文打包器"""
+
+    def __init__(self, max_overlap: Optional[int] = None):
+        """
+        初始化打包器
+
+        Args:
+            max_overlap: 相邻分块之间的最大重叠字符数，默认取 CHUNK_OVERLAP
+        """
+        # 分块在句子边界处切分，实际重叠可能略大于配置值，留出余量
+        self.max_overlap = (max_overlap or settings.CHUNK_OVERLAP) * 2
+
+    def _to_passage(self, result: Any) -> Optional[PackedPassage]:
+        """将一条检索结果转换为单分块的上下文"""
+        metadata = result.metadata or {}
+        chunk_index = metadata.get("chunk_index")
+        if chunk_index is None:
+            return None
+        return PackedPassage(
+            document_id=metadata.get("document_id"),
+            document_title=metadata.get("document_title", ""),
+            chunk_indices=[int(chunk_index)],
+            content=result.page_content,
+            score=result.score,
+        )
+
+    def dedupe(self, results: Sequence[Any]) -> List[PackedPassage]:
+        """
+        去除重复的检索结果：同一文档的同一分块，或内容完全相同的分块，只保留分数最高的一个
+
+        Args:
+            results: 检索结果
+
+        Returns:
+            List[PackedPassage]: 去重后的单分块上下文
+        """
+        by_key: Dict[Any, PackedPassage] = {}
+        by_content: Dict[str, Any] = {}
+        for result in results:
+            passage = self._to_passage(result)
+            if passage is None:
+                continue
+            key = (passage.document_id, passage.chunk_indices[0])
+            digest = hashlib.sha1(passage.content.strip().encode("utf-8")).hexdigest()
+            existing_key = by_content.get(digest, key)
+            existing = by_key.get(existing_key)
+            if existing is not None and existing.score >= passage.score:
+                continue
+            by_key.pop(existing_key, None)
+            by_key[key] = passage
+            by_content[digest] = key
+        return list(by_key.values())
+
+    def merge_adjacent(self, passages: List[PackedPassage]) -> List[PackedPassage]:
+        """
+        合并同一文档中 chunk_index 连续的分块
+
+        Args:
+            passages: 去重后的单分块上下文
+
+        Returns:
+            List[PackedPassage]: 合并后的上下文，members 中保留原始分块
+        """
+        ordered = sorted(
+            passages, key=lambda p: (str(p.document_id), p.chunk_indices[0])
+        )
+        merged: List[PackedPassage] = []
+        for passage in ordered:
+            last = merged[-1] if merged else None
+            if (
+                last is not None
+                and last.document_id == passage.document_id
+                and passage.chunk_indices[0] == last.chunk_indices[-1] + 1
+            ):
+                last.content += strip_overlap(
+                    last.members[-1].content, passage.content, self.max_overlap
+                )
+                last.chunk_indices.append(passage.chunk_indices[0])
+                last.score = max(last.score, passage.score)
+                last.members.append(passage)
+            else:
+                merged.append(
+                    PackedPassage(
+                        document_id=passage.document_id,
+                        document_title=passage.document_title,
+                        chunk_indices=list(passage.chunk_indices),
+                        content=passage.content,
+                        score=passage.score,
+                        members=[passage],
+                    )
+                )
+        return merged
+
+    def _measure(self, passage: PackedPassage) -> int:
+        """计算一段上下文放入 prompt 后占用的 token 数"""
+        if not passage.tokens:
+            passage.tokens = (
+                count_tokens(passage.content)
+                + count_tokens(passage.document_title)
+                + PASSAGE_HEADER_TOKENS
+            )
+        return passage.tokens
+
+    def pack(self, results: Sequence[Any], token_budget: int) -> List[PackedPassage]:
+        """
+        打包检索结果
+
+        每段上下文的价值为其中各分块的相对分数之和，按「价值 / token」从高到低
+        贪心装入预算；合并后的大段放不下时，拆回单个分块继续参与排序。
+
+        Args:
+            results: 检索结果（需包含 document_id、chunk_index 元数据）
+            token_budget: token 预算
+
+        Returns:
+            List[PackedPassage]: 装入的上下文，按分数降序
+        """
+        if token_budget <= 0:
+            return []
+
+        singles = self.dedupe(results)
+        if not singles:
+            return []
+
+        # 不同距离度量下分数可能为负，以最低分为基准换算成相对分数
+        floor = min(passage.score for passage in singles)
+        spread = max(passage.score for passage in singles) - floor or 1.0
+
+        def value(passage: PackedPassage) -> float:
+            members = passage.members or [passage]
+            return sum((m.score - floor) / spread + 0.01 for m in members)
+
+        heap: List[Tuple[float, int, PackedPassage]] = []
+        for passage in self.merge_adjacent(singles):
+            density = value(passage) / max(self._measure(passage), 1)
+            heapq.heappush(heap, (-density, len(heap), passage))
+
+        packed: List[PackedPassage] = []
+        remaining = token_budget
+        counter = len(heap)
+        while heap and remaining > 0:
+            _, _, passage = heapq.heappop(heap)
+            tokens = self._measure(passage)
+            if tokens <= remaining:
+                packed.append(passage)
+                remaining -= tokens
+            elif len(passage.members) > 1:
+                for member in passage.members:
+                    density = value(member) / max(self._measure(member), 1)
+                    heapq.heappush(heap, (-density, counter, member))
+                    counter += 1
+
+        packed.sort(key=lambda p: p.score, reverse=True)
+        logger.debug(
+            f"上下文打包：{len(results)} 个检索结果 -> {len(packed)} 段，"
+            f"使用 {token_budget - remaining}/{token_budget} tokens"
+        )
+        return packed
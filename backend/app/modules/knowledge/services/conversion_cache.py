@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文档转换结果缓存
+
+PDF 经 marker 转换（OCR、LLM 增强）需要数分钟，同一文件上传到多个知识库、
+或嵌入失败后重新上传时，转换结果完全相同。转换输出（Markdown 文本和图片）
+按文件内容的 SHA-256 存入 MinIO，再次处理时直接读取：
+
+    {CONVERSION_CACHE_PREFIX}/{配置指纹}/{hash[:2]}/{hash}/content.md
+    {CONVERSION_CACHE_PREFIX}/{配置指纹}/{hash[:2]}/{hash}/images/{文件名}
+
+配置指纹由影响转换输出的配置（是否使用 LLM、文本层检测阈值）计算，
+修改这些配置后自动使用新的缓存目录，不会读到旧配置的结果。
+"""
+
+import hashlib
+import io
+import json
+import logging
+import mimetypes
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from app.core.config import settings
+from app.modules.knowledge.services.minio import MinioService
+
+logger = logging.getLogger(__name__)
+
+CONTENT_FILE_NAME = "content.md"
+
+
+def compute_file_hash(file_content: bytes) -> str:
+    """
+    计算文件内容的 SHA-256
+
+    Args:
+        file_content: 文件内容
+
+    Returns:
+        str: 十六进制摘要
+    """
+    return hashlib.sha256(file_content).hexdigest()
+
+
+def conversion_fingerprint(use_llm: bool) -> str:
+    """
+    计算影响转换输出的配置指纹
+
+    Args:
+        use_llm: 是否使用 LLM 增强转换
+
+    Returns:
+        str: 指纹（12 位十六进制）
+    """
+    options = {
+        "use_llm": use_llm,
+        "text_layer": settings.PDF_TEXT_LAYER_ENABLED,
+        "text_layer_min_chars": settings.PDF_TEXT_LAYER_MIN_CHARS,
+        "text_layer_min_valid_ratio": settings.PDF_TEXT_LAYER_MIN_VALID_RATIO,
+        "text_layer_min_word_ratio": settings.PDF_TEXT_LAYER_MIN_WORD_RATIO,
+    }
+    return hashlib.sha256(
+        json.dumps(options, sort_keys=True).encode("utf-8")
+    ).hexdigest()[:12]
+
+
+class ConversionCache:
+    """转换结果缓存"""
+
+    def __init__(self, minio_service: MinioService, use_llm: bool):
+        """
+        初始化缓存
+
+        Args:
+            minio_service: MinIO 服务
+            use_llm: 是否使用 LLM 增强转换
+        """
+        self.minio_service = minio_service
+        self.fingerprint = conversion_fingerprint(use_llm)
+
+    def _prefix(self, file_hash: str) -> str:
+        """文件的缓存目录"""
+        return (
+            f"{settings.CONVERSION_CACHE_PREFIX}/{self.fingerprint}/"
+            f"{file_hash[:2]}/{file_hash}"
+        )
+
+    def get(self, file_hash: Optional[str]) -> Optional[Iterator[bytes]]:
+        """
+        读取缓存的转换文本
+
+        Args:
+            file_hash: 文件的 SHA-256，为空时视为未命中
+
+        Returns:
+            Optional[Iterator[bytes]]: 文本内容块（流式读取），未命中时返回 None
+        """
+        if not settings.CONVERSION_CACHE_ENABLED or not file_hash:
+            return None
+        content_path = f"{self._prefix(file_hash)}/{CONTENT_FILE_NAME}"
+        if not self.minio_service.file_exists(content_path):
+            return None
+        logger.info(f"命中转换结果缓存: {content_path}")
+        return self.minio_service.iter_file(content_path)
+
+    def put(self, file_hash: str, text: str, images: Dict[str, Any]) -> bool:
+        """
+        写入转换结果，失败时只记录日志
+
+        图片先于文本写入：文本存在即表示该条缓存完整。
+
+        Args:
+            file_hash: 文件的 SHA-256
+            text: 转换后的 Markdown 文本
+            images: 图片（文件名 -> PIL 图片或字节）
+
+        Returns:
+            bool: 是否写入成功
+        """
+        prefix = self._prefix(file_hash)
+        try:
+            for name, image in images.items():
+                if isinstance(image, bytes):
+                    data = image
+                else:
+                    buffer = io.BytesIO()
+                    image_format = name.rsplit(".", 1)[-1].upper()
+                    image.save(
+                        buffer, format="JPEG" if image_format == "JPG" else image_format
+                    )
+                    data = buffer.getvalue()
+                if not self.minio_service.upload_file(
+                    f"{prefix}/images/{name}",
+                    data,
+                    content_type=mimetypes.guess_type(name)[0],
+                ):
+                    return False
+
+            if not self.minio_service.upload_file(
+                f"{prefix}/{CONTENT_FILE_NAME}",
+                text.encode("utf-8"),
+                content_type="text/markdown; charset=utf-8",
+            ):
+                return False
+            logger.info(
+                f"转换结果已缓存: {prefix}，文本长度 {len(text)}，图片 {len(images)} 张"
+            )
+            return True
+        except Exception as e:
+            logger.warning(f"缓存转换结果失败: {str(e)}")
+            return False
+
+    def cache_segments(
+        self, file_hash: Optional[str], segments: Iterable[str], images: Dict[str, Any]
+    ) -> Iterator[str]:
+        """
+        透传转换输出的文本片段，全部产出后写入缓存
+
+        转换中途出错时不写入。缓存在转换结束时写入，之后的嵌入或写索引失败时，
+        重新处理该文件仍可复用转换结果。
+
+        Args:
+            file_hash: 文件的 SHA-256，为空或缓存未启用时只透传
+            segments: 文本片段
+            images: 转换输出的图片，转换结束后读取（调用方原地更新的字典）
+
+        Yields:
+            str: 文本片段
+        """
+        if not settings.CONVERSION_CACHE_ENABLED or not file_hash:
+            yield from segments
+            return
+
+        parts = []
+        for segment in segments:
+            parts.append(segment)
+            yield segment
+        self.put(file_hash, "".join(parts), images)
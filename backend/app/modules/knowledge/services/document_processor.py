@@ -4,18 +4,77 @@
 文档处理服务
 """
 
+import codecs
 import logging
 import os
-from typing import Dict, List, Tuple
+import re
+import threading
+import time
+import unicodedata
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 from app.core.config import settings
-from marker.config.parser import ConfigParser
-from marker.converters.pdf import PdfConverter
-from marker.models import create_model_dict
-from marker.output import text_from_rendered
+from app.modules.knowledge.services.text_extractors import EXTRACTORS
 
 logger = logging.getLogger(__name__)
 
+# 文本层中出现即视为乱码的字符类别：控制字符、私用区、未分配、代理项
+_INVALID_CATEGORIES = ("Cc", "Co", "Cn", "Cs")
+_CONTROL_CHARACTERS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+# 直接读取文本、不需要 marker 的文件类型
+TEXT_FILE_TYPES = ("txt", "md")
+# 解析文件结构提取文本、同样不需要 marker 的文件类型
+EXTRACTED_FILE_TYPES = tuple(EXTRACTORS)
+# 可在轻量 worker 中处理的文件类型
+LIGHT_FILE_TYPES = TEXT_FILE_TYPES + EXTRACTED_FILE_TYPES
+
+# marker 的模型在进程内只加载一次（加载需要数十秒），只在首次转换 PDF 时加载
+_pdf_model_dict: Optional[Dict[str, Any]] = None
+_pdf_model_dict_lock = threading.Lock()
+
+
+def get_pdf_model_dict() -> Dict[str, Any]:
+    """
+    获取进程内共享的 marker 模型
+
+    Returns:
+        Dict[str, Any]: 传给 PdfConverter 的 artifact_dict
+    """
+    global _pdf_model_dict
+
+    if _pdf_model_dict is None:
+        with _pdf_model_dict_lock:
+            if _pdf_model_dict is None:
+                from marker.models import create_model_dict
+
+                logger.info("加载 PDF 转换模型")
+                _pdf_model_dict = create_model_dict()
+    return _pdf_model_dict
+
+
+def iter_decoded_text(
+    blocks: Iterable[bytes], encoding: str = "utf-8"
+) -> Iterator[str]:
+    """
+    增量解码字节流，多字节字符跨块时不会被截断
+
+    Args:
+        blocks: 按顺序到达的字节块
+        encoding: 文本编码，无法解码的字节被忽略
+
+    Yields:
+        str: 解码后的文本片段
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors="ignore")
+    for block in blocks:
+        text = decoder.decode(block)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
 
 class DocumentProcessor:
     """文档处理器"""
@@ -24,6 +83,8 @@ class DocumentProcessor:
         """
         初始化文档处理器
 
+        marker 在第一次转换 PDF 时才导入和加载，处理文本文件和分块不依赖它。
+
         Args:
             use_llm: 是否使用 LLM 增强处理
         """
@@ -47,19 +108,54 @@ class DocumentProcessor:
                 }
             )
 
-        self.config_parser = ConfigParser(self.config)
+        self._config_parser = None
+        self._pdf_converter = None
+        # 最近一次处理的统计（PDF 按页路由情况）
+        self.stats: Dict[str, Any] = {}
+        # 最近一次处理中 marker 输出的图片（文件名 -> 图片）
+        self.images: Dict[str, Any] = {}
+
+    @property
+    def pdf_converter(self) -> Any:
+        """转换全部页的 PDF 转换器"""
+        if self._pdf_converter is None:
+            self._pdf_converter = self._create_pdf_converter()
+        return self._pdf_converter
+
+    def _create_pdf_converter(self, page_range: Optional[List[int]] = None) -> Any:
+        """
+        创建 PDF 转换器，各转换器共享进程内的模型
 
-        # 创建 PDF 转换器
-        self.pdf_converter = PdfConverter(
-            config=self.config,
-            artifact_dict=create_model_dict(),
-            processor_list=self.config_parser.get_processors(),
-            renderer=self.config_parser.get_renderer(),
-            llm_service="marker.services.openai.OpenAIService" if use_llm else None,
+        Args:
+            page_range: 只转换指定的页（从 0 开始），None 表示全部页
+
+        Returns:
+            PdfConverter: 转换器
+        """
+        from marker.config.parser import ConfigParser
+        from marker.converters.pdf import PdfConverter
+
+        if self._config_parser is None:
+            self._config_parser = ConfigParser(self.config)
+
+        config = self.config
+        if page_range is not None:
+            config = {**self.config, "page_range": page_range}
+        return PdfConverter(
+            config=config,
+            artifact_dict=get_pdf_model_dict(),
+            processor_list=self._config_parser.get_processors(),
+            renderer=self._config_parser.get_renderer(),
+            llm_service="marker.services.openai.OpenAIService"
+            if self.use_llm
+            else None,
         )
 
     def process_pdf(
-        self, file_path: str, timeout: int = 240
+        self,
+        file_path: str,
+        timeout: int = 240,
+        page_range: Optional[List[int]] = None,
     ) -> Tuple[str, Dict[str, str]]:
         """
         处理 PDF 文件
@@ -67,22 +163,27 @@ class DocumentProcessor:
         Args:
             file_path: PDF 文件路径
             timeout: 处理超时时间（秒）
+            page_range: 只转换指定的页（从 0 开始），None 表示全部页
 
         Returns:
             提取的文本内容和图片信息
         """
-        import multiprocessing
-        import threading
-
         # 使用线程级别的超时处理，更安全且可以终止
         class TimeoutError(Exception):
             pass
 
         def process_pdf_with_timeout(file_path, result_dict):
             try:
+                from marker.output import text_from_rendered
+
                 # 处理 PDF
                 logger.info("开始调用 PDF 转换器")
-                rendered = self.pdf_converter(file_path)
+                converter = (
+                    self.pdf_converter
+                    if page_range is None
+                    else self._create_pdf_converter(page_range)
+                )
+                rendered = converter(file_path)
                 logger.info("PDF 转换完成，开始提取文本和图片")
 
                 # 提取文本和图片
@@ -126,10 +227,9 @@ class DocumentProcessor:
             else:
                 adjusted_timeout = timeout
 
-            # 使用Manager创建共享字典
-            manager = multiprocessing.Manager()
-            result_dict = manager.dict()
-            result_dict["success"] = False
+            # 转换在本进程的线程中执行，结果直接写入普通字典；按页批次多次调用时
+            # 不会为每批启动额外的进程，模型也只在进程内加载一次
+            result_dict: Dict[str, Any] = {"success": False}
 
             # 创建并启动处理线程
             process_thread = threading.Thread(
@@ -164,43 +264,273 @@ class DocumentProcessor:
             logger.error(f"处理 PDF 文件时出错: {str(e)}", exc_info=True)
             return f"处理文件时出错: {str(e)}", {}
 
+    @staticmethod
+    def _chunk_end(text: str, start: int, chunk_size: int) -> int:
+        """
+        计算从 start 开始的分块结束位置，不是文本末尾时尽量在句子边界切分
+
+        Args:
+            text: 文本
+            start: 分块起始位置
+            chunk_size: 每个块的最大大小
+
+        Returns:
+            int: 分块结束位置（不含）
+        """
+        end = min(start + chunk_size, len(text))
+
+        # 如果不是文本末尾，尝试在句子边界切分
+        if end < len(text):
+            # 寻找最近的句子结束符
+            sentence_end = max(
+                text.rfind(". ", start, end),
+                text.rfind("? ", start, end),
+                text.rfind("! ", start, end),
+                text.rfind("\n", start, end),
+            )
+
+            if sentence_end > start:
+                end = sentence_end + 1
+
+        return end
+
     def chunk_text(
-        self, text: str, chunk_size: int = 1000, overlap: int = 200
+        self,
+        text: str,
+        chunk_size: Optional[int] = None,
+        overlap: Optional[int] = None,
     ) -> List[str]:
         """
         将文本分块
 
         Args:
             text: 要分块的文本
-            chunk_size: 每个块的最大大小
-            overlap: 块之间的重叠大小
+            chunk_size: 每个块的最大大小，默认取 CHUNK_SIZE
+            overlap: 块之间的重叠大小，默认取 CHUNK_OVERLAP
 
         Returns:
             分块后的文本列表
         """
-        chunks = []
+        return list(self.iter_chunks([text], chunk_size, overlap))
+
+    def iter_chunks(
+        self,
+        segments: Iterable[str],
+        chunk_size: Optional[int] = None,
+        overlap: Optional[int] = None,
+    ) -> Iterator[str]:
+        """
+        对逐段到达的文本流式分块，结果与对拼接后的全文调用 chunk_text 相同
+
+        缓冲区中起始位置之后的文本超过一个块时即输出该块，不等待后续文本。
+
+        Args:
+            segments: 按顺序到达的文本片段
+            chunk_size: 每个块的最大大小，默认取 CHUNK_SIZE
+            overlap: 块之间的重叠大小，默认取 CHUNK_OVERLAP
+
+        Yields:
+            str: 分块
+        """
+        chunk_size = chunk_size or settings.CHUNK_SIZE
+        overlap = settings.CHUNK_OVERLAP if overlap is None else overlap
+        overlap = min(overlap, chunk_size - 1)
+
+        buffer = ""
         start = 0
+        for segment in segments:
+            buffer += segment
+            # 起始位置之后的文本多于一个块时，切分结果不受后续文本影响
+            while len(buffer) - start > chunk_size:
+                end = self._chunk_end(buffer, start, chunk_size)
+                yield buffer[start:end]
+                # 至少前进一个字符，避免重叠大于切分出的块时原地循环
+                start = max(end - overlap, start + 1)
+            buffer = buffer[start:]
+            start = 0
+
+        # 剩余文本不足一个块
+        if buffer.strip():
+            yield buffer
+
+    def iter_text(
+        self, file_path: str, file_type: str, timeout: int = 300
+    ) -> Iterator[str]:
+        """
+        逐段提取文件文本，供流水线在转换尚未结束时开始分块和嵌入
+
+        PDF 逐页检查文本层，只有文本层不可用的页交给 marker 转换，文本文件按块读取，
+        DOCX / PPTX / HTML 按段落批次提取。
+
+        Args:
+            file_path: 文件路径
+            file_type: 文件类型
+            timeout: 整个文件的处理超时时间（秒）
+
+        Yields:
+            str: 文本片段，按文件中的顺序
+        """
+        file_type = file_type.lower()
+        if file_type in TEXT_FILE_TYPES:
+            with open(file_path, "rb") as f:
+                yield from iter_decoded_text(iter(lambda: f.read(1024 * 1024), b""))
+            return
+        if file_type in EXTRACTED_FILE_TYPES:
+            yield from EXTRACTORS[file_type](file_path)
+            return
+
+        page_batch = settings.INGEST_PDF_PAGE_BATCH
+        if file_type != "pdf" or (
+            page_batch <= 0 and not settings.PDF_TEXT_LAYER_ENABLED
+        ):
+            text, images, _ = self.process_file(file_path, file_type, timeout=timeout)
+            if text.startswith("文件处理超时") or text.startswith("处理文件时出错"):
+                raise Exception(text)
+            self.images.clear()
+            self.images.update(images)
+            yield text
+            return
+
+        yield from self._iter_pdf_text(file_path, timeout)
+
+    def _iter_pdf_text(self, file_path: str, timeout: int) -> Iterator[str]:
+        """
+        逐页提取 PDF 文本
+
+        文本层质量合格的页直接读取文本层，其余页（扫描件、乱码）按连续的区间交给 marker
+        做版面分析 / OCR（以及 LLM 增强），每批不超过 INGEST_PDF_PAGE_BATCH 页。
+        按页的路由统计记录在 self.stats 中，marker 输出的图片记录在 self.images 中。
+
+        Args:
+            file_path: PDF 文件路径
+            timeout: 整个文件的处理超时时间（秒）
+
+        Yields:
+            str: 文本片段，按页序
+        """
+        import pypdfium2
+
+        deadline = time.monotonic() + timeout
+        # 原地更新，调用方可以在迭代开始前持有 self.stats 的引用
+        stats = self.stats
+        stats.clear()
+        self.images.clear()
+        stats.update(
+            {
+                "pages": 0,
+                "text_layer_pages": 0,
+                "converted_pages": 0,
+                "text_layer_seconds": 0.0,
+                "convert_seconds": 0.0,
+                "converted_page_numbers": [],
+            }
+        )
 
-        while start < len(text):
-            end = min(start + chunk_size, len(text))
-
-            # 如果不是文本末尾，尝试在句子边界切分
-            if end < len(text):
-                # 寻找最近的句子结束符
-                sentence_end = max(
-                    text.rfind(". ", start, end),
-                    text.rfind("? ", start, end),
-                    text.rfind("! ", start, end),
-                    text.rfind("\n", start, end),
+        def convert(pages: List[int]) -> Iterator[str]:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise Exception(
+                    f"文件处理超时（{timeout}秒），已处理 {pages[0]}/{stats['pages']} 页"
                 )
+            started = time.monotonic()
+            text, images = self.process_pdf(
+                file_path, timeout=int(remaining), page_range=pages
+            )
+            stats["convert_seconds"] += time.monotonic() - started
+            if text.startswith("文件处理超时") or text.startswith("处理文件时出错"):
+                raise Exception(text)
+            stats["converted_pages"] += len(pages)
+            self.images.update(images)
+            stats["converted_page_numbers"].extend(page + 1 for page in pages)
+            if text:
+                # 批次之间补一个换行，避免跨批次的句子粘连
+                yield text if text.endswith("\n") else text + "\n"
+
+        pdf = pypdfium2.PdfDocument(file_path)
+        try:
+            page_count = len(pdf)
+            stats["pages"] = page_count
+            batch_limit = settings.INGEST_PDF_PAGE_BATCH
+            if batch_limit <= 0:
+                batch_limit = page_count
+            logger.info(f"PDF 共 {page_count} 页，需要转换的页每批最多 {batch_limit} 页")
+
+            pending: List[int] = []
+            for index in range(page_count):
+                text = None
+                if settings.PDF_TEXT_LAYER_ENABLED:
+                    started = time.monotonic()
+                    text = self._page_text_layer(pdf, index)
+                    stats["text_layer_seconds"] += time.monotonic() - started
+
+                if text is None:
+                    pending.append(index)
+                    if len(pending) >= batch_limit:
+                        yield from convert(pending)
+                        pending = []
+                    continue
+
+                if pending:
+                    yield from convert(pending)
+                    pending = []
+                stats["text_layer_pages"] += 1
+                yield text + "\n"
+
+            if pending:
+                yield from convert(pending)
+        finally:
+            pdf.close()
+            stats["text_layer_seconds"] = round(stats["text_layer_seconds"], 3)
+            stats["convert_seconds"] = round(stats["convert_seconds"], 3)
+            logger.info(
+                f"PDF 处理完成: 共 {stats['pages']} 页，文本层直接提取 "
+                f"{stats['text_layer_pages']} 页，转换 {stats['converted_pages']} 页"
+            )
 
-                if sentence_end > start:
-                    end = sentence_end + 1
+    @staticmethod
+    def _page_text_layer(pdf: Any, index: int) -> Optional[str]:
+        """
+        读取一页的文本层，质量不合格时返回 None
 
-            chunks.append(text[start:end])
-            start = end - overlap
+        扫描页没有文本层（或只有页眉页码等少量字符）；字体缺少 Unicode 映射的页会得到
+        大量控制字符、私用区字符或替换符，两者都需要交给 marker。
 
-        return chunks
+        Args:
+            pdf: pypdfium2.PdfDocument
+            index: 页序号（从 0 开始）
+
+        Returns:
+            Optional[str]: 页面文本
+        """
+        page = pdf[index]
+        try:
+            textpage = page.get_textpage()
+            try:
+                text = textpage.get_text_range()
+            finally:
+                textpage.close()
+        finally:
+            page.close()
+
+        characters = [c for c in text if not c.isspace()]
+        if len(characters) < settings.PDF_TEXT_LAYER_MIN_CHARS:
+            return None
+        valid = sum(
+            1
+            for c in characters
+            if c != "\ufffd" and unicodedata.category(c) not in _INVALID_CATEGORIES
+        )
+        word_like = sum(1 for c in characters if c.isalnum())
+        if (
+            valid / len(characters) < settings.PDF_TEXT_LAYER_MIN_VALID_RATIO
+            or word_like / len(characters) < settings.PDF_TEXT_LAYER_MIN_WORD_RATIO
+        ):
+            return None
+
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+        # 行尾的软连字符（pdfium 输出为 \x02）和断词连字符
+        text = re.sub(r"(\w)[\x02-]\n(\w)", r"\1\2", text)
+        return _CONTROL_CHARACTERS.sub("", text).strip()
 
     def process_file(
         self, file_path: str, file_type: str, timeout: int = 300
@@ -248,31 +578,30 @@ class DocumentProcessor:
                 else:
                     logger.info(f"PDF处理成功，文本长度: {len(text)}")
 
-            elif file_type in ["txt", "md"]:
+            elif file_type in TEXT_FILE_TYPES:
                 logger.info(f"处理文本文件: {file_path}")
                 # 简单读取文本文件
                 with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
                     text = f.read()
-            elif file_type in ["doc", "docx"]:
-                logger.info(f"处理 Word 文件: {file_path}")
-                # 暂不支持 Word 文档
-                logger.error("暂不支持 Word 文档处理")
-                raise NotImplementedError("暂不支持 Word 文档处理")
+            elif file_type in EXTRACTED_FILE_TYPES:
+                logger.info(f"提取 {file_type} 文件文本: {file_path}")
+                text = "".join(EXTRACTORS[file_type](file_path))
             else:
                 logger.error(f"不支持的文件类型: {file_type}")
                 raise ValueError(f"不支持的文件类型: {file_type}")
 
             logger.info(f"文件处理完成，提取文本长度: {len(text)}")
 
-            # 分块
-            # if text:
-            #     logger.info("开始文本分块")
-            #     chunks = self.chunk_text(text)
-            #     logger.info(f"分块完成，共 {len(chunks)} 个块")
-            # else:
-            #     logger.warning("没有提取到文本，跳过分块")
-            #     chunks = []
-            chunks = []
+            # 分块（处理失败时返回的提示文本不分块）
+            if text and not (
+                text.startswith("文件处理超时") or text.startswith("处理文件时出错")
+            ):
+                logger.info("开始文本分块")
+                chunks = self.chunk_text(text)
+                logger.info(f"分块完成，共 {len(chunks)} 个块")
+            else:
+                logger.warning("没有提取到文本，跳过分块")
+                chunks = []
 
             return text, images, chunks
 
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按内容寻址文件的引用释放
+
+同一文件可能被多个知识库的文档、以及进行中的任务共享，最后一条引用删除
+（或任务失败）后才从 MinIO 中删除文件。
+"""
+
+import logging
+
+from app.db.session import SessionLocal
+from app.modules.knowledge.crud import document as document_crud
+from app.modules.knowledge.services.minio import MinioService, file_lock
+
+logger = logging.getLogger(__name__)
+
+
+def release_file(file_path: str) -> bool:
+    """
+    文件不再被任何文档或进行中的任务引用时，从 MinIO 中删除
+
+    调用前需先删除（并提交）引用该文件的记录。统计引用和删除在文件锁内执行，
+    与同一文件的上传不会交错；无法加锁时保留文件。
+    引用数在加锁后用新的会话统计：复用调用方的会话时，REPEATABLE READ 下读到的是
+    加锁前的快照，会漏掉期间新增的引用。
+
+    Args:
+        file_path: 文件路径
+
+    Returns:
+        bool: 是否删除了文件
+    """
+    try:
+        with file_lock(file_path) as locked:
+            if not locked:
+                logger.warning(f"无法获取文件锁，保留文件: {file_path}")
+                return False
+            with SessionLocal() as db:
+                references = document_crud.count_file_references(
+                    db=db, file_path=file_path
+                )
+            if references:
+                logger.info(f"文件 {file_path} 仍被 {references} 条记录引用，保留")
+                return False
+            MinioService().delete_file(file_path)
+            logger.info(f"从MinIO中删除文件: {file_path}")
+            return True
+    except Exception as e:
+        logger.error(f"从MinIO中删除文件时出错: {str(e)}")
+        # 继续执行，不要因为MinIO删除失败而中断整个流程
+        return False
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+向量索引后端
+
+- chroma：Chroma 持久化客户端（默认）
+- chroma_http：远程 Chroma 服务，由一个进程持有索引
+- chroma_memory：进程内的临时 Chroma，远程服务的本地替身（测试用）
+- local：内置的 memmap 矩阵（默认 float16）+ IVF 引擎，适合中小规模知识库
+"""
+
+import os
+from typing import Optional
+
+from app.core.config import settings
+from app.modules.knowledge.services.index_backends.base import (
+    IndexBackend,
+    IndexCollection,
+    compute_distances,
+)
+from app.modules.knowledge.services.index_backends.chroma import (
+    ChromaBackend,
+    ChromaHttpBackend,
+    ChromaMemoryBackend,
+    CollectionNotFoundError,
+)
+
+# 数据保存在本地目录中的后端
+DISK_BACKENDS = ("chroma", "local")
+
+
+def default_persist_directory(backend: str) -> Optional[str]:
+    """
+    获取后端的默认数据目录
+
+    Args:
+        backend: 后端名称
+
+    Returns:
+        Optional[str]: 数据目录，不使用本地目录的后端为 None
+    """
+    if backend == "local":
+        return settings.LOCAL_INDEX_DIR
+    if backend == "chroma":
+        return os.path.join(settings.DATA_DIR, "chroma_db")
+    return None
+
+
+def create_index_backend(
+    backend: Optional[str] = None, persist_directory: Optional[str] = None
+) -> IndexBackend:
+    """
+    创建向量索引后端
+
+    Args:
+        backend: 后端名称，默认取 VECTOR_INDEX_BACKEND
+        persist_directory: 数据目录，默认按后端选择
+
+    Returns:
+        IndexBackend: 索引后端
+    """
+    backend = backend or settings.VECTOR_INDEX_BACKEND
+    persist_directory = persist_directory or default_persist_directory(backend)
+    if backend == "chroma":
+        return ChromaBackend(persist_directory)
+    if backend == "chroma_http":
+        return ChromaHttpBackend()
+    if backend == "chroma_memory":
+        return ChromaMemoryBackend()
+    if backend == "local":
+        from app.modules.knowledge.services.index_backends.local import LocalBackend
+
+        return LocalBackend(persist_directory)
+    raise ValueError(f"不支持的向量索引后端: {backend}")
+
+
+__all__ = [
+    "ChromaBackend",
+    "ChromaHttpBackend",
+    "ChromaMemoryBackend",
+    "CollectionNotFoundError",
+    "DISK_BACKENDS",
+    "IndexBackend",
+    "IndexCollection",
+    "compute_distances",
+    "create_index_backend",
+    "default_persist_directory",
+]
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+向量索引后端接口
+
+接口与 Chroma 的客户端 / 集合保持一致（add、query、get、update、delete），
+VectorStore 中的精确检索、紧凑向量、MMR 等逻辑不需要区分具体后端。
+"""
+
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.core.config import settings
+
+# 查询结果中的字段
+RESULT_FIELDS = ("ids", "documents", "metadatas", "distances", "embeddings")
+
+
+def compute_distances(
+    space: str, query_embedding: np.ndarray, embeddings: np.ndarray
+) -> np.ndarray:
+    """
+    按集合的距离度量计算查询向量到各向量的距离，与 Chroma 返回的 distances 一致
+
+    Args:
+        space: 距离度量（l2 / cosine / ip）
+        query_embedding: 查询向量 (dim,)
+        embeddings: 候选向量 (n, dim)
+
+    Returns:
+        np.ndarray: 距离 (n,)
+    """
+    if space == "cosine":
+        norms = np.linalg.norm(embeddings, axis=1) * np.linalg.norm(query_embedding)
+        return 1 - (embeddings @ query_embedding) / np.where(norms == 0, 1, norms)
+    if space == "ip":
+        return 1 - embeddings @ query_embedding
+    # l2：平方欧氏距离
+    diff = embeddings - query_embedding
+    return np.einsum("ij,ij->i", diff, diff)
+
+
+class IndexCollection(ABC):
+    """向量集合"""
+
+    name: str
+    metadata: Optional[Dict[str, Any]]
+
+    @abstractmethod
+    def add(
+        self,
+        ids: List[str],
+        embeddings: Sequence[Sequence[float]],
+        documents: Optional[List[str]] = None,
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+    ) -> None:
+        """添加向量，已存在的 ID 会被忽略"""
+
+    @abstractmethod
+    def query(
+        self,
+        query_embeddings: Sequence[Sequence[float]],
+        n_results: int = 10,
+        where: Optional[Dict[str, Any]] = None,
+        include: Sequence[str] = ("documents", "metadatas", "distances"),
+    ) -> Dict[str, Any]:
+        """
+        最近邻检索
+
+        Returns:
+            Dict[str, Any]: 每个字段为「每个查询一个列表」，未包含的字段为 None
+        """
+
+    @abstractmethod
+    def get(
+        self,
+        ids: Optional[List[str]] = None,
+        where: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        include: Sequence[str] = ("documents", "metadatas"),
+    ) -> Dict[str, Any]:
+        """
+        按 ID 或元数据条件读取
+
+        Returns:
+            Dict[str, Any]: 每个字段为平铺列表，未包含的字段为 None
+        """
+
+    @abstractmethod
+    def update(
+        self,
+        ids: List[str],
+        embeddings: Optional[Sequence[Sequence[float]]] = None,
+        documents: Optional[List[str]] = None,
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+    ) -> None:
+        """更新已有的记录"""
+
+    @abstractmethod
+    def delete(
+        self,
+        ids: Optional[List[str]] = None,
+        where: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """删除记录"""
+
+    @abstractmethod
+    def count(self) -> int:
+        """记录数"""
+
+    def persist(self) -> None:
+        """将尚未落盘的数据写入磁盘（写入即持久化的后端无需实现）"""
+
+
+class IndexBackend(ABC):
+    """向量索引后端"""
+
+    name: str
+
+    @property
+    def max_batch_size(self) -> int:
+        """单次写入的最大记录数"""
+        return settings.VECTOR_WRITE_BATCH_SIZE
+
+    @abstractmethod
+    def get_collection(self, name: str) -> IndexCollection:
+        """获取集合，不存在时抛出 ValueError（或 Chroma 的 NotFoundError）"""
+
+    @abstractmethod
+    def create_collection(
+        self, name: str, metadata: Optional[Dict[str, Any]] = None
+    ) -> IndexCollection:
+        """创建集合"""
+
+    @abstractmethod
+    def delete_collection(self, name: str) -> None:
+        """删除集合，不存在时抛出 ValueError"""
+
+    def set_search_ef(self, name: str, search_ef: int) -> None:
+        """调整集合检索时的 HNSW ef，不使用 HNSW 的后端只检查集合是否存在"""
+        self.get_collection(name)
+
+    def persist(self) -> None:
+        """将所有集合尚未落盘的数据写入磁盘"""
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Chroma 索引后端
+
+- chroma：本进程打开持久化目录（默认）
+- chroma_http：连接独立的 Chroma 服务，API 进程和 Celery worker 共享同一份索引
+- chroma_memory：进程内的临时 Chroma，作为远程服务的本地替身用于测试
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+import chromadb
+from chromadb.config import Settings
+
+from app.core.config import settings
+from app.modules.knowledge.services.index_backends.base import IndexBackend
+
+try:
+    # 新版本 Chroma 在集合不存在时抛出 NotFoundError，旧版本抛出 ValueError
+    from chromadb.errors import NotFoundError as CollectionNotFoundError
+except ImportError:  # pragma: no cover
+    CollectionNotFoundError = ValueError
+
+
+class _ReadWriteLock:
+    """读写锁：读操作可并发，写操作独占，等待中的写操作优先于新的读操作"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writers_waiting = 0
+        self._writing = False
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        with self._cond:
+            while self._writing or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writing or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writing = False
+                self._cond.notify_all()
+
+
+class _GuardedCollection:
+    """Chroma 集合的包装，每次调用集合方法时持有客户端的读锁，重建客户端时不会有进行中的调用"""
+
+    def __init__(self, collection: Any, client_lock: _ReadWriteLock):
+        self._collection = collection
+        self._client_lock = client_lock
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._collection, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args: Any, **kwargs: Any) -> Any:
+            with self._client_lock.read():
+                return attr(*args, **kwargs)
+
+        return call
+
+
+class ChromaBackend(IndexBackend):
+    """Chroma 持久化客户端，集合对象直接使用 Chroma 的 Collection"""
+
+    name = "chroma"
+    # HNSW 索引由本进程加载，search_ef 变化后需要重建客户端才能生效
+    reload_on_search_ef_change = True
+
+    def __init__(self, persist_directory: Optional[str] = None):
+        """
+        初始化 Chroma 客户端
+
+        Args:
+            persist_directory: 持久化目录
+        """
+        self.persist_directory = persist_directory
+        self.client = self._connect()
+        # 每个集合的 HNSW 索引加载时使用的 search_ef
+        self._loaded_search_ef: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        # 集合调用持有读锁，重建客户端持有写锁
+        self._client_lock = _ReadWriteLock()
+        self._max_batch_size: Optional[int] = None
+
+    def _connect(self) -> Any:
+        return chromadb.PersistentClient(
+            path=self.persist_directory,
+            settings=Settings(anonymized_telemetry=False, allow_reset=True),
+        )
+
+    @staticmethod
+    def _search_ef(collection: Any) -> Optional[int]:
+        """集合当前配置的 search_ef"""
+        configuration = getattr(collection, "configuration", None) or {}
+        hnsw = configuration.get("hnsw") if isinstance(configuration, dict) else None
+        if hnsw:
+            return hnsw.get("ef_search")
+        return (collection.metadata or {}).get("hnsw:search_ef")
+
+    @property
+    def max_batch_size(self) -> int:
+        if self._max_batch_size is None:
+            limit = settings.VECTOR_WRITE_BATCH_SIZE
+            get_max_batch_size = getattr(self.client, "get_max_batch_size", None)
+            if get_max_batch_size is not None:
+                limit = min(limit, get_max_batch_size())
+            self._max_batch_size = limit
+        return self._max_batch_size
+
+    def get_collection(self, name: str) -> Any:
+        with self._client_lock.read():
+            collection = self.client.get_collection(name=name)
+        if not self.reload_on_search_ef_change:
+            return _GuardedCollection(collection, self._client_lock)
+        search_ef = self._search_ef(collection)
+        with self._lock:
+            loaded = self._loaded_search_ef.setdefault(name, search_ef)
+            if search_ef == loaded:
+                return _GuardedCollection(collection, self._client_lock)
+            # Chroma 只在加载 HNSW 索引时读取 search_ef：参数被（本进程或其他进程）调整后，
+            # 重建客户端让索引按新参数重新加载；重建时等待进行中的集合调用结束
+            with self._client_lock.write():
+                self.client.clear_system_cache()
+                self.client = self._connect()
+            self._loaded_search_ef = {name: search_ef}
+        with self._client_lock.read():
+            collection = self.client.get_collection(name=name)
+        return _GuardedCollection(collection, self._client_lock)
+
+    def create_collection(
+        self, name: str, metadata: Optional[Dict[str, Any]] = None
+    ) -> Any:
+        with self._client_lock.read():
+            collection = self.client.create_collection(name=name, metadata=metadata)
+        with self._lock:
+            self._loaded_search_ef[name] = self._search_ef(collection)
+        return _GuardedCollection(collection, self._client_lock)
+
+    def delete_collection(self, name: str) -> None:
+        with self._client_lock.read():
+            self.client.delete_collection(name=name)
+        with self._lock:
+            self._loaded_search_ef.pop(name, None)
+
+    def set_search_ef(self, name: str, search_ef: int) -> None:
+        collection = self.get_collection(name)
+        try:
+            collection.modify(configuration={"hnsw": {"ef_search": search_ef}})
+        except TypeError:
+            # 旧版本 Chroma 没有 configuration 参数，HNSW 参数保存在元数据中
+            collection.modify(
+                metadata={**(collection.metadata or {}), "hnsw:search_ef": search_ef}
+            )
+        # 重新获取集合，使本进程的索引按新参数加载
+        self.get_collection(name)
+
+
+class ChromaHttpBackend(ChromaBackend):
+    """
+    远程 Chroma 服务
+
+    索引只在服务进程中加载一份，各进程通过 HTTP 读写；客户端在进程内复用，
+    底层 HTTP 连接保持长连接。search_ef 在服务端加载索引时生效。
+    """
+
+    name = "chroma_http"
+    reload_on_search_ef_change = False
+
+    def __init__(
+        self,
+        host: Optional[str] = None,
+        port: Optional[int] = None,
+        ssl: Optional[bool] = None,
+        auth_token: Optional[str] = None,
+    ):
+        """
+        初始化远程 Chroma 客户端
+
+        Args:
+            host: 服务地址，默认取 CHROMA_HOST
+            port: 服务端口，默认取 CHROMA_PORT
+            ssl: 是否使用 HTTPS，默认取 CHROMA_SSL
+            auth_token: 认证令牌，默认取 CHROMA_AUTH_TOKEN
+        """
+        self.host = host or settings.CHROMA_HOST
+        self.port = port or settings.CHROMA_PORT
+        self.ssl = settings.CHROMA_SSL if ssl is None else ssl
+        self.auth_token = auth_token or settings.CHROMA_AUTH_TOKEN
+        super().__init__()
+
+    def _connect(self) -> Any:
+        headers = {}
+        if self.auth_token:
+            headers["Authorization"] = f"Bearer {self.auth_token}"
+        return chromadb.HttpClient(
+            host=self.host,
+            port=self.port,
+            ssl=self.ssl,
+            headers=headers,
+            settings=Settings(anonymized_telemetry=False),
+        )
+
+
+class ChromaMemoryBackend(ChromaBackend):
+    """进程内的临时 Chroma，接口与远程服务相同，用于测试"""
+
+    name = "chroma_memory"
+    # 重建客户端会清空内存中的数据
+    reload_on_search_ef_change = False
+
+    def _connect(self) -> Any:
+        return chromadb.EphemeralClient(
+            settings=Settings(anonymized_telemetry=False, allow_reset=True)
+        )
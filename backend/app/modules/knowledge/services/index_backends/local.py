@@ -0,0 +1,851 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+内置的本地向量索引引擎
+
+每个集合一个目录：
+
+    meta.json               集合元数据、维度、存储精度、行数和当前代数（原子替换，其他进程据此发现变更）
+    .lock                   写入时的文件锁（API 进程与 Celery worker 之间互斥）
+    g{代数}/
+        vectors.bin         float16（或 float32）向量矩阵，追加写入，以 memmap 方式读取
+        records.sqlite3     ID、文本和元数据，where 条件转换为 json_extract 查询
+        tombstones.bits     删除位图
+        ivf.npy             IVF 聚类中心（存活向量数达到 LOCAL_INDEX_IVF_MIN_VECTORS 后训练）
+        assignments.i32     每行所属的聚类
+
+向量数较少时对整个矩阵做向量化的精确扫描；训练 IVF 后只扫描最近的 nprobe 个聚类。
+删除只在位图中标记，删除比例超过 LOCAL_INDEX_COMPACT_RATIO 时压缩为新的一代。
+"""
+
+import json
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.modules.knowledge.services.index_backends.base import (
+    RESULT_FIELDS,
+    IndexBackend,
+    IndexCollection,
+    compute_distances,
+)
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover  Windows 开发环境只有单进程写入
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+VECTOR_DTYPES = {"float16": np.float16, "float32": np.float32}
+# 每次转换为 float32 计算距离的行数，控制检索时的临时内存
+SEARCH_BLOCK_ROWS = 16384
+# SQLite 单条语句的参数数量有限，按批读写
+SQL_BATCH_SIZE = 500
+# 删除行数达到该值（或全部删除）才考虑压缩，避免小集合频繁重写
+COMPACT_MIN_DELETED = 1000
+# k-means 训练参数
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLES_PER_LIST = 40
+
+_NAME_PATTERN = re.compile(r"^[A-Za-z0-9_\-]+$")
+_COMPARISONS = {
+    "$eq": "=",
+    "$ne": "IS NOT",
+    "$gt": ">",
+    "$gte": ">=",
+    "$lt": "<",
+    "$lte": "<=",
+}
+
+
+def where_to_sql(where: Dict[str, Any]) -> Tuple[str, List[Any]]:
+    """
+    将 Chroma 的 where 条件转换为 SQL 条件
+
+    Args:
+        where: where 条件，支持 $eq、$ne、$gt、$gte、$lt、$lte、$in、$nin、$and、$or
+
+    Returns:
+        Tuple[str, List[Any]]: SQL 条件和参数
+    """
+    clauses: List[str] = []
+    params: List[Any] = []
+    for key, value in where.items():
+        if key in ("$and", "$or"):
+            parts = [where_to_sql(condition) for condition in value]
+            if parts:
+                joiner = " AND " if key == "$and" else " OR "
+                clauses.append("(" + joiner.join(sql for sql, _ in parts) + ")")
+                for _, part_params in parts:
+                    params.extend(part_params)
+            continue
+
+        if not _NAME_PATTERN.match(key):
+            raise ValueError(f"不支持的元数据键: {key}")
+        # 键直接写入表达式（而非参数），document_id 上的表达式索引才能生效
+        field = f"json_extract(metadata, '$.\"{key}\"')"
+        condition = value if isinstance(value, dict) else {"$eq": value}
+        for operator, operand in condition.items():
+            if operator in ("$in", "$nin"):
+                if not operand:
+                    clauses.append("0" if operator == "$in" else "1")
+                    continue
+                marks = ", ".join("?" * len(operand))
+                keyword = "IN" if operator == "$in" else "NOT IN"
+                clauses.append(f"{field} {keyword} ({marks})")
+                params.extend(operand)
+            elif operator in _COMPARISONS:
+                clauses.append(f"{field} {_COMPARISONS[operator]} ?")
+                params.append(operand)
+            else:
+                raise ValueError(f"不支持的过滤操作符: {operator}")
+
+    return " AND ".join(clauses) or "1", params
+
+
+def _nearest_centroids(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """按欧氏距离将向量分配到最近的聚类中心"""
+    centroid_norms = (centroids**2).sum(axis=1)
+    labels = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), SEARCH_BLOCK_ROWS):
+        block = vectors[start : start + SEARCH_BLOCK_ROWS]
+        labels[start : start + len(block)] = np.argmin(
+            centroid_norms[None, :] - 2 * block @ centroids.T, axis=1
+        )
+    return labels
+
+
+def _write_json(path: str, data: Dict[str, Any]) -> None:
+    """原子地写入 JSON 文件"""
+    temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(temp_path, path)
+
+
+class LocalCollection(IndexCollection):
+    """本地向量集合"""
+
+    def __init__(self, path: str, name: str):
+        """
+        打开集合
+
+        Args:
+            path: 集合目录
+            name: 集合名称
+        """
+        self.name = name
+        self.path = path
+        self.metadata: Optional[Dict[str, Any]] = None
+        self._lock = threading.RLock()
+        self._meta: Dict[str, Any] = {}
+        self._stamp: Optional[Tuple[int, int, int]] = None
+        self._opened: Optional[Tuple[str, int]] = None
+        self._db: Optional[sqlite3.Connection] = None
+        self._rows = 0
+        self._dim: Optional[int] = None
+        self._dtype = np.float16
+        self._vectors: Optional[np.ndarray] = None
+        self._tombstones = np.zeros(0, dtype=bool)
+        self._centroids: Optional[np.ndarray] = None
+        self._assignments: Optional[np.ndarray] = None
+        with self._lock:
+            self._refresh()
+
+    @classmethod
+    def create(
+        cls, path: str, name: str, metadata: Optional[Dict[str, Any]] = None
+    ) -> "LocalCollection":
+        """
+        创建集合
+
+        Args:
+            path: 集合目录
+            name: 集合名称
+            metadata: 集合元数据（如 hnsw:space、紧凑向量的降维器指纹）
+
+        Returns:
+            LocalCollection: 集合
+        """
+        os.makedirs(os.path.join(path, "g0"), exist_ok=True)
+        cls._connect_file(os.path.join(path, "g0", "records.sqlite3")).close()
+        _write_json(
+            os.path.join(path, "meta.json"),
+            {
+                "uid": uuid.uuid4().hex,
+                "name": name,
+                "metadata": metadata or {},
+                "dtype": settings.LOCAL_INDEX_VECTOR_DTYPE,
+                "dim": None,
+                "rows": 0,
+                "generation": 0,
+            },
+        )
+        return cls(path, name)
+
+    @staticmethod
+    def _connect_file(path: str) -> sqlite3.Connection:
+        """打开（必要时创建）记录表"""
+        db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS records ("
+                "row INTEGER PRIMARY KEY, id TEXT NOT NULL UNIQUE, "
+                "document TEXT, metadata TEXT NOT NULL)"
+            )
+            db.execute(
+                "CREATE INDEX IF NOT EXISTS idx_records_document_id "
+                "ON records(json_extract(metadata, '$.\"document_id\"'))"
+            )
+        return db
+
+    @property
+    def space(self) -> str:
+        """距离度量，与 Chroma 一致默认为 l2"""
+        return (self.metadata or {}).get("hnsw:space", "l2")
+
+    def _file(self, name: str, generation: Optional[int] = None) -> str:
+        if generation is None:
+            generation = self._meta["generation"]
+        return os.path.join(self.path, f"g{generation}", name)
+
+    def _refresh(self) -> None:
+        """meta.json 变化时（本进程或其他进程写入后）重新映射文件"""
+        meta_path = os.path.join(self.path, "meta.json")
+        try:
+            stat = os.stat(meta_path)
+        except FileNotFoundError:
+            raise ValueError(f"集合 {self.name} 不存在")
+        stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if stamp == self._stamp:
+            return
+
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        self._meta = meta
+        self.metadata = meta["metadata"] or None
+        self._rows = meta["rows"]
+        self._dim = meta["dim"]
+        self._dtype = VECTOR_DTYPES[meta.get("dtype", "float16")]
+
+        opened = (meta["uid"], meta["generation"])
+        if opened != self._opened:
+            if self._db is not None:
+                self._db.close()
+            self._db = self._connect_file(self._file("records.sqlite3"))
+            self._opened = opened
+
+        self._vectors = None
+        if self._rows:
+            self._vectors = np.memmap(
+                self._file("vectors.bin"),
+                dtype=self._dtype,
+                mode="r",
+                shape=(self._rows, self._dim),
+            )
+
+        self._tombstones = np.zeros(self._rows, dtype=bool)
+        tombstones_path = self._file("tombstones.bits")
+        if os.path.exists(tombstones_path):
+            bits = np.unpackbits(np.fromfile(tombstones_path, dtype=np.uint8))
+            count = min(len(bits), self._rows)
+            self._tombstones[:count] = bits[:count].astype(bool)
+
+        self._centroids = None
+        self._assignments = None
+        centroids_path = self._file("ivf.npy")
+        assignments_path = self._file("assignments.i32")
+        if (
+            self._rows
+            and os.path.exists(centroids_path)
+            and os.path.getsize(assignments_path) >= self._rows * 4
+        ):
+            self._centroids = np.load(centroids_path)
+            self._assignments = np.memmap(
+                assignments_path, dtype=np.int32, mode="r", shape=(self._rows,)
+            )
+
+        self._stamp = stamp
+
+    def _save_meta(self, **changes: Any) -> None:
+        """更新 meta.json 并重新加载（其他进程通过文件变化感知写入）"""
+        _write_json(os.path.join(self.path, "meta.json"), {**self._meta, **changes})
+        self._refresh()
+
+    @contextmanager
+    def _write_lock(self) -> Iterator[None]:
+        """写入锁：进程内线程锁 + 跨进程文件锁，持有期间集合状态是最新的"""
+        with self._lock:
+            with open(os.path.join(self.path, ".lock"), "a") as handle:
+                if fcntl is not None:
+                    fcntl.flock(handle, fcntl.LOCK_EX)
+                try:
+                    self._refresh()
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _ivf_space(self, vectors: np.ndarray) -> np.ndarray:
+        """聚类使用的向量空间：余弦距离下先归一化"""
+        if self.space != "cosine":
+            return vectors
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    def _rows_for(
+        self,
+        ids: Optional[List[str]] = None,
+        where: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+    ) -> List[Tuple[int, str, Optional[str], str]]:
+        """按 ID / where 条件读取记录 (row, id, document, metadata)"""
+        conditions = ["row < ?"]
+        params: List[Any] = [self._rows]
+        if where:
+            sql, where_params = where_to_sql(where)
+            conditions.append(sql)
+            params.extend(where_params)
+        query = "SELECT row, id, document, metadata FROM records WHERE " + " AND ".join(
+            conditions
+        )
+
+        if ids is None:
+            query += " ORDER BY row LIMIT ? OFFSET ?"
+            limit_value = -1 if limit is None else limit
+            return self._db.execute(query, [*params, limit_value, offset or 0]).fetchall()
+
+        records = []
+        for start in range(0, len(ids), SQL_BATCH_SIZE):
+            batch = ids[start : start + SQL_BATCH_SIZE]
+            marks = ", ".join("?" * len(batch))
+            records.extend(
+                self._db.execute(f"{query} AND id IN ({marks})", [*params, *batch])
+            )
+        start = offset or 0
+        return records[start : None if limit is None else start + limit]
+
+    def _records_by_row(
+        self, rows: Sequence[int]
+    ) -> Dict[int, Tuple[str, Optional[str], Dict[str, Any]]]:
+        """按行号读取记录"""
+        records = {}
+        rows = [int(row) for row in rows]
+        for start in range(0, len(rows), SQL_BATCH_SIZE):
+            batch = rows[start : start + SQL_BATCH_SIZE]
+            marks = ", ".join("?" * len(batch))
+            for row, record_id, document, metadata in self._db.execute(
+                f"SELECT row, id, document, metadata FROM records WHERE row IN ({marks})",
+                batch,
+            ):
+                records[row] = (record_id, document, json.loads(metadata))
+        return records
+
+    def _distances(self, query: np.ndarray, block: np.ndarray) -> np.ndarray:
+        """计算一批向量的距离；l2 展开为 |x|^2 - 2x·q + |q|^2，避免构造差值矩阵"""
+        if self.space != "l2":
+            return compute_distances(self.space, query, block)
+        return np.einsum("ij,ij->i", block, block) - 2 * (block @ query) + query @ query
+
+    def _scan(
+        self,
+        query: np.ndarray,
+        vectors: np.ndarray,
+        tombstones: np.ndarray,
+        rows: Optional[np.ndarray],
+        k: int,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        对全部行（rows 为 None）或指定行精确计算距离，返回距离最近的 k 行
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: 行号和距离，按距离升序
+        """
+        if rows is None:
+            distances = np.empty(len(vectors), dtype=np.float32)
+            for start in range(0, len(vectors), SEARCH_BLOCK_ROWS):
+                block = np.asarray(
+                    vectors[start : start + SEARCH_BLOCK_ROWS], dtype=np.float32
+                )
+                distances[start : start + len(block)] = self._distances(query, block)
+            distances[tombstones] = np.inf
+            rows = np.arange(len(vectors))
+        else:
+            rows = rows[~tombstones[rows]]
+            distances = np.empty(len(rows), dtype=np.float32)
+            for start in range(0, len(rows), SEARCH_BLOCK_ROWS):
+                block = np.asarray(
+                    vectors[rows[start : start + SEARCH_BLOCK_ROWS]], dtype=np.float32
+                )
+                distances[start : start + len(block)] = self._distances(query, block)
+
+        k = min(k, len(rows))
+        if k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        top = np.argpartition(distances, k - 1)[:k]
+        top = top[np.argsort(distances[top])]
+        top = top[np.isfinite(distances[top])]
+        return rows[top], distances[top]
+
+    def _probe(
+        self,
+        query: np.ndarray,
+        centroids: np.ndarray,
+        assignments: np.ndarray,
+    ) -> np.ndarray:
+        """IVF：返回最近的 nprobe 个聚类中的行号"""
+        nprobe = min(settings.LOCAL_INDEX_IVF_NPROBE, len(centroids))
+        distances = ((centroids - self._ivf_space(query)) ** 2).sum(axis=1)
+        probes = np.argpartition(distances, nprobe - 1)[:nprobe]
+        return np.flatnonzero(np.isin(assignments, probes))
+
+    def add(
+        self,
+        ids: List[str],
+        embeddings: Sequence[Sequence[float]],
+        documents: Optional[List[str]] = None,
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+    ) -> None:
+        if not ids:
+            return
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if vectors.ndim != 2 or len(vectors) != len(ids):
+            raise ValueError("向量数量与 ID 数量不匹配")
+
+        with self._write_lock():
+            if self._dim is not None and vectors.shape[1] != self._dim:
+                raise ValueError(
+                    f"向量维度 {vectors.shape[1]} 与集合 {self.name} 的维度 {self._dim} 不一致"
+                )
+
+            # 与 Chroma 一致：已存在的 ID 忽略
+            existing = {record[1] for record in self._rows_for(ids=ids)}
+            keep = []
+            for i, record_id in enumerate(ids):
+                if record_id not in existing:
+                    existing.add(record_id)
+                    keep.append(i)
+            if len(keep) < len(ids):
+                logger.warning(
+                    f"集合 {self.name} 中已存在 {len(ids) - len(keep)} 个 ID，已忽略"
+                )
+            if not keep:
+                return
+
+            # 清理上次中断的写入留下的尾部数据，保证行号与文件偏移对齐
+            start_row = self._rows
+            dim = vectors.shape[1]
+            vectors_path = self._file("vectors.bin")
+            assignments_path = self._file("assignments.i32")
+            with open(vectors_path, "ab") as f:
+                f.truncate(start_row * dim * np.dtype(self._dtype).itemsize)
+                f.write(vectors[keep].astype(self._dtype).tobytes())
+            if self._centroids is not None:
+                with open(assignments_path, "ab") as f:
+                    f.truncate(start_row * 4)
+                    f.write(
+                        _nearest_centroids(
+                            self._ivf_space(vectors[keep]), self._centroids
+                        ).tobytes()
+                    )
+
+            with self._db:
+                self._db.execute("DELETE FROM records WHERE row >= ?", (start_row,))
+                self._db.executemany(
+                    "INSERT INTO records (row, id, document, metadata) VALUES (?, ?, ?, ?)",
+                    [
+                        (
+                            start_row + n,
+                            ids[i],
+                            documents[i] if documents else None,
+                            json.dumps(
+                                metadatas[i] if metadatas else {}, ensure_ascii=False
+                            ),
+                        )
+                        for n, i in enumerate(keep)
+                    ],
+                )
+            self._save_meta(rows=start_row + len(keep), dim=dim)
+
+            live = self._rows - int(self._tombstones.sum())
+            if self._centroids is None and live >= settings.LOCAL_INDEX_IVF_MIN_VECTORS:
+                self._train_ivf(self._meta["generation"])
+                self._save_meta()
+
+    def query(
+        self,
+        query_embeddings: Sequence[Sequence[float]],
+        n_results: int = 10,
+        where: Optional[Dict[str, Any]] = None,
+        include: Sequence[str] = ("documents", "metadatas", "distances"),
+    ) -> Dict[str, Any]:
+        with self._lock:
+            self._refresh()
+            vectors, tombstones = self._vectors, self._tombstones
+            centroids, assignments = self._centroids, self._assignments
+            allowed = None
+            if where:
+                allowed = np.asarray(
+                    [record[0] for record in self._rows_for(where=where)],
+                    dtype=np.int64,
+                )
+
+        results: Dict[str, Any] = {
+            field: [] if field == "ids" or field in include else None
+            for field in RESULT_FIELDS
+        }
+        for query in np.asarray(query_embeddings, dtype=np.float32):
+            rows = np.zeros(0, dtype=np.int64)
+            distances = np.zeros(0, dtype=np.float32)
+            if vectors is not None:
+                candidates = allowed
+                if centroids is not None and (
+                    allowed is None or len(allowed) > SEARCH_BLOCK_ROWS
+                ):
+                    probed = self._probe(query, centroids, assignments)
+                    if allowed is not None:
+                        probed = np.intersect1d(probed, allowed, assume_unique=True)
+                    # 探查的聚类中候选不足时退回精确扫描
+                    if len(probed) >= n_results:
+                        candidates = probed
+                rows, distances = self._scan(
+                    query, vectors, tombstones, candidates, n_results
+                )
+
+            with self._lock:
+                records = self._records_by_row(rows)
+            # 检索期间被其他进程删除的行不再返回
+            found = [i for i, row in enumerate(rows) if int(row) in records]
+            results["ids"].append([records[int(rows[i])][0] for i in found])
+            if results["documents"] is not None:
+                results["documents"].append([records[int(rows[i])][1] for i in found])
+            if results["metadatas"] is not None:
+                results["metadatas"].append([records[int(rows[i])][2] for i in found])
+            if results["distances"] is not None:
+                results["distances"].append([float(distances[i]) for i in found])
+            if results["embeddings"] is not None:
+                results["embeddings"].append(
+                    np.asarray(vectors[rows[found]], dtype=np.float32)
+                    if found
+                    else np.zeros((0, self._dim or 0), dtype=np.float32)
+                )
+        return results
+
+    def get(
+        self,
+        ids: Optional[List[str]] = None,
+        where: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        include: Sequence[str] = ("documents", "metadatas"),
+    ) -> Dict[str, Any]:
+        with self._lock:
+            self._refresh()
+            records = self._rows_for(ids=ids, where=where, limit=limit, offset=offset)
+            vectors = self._vectors
+
+        rows = np.asarray([record[0] for record in records], dtype=np.int64)
+        return {
+            "ids": [record[1] for record in records],
+            "documents": (
+                [record[2] for record in records] if "documents" in include else None
+            ),
+            "metadatas": (
+                [json.loads(record[3]) for record in records]
+                if "metadatas" in include
+                else None
+            ),
+            "embeddings": (
+                np.asarray(vectors[rows], dtype=np.float32)
+                if "embeddings" in include and len(rows)
+                else [] if "embeddings" in include else None
+            ),
+        }
+
+    def update(
+        self,
+        ids: List[str],
+        embeddings: Optional[Sequence[Sequence[float]]] = None,
+        documents: Optional[List[str]] = None,
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+    ) -> None:
+        if not ids:
+            return
+        with self._write_lock():
+            row_of = {record[1]: record[0] for record in self._rows_for(ids=ids)}
+            present = [i for i, record_id in enumerate(ids) if record_id in row_of]
+            if len(present) < len(ids):
+                logger.warning(
+                    f"集合 {self.name} 中不存在 {len(ids) - len(present)} 个 ID，已忽略"
+                )
+            if not present:
+                return
+
+            with self._db:
+                if metadatas is not None:
+                    self._db.executemany(
+                        "UPDATE records SET metadata = ? WHERE id = ?",
+                        [
+                            (json.dumps(metadatas[i], ensure_ascii=False), ids[i])
+                            for i in present
+                        ],
+                    )
+                if documents is not None:
+                    self._db.executemany(
+                        "UPDATE records SET document = ? WHERE id = ?",
+                        [(documents[i], ids[i]) for i in present],
+                    )
+
+            if embeddings is not None:
+                rows = np.asarray([row_of[ids[i]] for i in present])
+                vectors = np.asarray(embeddings, dtype=np.float32)[present]
+                writable = np.memmap(
+                    self._file("vectors.bin"),
+                    dtype=self._dtype,
+                    mode="r+",
+                    shape=(self._rows, self._dim),
+                )
+                writable[rows] = vectors.astype(self._dtype)
+                writable.flush()
+                if self._centroids is not None:
+                    assignments = np.memmap(
+                        self._file("assignments.i32"),
+                        dtype=np.int32,
+                        mode="r+",
+                        shape=(self._rows,),
+                    )
+                    assignments[rows] = _nearest_centroids(
+                        self._ivf_space(vectors), self._centroids
+                    )
+                    assignments.flush()
+
+            self._save_meta()
+
+    def delete(
+        self,
+        ids: Optional[List[str]] = None,
+        where: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        if ids is None and where is None:
+            return
+        with self._write_lock():
+            rows = [record[0] for record in self._rows_for(ids=ids, where=where)]
+            if not rows:
+                return
+            with self._db:
+                for start in range(0, len(rows), SQL_BATCH_SIZE):
+                    batch = rows[start : start + SQL_BATCH_SIZE]
+                    marks = ", ".join("?" * len(batch))
+                    self._db.execute(f"DELETE FROM records WHERE row IN ({marks})", batch)
+
+            tombstones = self._tombstones.copy()
+            tombstones[rows] = True
+            np.packbits(tombstones).tofile(self._file("tombstones.bits"))
+            self._save_meta()
+
+            deleted = int(tombstones.sum())
+            if (
+                deleted >= min(COMPACT_MIN_DELETED, self._rows)
+                and deleted / self._rows >= settings.LOCAL_INDEX_COMPACT_RATIO
+            ):
+                self._compact()
+
+    def count(self) -> int:
+        with self._lock:
+            self._refresh()
+            return self._rows - int(self._tombstones.sum())
+
+    def compact(self) -> None:
+        """立即压缩：去除已删除的行，必要时重新训练 IVF"""
+        with self._write_lock():
+            self._compact()
+
+    def _compact(self) -> None:
+        """将存活的行写入新的一代，切换后删除旧的一代"""
+        old_generation = self._meta["generation"]
+        generation = old_generation + 1
+        directory = os.path.join(self.path, f"g{generation}")
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory)
+
+        live = np.flatnonzero(~self._tombstones)
+        with open(os.path.join(directory, "vectors.bin"), "wb") as f:
+            for start in range(0, len(live), SEARCH_BLOCK_ROWS):
+                f.write(
+                    np.asarray(self._vectors[live[start : start + SEARCH_BLOCK_ROWS]])
+                    .astype(self._dtype)
+                    .tobytes()
+                )
+
+        new_row = np.full(self._rows, -1, dtype=np.int64)
+        new_row[live] = np.arange(len(live))
+        db = self._connect_file(os.path.join(directory, "records.sqlite3"))
+        cursor = self._db.execute(
+            "SELECT row, id, document, metadata FROM records WHERE row < ? ORDER BY row",
+            (self._rows,),
+        )
+        with db:
+            while True:
+                batch = cursor.fetchmany(SQL_BATCH_SIZE)
+                if not batch:
+                    break
+                db.executemany(
+                    "INSERT INTO records (row, id, document, metadata) VALUES (?, ?, ?, ?)",
+                    [
+                        (int(new_row[row]), record_id, document, metadata)
+                        for row, record_id, document, metadata in batch
+                        if new_row[row] >= 0
+                    ],
+                )
+        db.close()
+
+        if len(live) >= settings.LOCAL_INDEX_IVF_MIN_VECTORS:
+            self._train_ivf(generation, rows=len(live))
+
+        self._save_meta(rows=len(live), generation=generation)
+        # 其他进程已打开的文件在 POSIX 下删除后仍可读取，直到它们重新加载
+        shutil.rmtree(os.path.join(self.path, f"g{old_generation}"), ignore_errors=True)
+        logger.info(
+            f"集合 {self.name} 压缩完成：{len(new_row)} 行 -> {len(live)} 行，"
+            f"代数 {generation}"
+        )
+
+    def _train_ivf(self, generation: int, rows: Optional[int] = None) -> None:
+        """
+        在指定代的向量上训练 IVF（k-means，聚类数约为 sqrt(存活行数)），并为每行分配聚类
+
+        Args:
+            generation: 代数
+            rows: 该代的行数，默认为当前行数
+        """
+        rows = self._rows if rows is None else rows
+        vectors = np.memmap(
+            self._file("vectors.bin", generation),
+            dtype=self._dtype,
+            mode="r",
+            shape=(rows, self._dim),
+        )
+        if generation == self._meta["generation"]:
+            live = np.flatnonzero(~self._tombstones[:rows])
+        else:
+            live = np.arange(rows)
+
+        rng = np.random.default_rng(0)
+        nlist = max(1, int(np.sqrt(len(live))))
+        sample_size = min(len(live), nlist * KMEANS_SAMPLES_PER_LIST)
+        sample_rows = np.sort(rng.choice(live, size=sample_size, replace=False))
+        sample = self._ivf_space(np.asarray(vectors[sample_rows], dtype=np.float32))
+
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(KMEANS_ITERATIONS):
+            labels = _nearest_centroids(sample, centroids)
+            counts = np.bincount(labels, minlength=nlist)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            filled = counts > 0
+            centroids[filled] = sums[filled] / counts[filled, None]
+
+        # 先写分配结果，再写聚类中心：读取方以聚类中心文件的存在作为 IVF 可用的标志
+        with open(self._file("assignments.i32", generation), "wb") as f:
+            for start in range(0, rows, SEARCH_BLOCK_ROWS):
+                block = np.asarray(
+                    vectors[start : start + SEARCH_BLOCK_ROWS], dtype=np.float32
+                )
+                f.write(_nearest_centroids(self._ivf_space(block), centroids).tobytes())
+        np.save(self._file("ivf.npy", generation), centroids.astype(np.float32))
+        logger.info(f"集合 {self.name} 训练 IVF 完成：{len(live)} 个向量，{nlist} 个聚类")
+
+    def persist(self) -> None:
+        """将追加写入的向量文件同步到磁盘"""
+        with self._lock:
+            for name in ("vectors.bin", "assignments.i32"):
+                path = self._file(name)
+                if os.path.exists(path):
+                    with open(path, "rb+") as f:
+                        os.fsync(f.fileno())
+
+    def close(self) -> None:
+        """关闭记录表连接"""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+                self._opened = None
+                self._stamp = None
+
+
+class LocalBackend(IndexBackend):
+    """本地索引引擎，集合对象在进程内缓存复用"""
+
+    name = "local"
+
+    def __init__(self, root: str):
+        """
+        初始化本地索引引擎
+
+        Args:
+            root: 数据目录
+        """
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._collections: Dict[str, LocalCollection] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, name: str) -> str:
+        if not _NAME_PATTERN.match(name):
+            raise ValueError(f"非法的集合名称: {name}")
+        return os.path.join(self.root, name)
+
+    def _exists(self, name: str) -> bool:
+        return os.path.exists(os.path.join(self._path(name), "meta.json"))
+
+    def get_collection(self, name: str) -> LocalCollection:
+        with self._lock:
+            if not self._exists(name):
+                collection = self._collections.pop(name, None)
+                if collection is not None:
+                    collection.close()
+                raise ValueError(f"集合 {name} 不存在")
+            collection = self._collections.get(name)
+            if collection is None:
+                collection = LocalCollection(self._path(name), name)
+                self._collections[name] = collection
+            return collection
+
+    def create_collection(
+        self, name: str, metadata: Optional[Dict[str, Any]] = None
+    ) -> LocalCollection:
+        with self._lock:
+            if self._exists(name):
+                raise ValueError(f"集合 {name} 已存在")
+            collection = LocalCollection.create(self._path(name), name, metadata)
+            self._collections[name] = collection
+            return collection
+
+    def delete_collection(self, name: str) -> None:
+        with self._lock:
+            if not self._exists(name):
+                raise ValueError(f"集合 {name} 不存在")
+            collection = self._collections.pop(name, None)
+            if collection is not None:
+                collection.close()
+            # 先删除 meta.json，其他进程随即认为集合不存在
+            os.remove(os.path.join(self._path(name), "meta.json"))
+            shutil.rmtree(self._path(name), ignore_errors=True)
+
+    def persist(self) -> None:
+        with self._lock:
+            collections = list(self._collections.values())
+        for collection in collections:
+            collection.persist()
@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文档入库流水线
+
+转换、分块、嵌入、写索引四个阶段各占一个线程，阶段之间用有界队列连接：
+转换出第一批页面后即开始分块和嵌入，嵌入结果按批陆续写入索引，
+文档前面的分块在后面的页面仍在转换时就已经可以检索。
+队列满时上游阶段阻塞（背压），内存占用不随文档大小增长。
+
+每个阶段记录处理数量、等待输入的时间（饥饿）和等待输出的时间（被下游阻塞），
+每个队列记录最大和平均深度，用于定位瓶颈阶段。
+"""
+
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from app.core.config import settings
+from app.modules.knowledge.services.vector_store import VectorStore
+
+logger = logging.getLogger(__name__)
+
+# 队列结束标记
+_END = object()
+
+# 等待队列时检查中止标记的间隔（秒）
+_POLL_INTERVAL = 0.1
+
+
+class PipelineAborted(Exception):
+    """其他阶段出错，流水线已中止"""
+
+
+class StageQueue:
+    """阶段之间的有界队列，记录深度和两端的等待时间"""
+
+    def __init__(self, name: str, maxsize: int, stop_event: threading.Event):
+        """
+        初始化队列
+
+        Args:
+            name: 队列名称
+            maxsize: 容量
+            stop_event: 流水线中止标记
+        """
+        self.name = name
+        self.maxsize = maxsize
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=maxsize)
+        self._stop_event = stop_event
+        self.max_depth = 0
+        self._depth_total = 0
+        self._depth_samples = 0
+        # 生产者因队列满阻塞的时间、消费者因队列空等待的时间
+        self.put_wait_seconds = 0.0
+        self.get_wait_seconds = 0.0
+
+    def put(self, item: Any) -> None:
+        """放入一项，队列满时阻塞，流水线中止时抛出 PipelineAborted"""
+        started = time.perf_counter()
+        while True:
+            if self._stop_event.is_set():
+                raise PipelineAborted()
+            try:
+                self._queue.put(item, timeout=_POLL_INTERVAL)
+                break
+            except queue.Full:
+                continue
+        self.put_wait_seconds += time.perf_counter() - started
+        depth = self._queue.qsize()
+        self.max_depth = max(self.max_depth, depth)
+        self._depth_total += depth
+        self._depth_samples += 1
+
+    def get(self) -> Any:
+        """取出一项，队列空时等待，流水线中止时抛出 PipelineAborted"""
+        started = time.perf_counter()
+        while True:
+            if self._stop_event.is_set():
+                raise PipelineAborted()
+            try:
+                item = self._queue.get(timeout=_POLL_INTERVAL)
+                break
+            except queue.Empty:
+                continue
+        self.get_wait_seconds += time.perf_counter() - started
+        return item
+
+    def get_batch(self, limit: int) -> List[Any]:
+        """
+        取出一批：等待第一项，之后只取队列中已有的项，最多 limit 项
+
+        结束标记总是作为批次的最后一项返回。
+
+        Args:
+            limit: 最多取出的项数
+
+        Returns:
+            List[Any]: 取出的项
+        """
+        batch = [self.get()]
+        while batch[-1] is not _END and len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def iterate(self) -> Iterator[Any]:
+        """逐项取出直到结束标记"""
+        while True:
+            item = self.get()
+            if item is _END:
+                return
+            yield item
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        获取队列指标
+
+        Returns:
+            Dict[str, Any]: 指标
+        """
+        return {
+            "capacity": self.maxsize,
+            "max_depth": self.max_depth,
+            "mean_depth": round(self._depth_total / self._depth_samples, 2)
+            if self._depth_samples
+            else 0.0,
+        }
+
+
+class IngestPipeline:
+    """单个文档的入库流水线"""
+
+    def __init__(
+        self,
+        vector_store: VectorStore,
+        collection_name: str,
+        chunk_metadata: Optional[Dict[str, Any]] = None,
+        index_profile: Optional[Dict[str, Any]] = None,
+        queue_size: Optional[int] = None,
+        embed_batch_size: Optional[int] = None,
+        index_batch_size: Optional[int] = None,
+    ):
+        """
+        初始化流水线
+
+        Args:
+            vector_store: 向量数据库服务
+            collection_name: 写入的集合名称
+            chunk_metadata: 每个分块共有的元数据，chunk_index 由流水线按顺序补充
+            index_profile: 集合不存在时，新建集合使用的索引参数
+            queue_size: 每个队列的容量，默认取 INGEST_QUEUE_SIZE
+            embed_batch_size: 每次嵌入的最大分块数，默认取 INGEST_EMBED_BATCH_SIZE
+            index_batch_size: 每次写入索引的最大分块数，默认取 INGEST_INDEX_BATCH_SIZE
+        """
+        self.vector_store = vector_store
+        self.collection_name = collection_name
+        self.chunk_metadata = chunk_metadata or {}
+        self.index_profile = index_profile
+        self.embed_batch_size = embed_batch_size or settings.INGEST_EMBED_BATCH_SIZE
+        self.index_batch_size = index_batch_size or settings.INGEST_INDEX_BATCH_SIZE
+
+        queue_size = queue_size or settings.INGEST_QUEUE_SIZE
+        self._stop_event = threading.Event()
+        self._text_queue = StageQueue("text", queue_size, self._stop_event)
+        self._chunk_queue = StageQueue("chunk", queue_size, self._stop_event)
+        # 队列中每项是一批嵌入结果，容量按批数折算
+        self._embedding_queue = StageQueue(
+            "embedding",
+            max(2, queue_size // self.embed_batch_size),
+            self._stop_event,
+        )
+
+        self._error: Optional[Exception] = None
+        self._error_lock = threading.Lock()
+        self._texts: List[str] = []
+        self._items = {"convert": 0, "chunk": 0, "embed": 0, "index": 0}
+        self._busy_seconds = {"convert": 0.0, "embed": 0.0, "index": 0.0}
+        self.index_batches = 0
+        self.ids: List[str] = []
+        self.started_at: Optional[float] = None
+        # 第一个分块写入索引（可被检索）的时间
+        self.first_indexed_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    @property
+    def text(self) -> str:
+        """转换阶段输出的全文"""
+        return "".join(self._texts)
+
+    def _fail(self, error: Exception) -> None:
+        """记录第一个出错的阶段并中止其他阶段"""
+        with self._error_lock:
+            if self._error is None:
+                self._error = error
+        self._stop_event.set()
+
+    def _run_stage(self, name: str, target: Callable[..., None], *args) -> None:
+        """在线程中运行一个阶段，出错时中止整个流水线"""
+        try:
+            target(*args)
+        except PipelineAborted:
+            pass
+        except Exception as e:
+            logger.error(f"入库流水线 {name} 阶段出错: {str(e)}", exc_info=True)
+            self._fail(e)
+
+    def _convert(self, segments: Iterable[str]) -> None:
+        """转换阶段：驱动文档转换，逐段输出文本"""
+        iterator = iter(segments)
+        while True:
+            started = time.perf_counter()
+            try:
+                segment = next(iterator)
+            except StopIteration:
+                break
+            finally:
+                self._busy_seconds["convert"] += time.perf_counter() - started
+            if not segment:
+                continue
+            self._texts.append(segment)
+            self._items["convert"] += 1
+            self._text_queue.put(segment)
+        self._text_queue.put(_END)
+
+    def _chunk(self, chunker: Callable[[Iterable[str]], Iterable[str]]) -> None:
+        """分块阶段：对到达的文本流式分块"""
+        for chunk in chunker(self._text_queue.iterate()):
+            if not chunk.strip():
+                continue
+            self._chunk_queue.put((self._items["chunk"], chunk))
+            self._items["chunk"] += 1
+        self._chunk_queue.put(_END)
+
+    def _embed(self) -> None:
+        """嵌入阶段：把队列中已有的分块合成一批计算嵌入"""
+        while True:
+            batch = self._chunk_queue.get_batch(self.embed_batch_size)
+            finished = batch[-1] is _END
+            items = batch[:-1] if finished else batch
+            if items:
+                started = time.perf_counter()
+                embeddings = self.vector_store.get_embeddings(
+                    [chunk for _, chunk in items]
+                )
+                self._busy_seconds["embed"] += time.perf_counter() - started
+                self._items["embed"] += len(items)
+                self._embedding_queue.put((items, embeddings))
+            if finished:
+                self._embedding_queue.put(_END)
+                return
+
+    def _index(self) -> None:
+        """写索引阶段：合并已到达的嵌入结果，按批写入"""
+        finished = False
+        while not finished:
+            batches = self._embedding_queue.get_batch(
+                max(1, self.index_batch_size // self.embed_batch_size)
+            )
+            finished = batches[-1] is _END
+            items, embeddings = [], []
+            for batch in batches[:-1] if finished else batches:
+                items.extend(batch[0])
+                embeddings.extend(batch[1])
+            if not items:
+                continue
+
+            started = time.perf_counter()
+            self.ids.extend(
+                self.vector_store.add_texts(
+                    collection_name=self.collection_name,
+                    texts=[chunk for _, chunk in items],
+                    metadatas=[
+                        {**self.chunk_metadata, "chunk_index": chunk_index}
+                        for chunk_index, _ in items
+                    ],
+                    index_profile=self.index_profile,
+                    embeddings=embeddings,
+                )
+            )
+            self._busy_seconds["index"] += time.perf_counter() - started
+            self._items["index"] += len(items)
+            self.index_batches += 1
+            if self.first_indexed_at is None:
+                self.first_indexed_at = time.time()
+                logger.info(
+                    f"集合 {self.collection_name} 首批 {len(items)} 个分块已可检索，"
+                    f"距流水线启动 {self.first_indexed_at - self.started_at:.2f}秒"
+                )
+
+    def run(
+        self,
+        segments: Iterable[str],
+        chunker: Callable[[Iterable[str]], Iterable[str]],
+    ) -> Dict[str, Any]:
+        """
+        运行流水线，所有分块写入索引后返回
+
+        Args:
+            segments: 文本片段（惰性产生，迭代它即驱动文档转换）
+            chunker: 分块函数，输入文本片段流，输出分块流
+
+        Returns:
+            Dict[str, Any]: 运行指标
+
+        Raises:
+            Exception: 任一阶段出错时抛出该阶段的异常，已写入的分块需要调用方清理
+        """
+        self.started_at = time.time()
+        threads = [
+            threading.Thread(
+                target=self._run_stage,
+                args=(name, target, *args),
+                name=f"ingest-{name}",
+                daemon=True,
+            )
+            for name, target, args in (
+                ("convert", self._convert, (segments,)),
+                ("chunk", self._chunk, (chunker,)),
+                ("embed", self._embed, ()),
+            )
+        ]
+        for thread in threads:
+            thread.start()
+
+        # 写索引阶段在调用线程中运行
+        self._run_stage("index", self._index)
+        if self._error is not None:
+            self._stop_event.set()
+        for thread in threads:
+            thread.join()
+        self.finished_at = time.time()
+
+        if self._error is not None:
+            raise self._error
+
+        metrics = self.metrics()
+        logger.info(f"集合 {self.collection_name} 入库流水线完成: {metrics}")
+        return metrics
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        获取运行指标
+
+        Returns:
+            Dict[str, Any]: 各阶段处理数量和等待时间、各队列深度、首个分块可检索的耗时
+        """
+        queues = {
+            "convert": (None, self._text_queue),
+            "chunk": (self._text_queue, self._chunk_queue),
+            "embed": (self._chunk_queue, self._embedding_queue),
+            "index": (self._embedding_queue, None),
+        }
+        stages = {}
+        for name, (input_queue, output_queue) in queues.items():
+            stages[name] = {
+                "items": self._items[name],
+                "starved_seconds": round(input_queue.get_wait_seconds, 3)
+                if input_queue
+                else 0.0,
+                "blocked_seconds": round(output_queue.put_wait_seconds, 3)
+                if output_queue
+                else 0.0,
+            }
+            if name in self._busy_seconds:
+                stages[name]["busy_seconds"] = round(self._busy_seconds[name], 3)
+
+        end = self.finished_at or time.time()
+        return {
+            "chunks": self._items["index"],
+            "index_batches": self.index_batches,
+            "first_indexed_seconds": round(self.first_indexed_at - self.started_at, 3)
+            if self.first_indexed_at and self.started_at
+            else None,
+            "total_seconds": round(end - self.started_at, 3)
+            if self.started_at
+            else None,
+            "stages": stages,
+            "queues": {
+                stage_queue.name: stage_queue.metrics()
+                for stage_queue in (
+                    self._text_queue,
+                    self._chunk_queue,
+                    self._embedding_queue,
+                )
+            },
+        }
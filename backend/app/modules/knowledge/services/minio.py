@@ -2,52 +2,276 @@
 # -*- coding: utf-8 -*-
 """
 MinIO 服务
+
+MinIO 客户端（及其 urllib3 连接池）在进程内共享，首次使用时创建并检查一次存储桶；
+MinioService 只是对共享客户端的封装，可以随用随建。
 """
 
+import hashlib
+import inspect
 import io
-from typing import Optional
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
+import certifi
+import urllib3
 from app.core.config import settings
 from app.core.logging import setup_logging
+from app.core.redis import get_redis
 from minio import Minio
+from minio.commonconfig import ComposeSource
+from minio.datatypes import Part
 from minio.error import S3Error
 from urllib3.exceptions import MaxRetryError, NewConnectionError
+from urllib3.util import Retry, Timeout
 
 logger = setup_logging()
 
+# 按内容寻址的对象路径前缀，对象名为文件内容的 SHA-256
+CONTENT_ADDRESSED_PREFIX = "objects/sha256"
+
+# 文件锁：串行化同一文件的「确认存在 / 写入」与「统计引用 / 删除」
+FILE_LOCK_KEY = "file_lock:{file_path}"
+FILE_LOCK_TIMEOUT = 600  # 锁的最长持有时间（秒），覆盖大文件的上传和复制
+FILE_LOCK_WAIT = 30  # 等待锁的最长时间（秒）
+
+# 分片上传使用的 minio 内部方法及其参数（按 minio 7.2 的签名调用），
+# requirements.txt 限定了 minio 的版本，首次分片上传时仍检查一次，升级后签名变化时
+# 只有断点续传失败，其他 MinIO 操作不受影响
+MULTIPART_METHODS = {
+    "_create_multipart_upload": ("bucket_name", "object_name", "headers"),
+    "_upload_part": (
+        "bucket_name",
+        "object_name",
+        "data",
+        "headers",
+        "upload_id",
+        "part_number",
+    ),
+    "_list_parts": (
+        "bucket_name",
+        "object_name",
+        "upload_id",
+        "max_parts",
+        "part_number_marker",
+    ),
+    "_complete_multipart_upload": (
+        "bucket_name",
+        "object_name",
+        "upload_id",
+        "parts",
+    ),
+    "_abort_multipart_upload": ("bucket_name", "object_name", "upload_id"),
+}
+
+# 进程内共享的客户端
+_minio_client: Optional[Minio] = None
+_public_minio_client: Optional[Minio] = None
+_minio_http_client: Optional[urllib3.PoolManager] = None
+_minio_client_lock = threading.Lock()
+# 分片上传所需的内部方法是否已检查通过
+_multipart_api_checked = False
+
+
+def _create_http_client() -> urllib3.PoolManager:
+    """
+    创建 MinIO 客户端使用的连接池（参数与 minio 默认值一致，连接数、超时和重试可配置）
+
+    Returns:
+        urllib3.PoolManager: 连接池
+    """
+    return urllib3.PoolManager(
+        timeout=Timeout(
+            connect=settings.MINIO_CONNECT_TIMEOUT, read=settings.MINIO_READ_TIMEOUT
+        ),
+        maxsize=settings.MINIO_POOL_MAXSIZE,
+        cert_reqs="CERT_REQUIRED",
+        ca_certs=os.environ.get("SSL_CERT_FILE") or certifi.where(),
+        retries=Retry(
+            total=settings.MINIO_MAX_RETRIES,
+            backoff_factor=0.2,
+            status_forcelist=[500, 502, 503, 504],
+        ),
+    )
+
+
+def _check_multipart_api(client: Minio) -> None:
+    """
+    检查 minio 客户端提供分片上传所需的内部方法
+
+    Args:
+        client: MinIO 客户端
+
+    Raises:
+        RuntimeError: 方法不存在或参数与预期不符
+    """
+    for name, expected in MULTIPART_METHODS.items():
+        method = getattr(client, name, None)
+        if method is None:
+            raise RuntimeError(
+                f"minio 客户端缺少分片上传方法 {name}，请安装 requirements.txt 中的版本"
+            )
+        parameters = tuple(inspect.signature(method).parameters)
+        if parameters[: len(expected)] != expected:
+            raise RuntimeError(
+                f"minio 客户端的 {name} 参数为 {parameters}，与预期的 {expected} 不符，"
+                "请安装 requirements.txt 中的版本"
+            )
+
+
+def _ensure_bucket_exists(client: Minio) -> None:
+    """确保存储桶存在"""
+    try:
+        if not client.bucket_exists(settings.MINIO_BUCKET_NAME):
+            client.make_bucket(settings.MINIO_BUCKET_NAME)
+            logger.info(f"创建存储桶: {settings.MINIO_BUCKET_NAME}")
+    except (S3Error, MaxRetryError, NewConnectionError) as e:
+        logger.error(f"MinIO 错误: {e}")
+        raise
+
+
+@contextmanager
+def file_lock(file_path: str) -> Iterator[bool]:
+    """
+    按文件路径加 Redis 锁
+
+    按内容寻址的文件被多条记录共享：写入方先创建引用记录，再在锁内确认文件存在（或写入）；
+    删除方在锁内统计引用并删除，两者不会交错。
+
+    Args:
+        file_path: 文件路径
+
+    Yields:
+        bool: 是否加锁成功，Redis 不可用或等待超时时为 False
+    """
+    lock = get_redis().lock(
+        FILE_LOCK_KEY.format(file_path=file_path),
+        timeout=FILE_LOCK_TIMEOUT,
+        blocking_timeout=FILE_LOCK_WAIT,
+    )
+    try:
+        acquired = bool(lock.acquire())
+    except Exception as e:
+        logger.warning(f"获取文件锁失败: {file_path}, {e}")
+        acquired = False
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            try:
+                lock.release()
+            except Exception as e:
+                logger.warning(f"释放文件锁失败: {file_path}, {e}")
+
+
+def get_minio_client() -> Minio:
+    """
+    获取进程内共享的 MinIO 客户端
+
+    首次调用时创建客户端并检查存储桶，检查失败时抛出异常，下次调用重试。
+
+    Returns:
+        Minio: MinIO 客户端
+    """
+    global _minio_client, _minio_http_client
+
+    if _minio_client is None:
+        with _minio_client_lock:
+            if _minio_client is None:
+                http_client = _create_http_client()
+                client = Minio(
+                    settings.MINIO_ENDPOINT,
+                    access_key=settings.MINIO_ACCESS_KEY,
+                    secret_key=settings.MINIO_SECRET_KEY,
+                    secure=settings.MINIO_SECURE,
+                    http_client=http_client,
+                )
+                _ensure_bucket_exists(client)
+                _minio_http_client = http_client
+                _minio_client = client
+                logger.info("MinIO 服务连接成功")
+    return _minio_client
+
+
+def _get_public_minio_client() -> Minio:
+    """
+    获取签发直传 URL 使用的客户端（MINIO_PUBLIC_ENDPOINT），只在本地计算签名，不建立连接
+
+    Returns:
+        Minio: MinIO 客户端
+    """
+    global _public_minio_client
+
+    if _public_minio_client is None:
+        with _minio_client_lock:
+            if _public_minio_client is None:
+                _public_minio_client = Minio(
+                    settings.MINIO_PUBLIC_ENDPOINT,
+                    access_key=settings.MINIO_ACCESS_KEY,
+                    secret_key=settings.MINIO_SECRET_KEY,
+                    secure=settings.MINIO_PUBLIC_SECURE,
+                    region=settings.MINIO_REGION,
+                )
+    return _public_minio_client
+
+
+def reset_minio_client() -> None:
+    """
+    丢弃共享客户端，下次使用时重新创建
+
+    prefork 子进程不能复用父进程的连接，Celery 子进程启动时调用。
+    """
+    global _minio_client, _minio_http_client
+
+    with _minio_client_lock:
+        _minio_client = None
+        _minio_http_client = None
+
+
+def get_minio_pool_metrics() -> Dict[str, Any]:
+    """
+    获取 MinIO 连接池使用情况
+
+    Returns:
+        Dict[str, Any]: 连接池指标（每个 MinIO 地址的已建连接数、请求数、空闲连接数）
+    """
+    http_client = _minio_http_client
+    if http_client is None:
+        return {"initialized": False}
+
+    pools = []
+    for key in list(http_client.pools.keys()):
+        pool = http_client.pools.get(key)
+        if pool is None:
+            continue
+        # 连接池队列中未建立的连接占位为 None
+        idle = sum(1 for conn in list(pool.pool.queue) if conn is not None)
+        pools.append(
+            {
+                "host": f"{pool.host}:{pool.port}",
+                "connections_opened": pool.num_connections,
+                "requests": pool.num_requests,
+                "connections_reused": max(pool.num_requests - pool.num_connections, 0),
+                "idle": idle,
+            }
+        )
+    return {
+        "initialized": True,
+        "maxsize": settings.MINIO_POOL_MAXSIZE,
+        "pools": pools,
+    }
+
 
 class MinioService:
     """MinIO 服务类"""
 
     def __init__(self):
-        """初始化 MinIO 客户端"""
-        self.client = Minio(
-            settings.MINIO_ENDPOINT,
-            access_key=settings.MINIO_ACCESS_KEY,
-            secret_key=settings.MINIO_SECRET_KEY,
-            secure=settings.MINIO_SECURE,
-        )
+        """使用进程内共享的 MinIO 客户端"""
+        self.client = get_minio_client()
         self.bucket_name = settings.MINIO_BUCKET_NAME
-        try:
-            self._ensure_bucket_exists()
-            logger.info("MinIO 服务连接成功")
-        except (S3Error, MaxRetryError, NewConnectionError) as e:
-            logger.error(f"MinIO 服务不可用: {e}")
-            logger.error("MinIO 是应用的核心依赖，请确保 MinIO 服务已启动并且配置正确")
-            logger.error("应用程序将退出")
-            import sys
-
-            sys.exit(1)
-
-    def _ensure_bucket_exists(self):
-        """确保存储桶存在"""
-        try:
-            if not self.client.bucket_exists(self.bucket_name):
-                self.client.make_bucket(self.bucket_name)
-                logger.info(f"创建存储桶: {self.bucket_name}")
-        except (S3Error, MaxRetryError, NewConnectionError) as e:
-            logger.error(f"MinIO 错误: {e}")
-            raise
 
     def upload_file(
         self, file_path: str, file_content: bytes, content_type: Optional[str] = None
@@ -81,6 +305,49 @@ class MinioService:
             logger.error(f"文件上传失败: {e}")
             return False
 
+    @staticmethod
+    def content_addressed_path(file_hash: str) -> str:
+        """
+        获取按内容寻址的对象路径
+
+        Args:
+            file_hash: 文件内容的 SHA-256（十六进制）
+
+        Returns:
+            str: 对象路径
+        """
+        return f"{CONTENT_ADDRESSED_PREFIX}/{file_hash[:2]}/{file_hash}"
+
+    def upload_file_deduplicated(
+        self, file_hash: str, file_content: bytes, content_type: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        按内容寻址上传文件，相同内容的对象已存在时不再上传
+
+        调用前需先创建引用该文件的记录；确认存在和上传在文件锁内执行。
+
+        Args:
+            file_hash: 文件内容的 SHA-256
+            file_content: 文件内容
+            content_type: 内容类型
+
+        Returns:
+            Optional[str]: 对象路径，上传失败或无法获取文件锁时返回 None
+        """
+        file_path = self.content_addressed_path(file_hash)
+        with file_lock(file_path) as locked:
+            if not locked:
+                logger.error(f"无法获取文件锁，放弃上传: {file_path}")
+                return None
+            if self.file_exists(file_path):
+                logger.info(f"文件内容已存在，跳过上传: {file_path}")
+                return file_path
+            if not self.upload_file(
+                file_path, file_content, content_type=content_type
+            ):
+                return None
+        return file_path
+
     def download_file(self, file_path: str) -> Optional[bytes]:
         """
         下载文件
@@ -106,6 +373,29 @@ class MinioService:
             logger.error(f"文件下载失败: {e}")
             return None
 
+    def iter_file(
+        self, file_path: str, chunk_size: int = 64 * 1024
+    ) -> Iterator[bytes]:
+        """
+        流式读取文件，不在内存中保留完整内容
+
+        Args:
+            file_path: 文件路径
+            chunk_size: 每次读取的字节数
+
+        Yields:
+            bytes: 文件内容块
+        """
+        response = self.client.get_object(
+            bucket_name=self.bucket_name,
+            object_name=file_path,
+        )
+        try:
+            yield from response.stream(chunk_size)
+        finally:
+            response.close()
+            response.release_conn()
+
     def delete_file(self, file_path: str) -> bool:
         """
         删除文件
@@ -128,6 +418,217 @@ class MinioService:
             logger.error(f"文件删除失败: {e}")
             return False
 
+    def file_exists(self, file_path: str) -> bool:
+        """
+        检查文件是否存在
+
+        Args:
+            file_path: 文件路径
+
+        Returns:
+            bool: 是否存在，MinIO 不可用时返回 False
+        """
+        try:
+            self.client.stat_object(
+                bucket_name=self.bucket_name,
+                object_name=file_path,
+            )
+            return True
+        except S3Error as e:
+            if e.code not in ("NoSuchKey", "NoSuchObject"):
+                logger.error(f"检查文件是否存在失败: {e}")
+            return False
+        except (MaxRetryError, NewConnectionError) as e:
+            logger.error(f"检查文件是否存在失败: {e}")
+            return False
+
+    def hash_file(self, file_path: str) -> str:
+        """
+        流式读取文件并计算 SHA-256
+
+        Args:
+            file_path: 文件路径
+
+        Returns:
+            str: 十六进制摘要
+        """
+        digest = hashlib.sha256()
+        for block in self.iter_file(file_path, chunk_size=1024 * 1024):
+            digest.update(block)
+        return digest.hexdigest()
+
+    def copy_file(self, source_path: str, file_path: str) -> None:
+        """
+        服务端复制文件（不经过本进程，支持超过 5GB 的对象）
+
+        Args:
+            source_path: 源文件路径
+            file_path: 目标文件路径
+        """
+        self.client.compose_object(
+            bucket_name=self.bucket_name,
+            object_name=file_path,
+            sources=[ComposeSource(self.bucket_name, source_path)],
+        )
+
+    # 分片上传：minio 客户端只在 put_object 内部使用 multipart 接口，
+    # 断点续传需要跨请求保留 upload ID，这里直接调用对应的内部方法（见 MULTIPART_METHODS）
+
+    @property
+    def multipart_client(self) -> Minio:
+        """
+        分片上传使用的客户端，首次使用时检查所需的内部方法
+
+        Raises:
+            RuntimeError: 已安装的 minio 版本不提供所需的内部方法
+        """
+        global _multipart_api_checked
+
+        if not _multipart_api_checked:
+            _check_multipart_api(self.client)
+            _multipart_api_checked = True
+        return self.client
+
+    def create_multipart_upload(
+        self, file_path: str, content_type: Optional[str] = None
+    ) -> str:
+        """
+        创建分片上传
+
+        Args:
+            file_path: 分片合并后的文件路径
+            content_type: 内容类型
+
+        Returns:
+            str: upload ID
+        """
+        headers = {"Content-Type": content_type} if content_type else {}
+        return self.multipart_client._create_multipart_upload(
+            self.bucket_name, file_path, headers
+        )
+
+    def upload_part(
+        self, file_path: str, upload_id: str, part_number: int, data: bytes
+    ) -> str:
+        """
+        上传一个分片，相同序号的分片重复上传时覆盖
+
+        Args:
+            file_path: 分片合并后的文件路径
+            upload_id: upload ID
+            part_number: 分片序号（从 1 开始）
+            data: 分片内容
+
+        Returns:
+            str: 分片的 ETag
+        """
+        return self.multipart_client._upload_part(
+            self.bucket_name, file_path, data, None, upload_id, part_number
+        )
+
+    def list_parts(self, file_path: str, upload_id: str) -> List[Part]:
+        """
+        列出已上传的分片
+
+        Args:
+            file_path: 分片合并后的文件路径
+            upload_id: upload ID
+
+        Returns:
+            List[Part]: 分片列表，按序号排列
+        """
+        parts: List[Part] = []
+        marker = None
+        while True:
+            result = self.multipart_client._list_parts(
+                self.bucket_name,
+                file_path,
+                upload_id,
+                max_parts=1000,
+                part_number_marker=marker,
+            )
+            parts.extend(result.parts)
+            if not result.is_truncated:
+                return parts
+            marker = result.next_part_number_marker
+
+    def complete_multipart_upload(
+        self, file_path: str, upload_id: str, parts: List[Part]
+    ) -> None:
+        """
+        合并分片
+
+        Args:
+            file_path: 分片合并后的文件路径
+            upload_id: upload ID
+            parts: 全部分片，按序号排列
+        """
+        self.multipart_client._complete_multipart_upload(
+            self.bucket_name, file_path, upload_id, parts
+        )
+
+    def abort_multipart_upload(self, file_path: str, upload_id: str) -> bool:
+        """
+        取消分片上传并删除已上传的分片
+
+        Args:
+            file_path: 分片合并后的文件路径
+            upload_id: upload ID
+
+        Returns:
+            bool: 是否取消成功（upload 已不存在时也视为成功）
+        """
+        try:
+            self.multipart_client._abort_multipart_upload(
+                self.bucket_name, file_path, upload_id
+            )
+            return True
+        except S3Error as e:
+            if e.code == "NoSuchUpload":
+                return True
+            logger.error(f"取消分片上传失败: {e}")
+            return False
+        except (MaxRetryError, NewConnectionError) as e:
+            logger.error(f"取消分片上传失败: {e}")
+            return False
+
+    def get_upload_url(self, file_path: str, expires: int) -> Optional[str]:
+        """
+        获取客户端直传文件的预签名 PUT URL
+
+        URL 使用 MINIO_PUBLIC_ENDPOINT（浏览器可访问的地址）签名，签名在本地计算，
+        不请求 MinIO。
+
+        Args:
+            file_path: 文件路径
+            expires: 过期时间（秒）
+
+        Returns:
+            Optional[str]: 上传 URL，未配置 MINIO_PUBLIC_ENDPOINT 时返回 None
+        """
+        if not settings.MINIO_PUBLIC_ENDPOINT:
+            return None
+        return _get_public_minio_client().presigned_put_object(
+            bucket_name=self.bucket_name,
+            object_name=file_path,
+            expires=timedelta(seconds=expires),
+        )
+
+    def list_files(self, prefix: str) -> Iterator[Tuple[str, datetime]]:
+        """
+        列出前缀下的所有文件
+
+        Args:
+            prefix: 路径前缀
+
+        Yields:
+            Tuple[str, datetime]: 文件路径和最后修改时间
+        """
+        for obj in self.client.list_objects(
+            bucket_name=self.bucket_name, prefix=prefix, recursive=True
+        ):
+            yield obj.object_name, obj.last_modified
+
     def get_file_url(self, file_path: str, expires: int = 3600) -> Optional[str]:
         """
         获取文件 URL
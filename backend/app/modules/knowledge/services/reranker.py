@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+交叉编码器重排序服务
+
+向量检索先多取一批候选，再用小型交叉编码器在 CPU 上分批重新打分。
+每次请求有时间预算，超时后停止打分并返回当前最好的排序；
+(查询哈希, 分块 ID) 的分数会被缓存，重复查询无需再次计算。
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import replace
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.modules.knowledge.services.vector_store import SearchResult
+
+logger = logging.getLogger(__name__)
+
+_reranker: Optional["CrossEncoderReranker"] = None
+_reranker_lock = threading.Lock()
+
+
+class CrossEncoderReranker:
+    """交叉编码器重排序"""
+
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        cache_size: Optional[int] = None,
+    ):
+        """
+        初始化重排序服务
+
+        Args:
+            model_name: 交叉编码器模型名称
+            batch_size: 每批打分的候选数量
+            cache_size: 分数缓存的最大条目数
+        """
+        from sentence_transformers import CrossEncoder
+
+        self.model_name = model_name or settings.RERANK_MODEL
+        self.batch_size = batch_size or settings.RERANK_BATCH_SIZE
+        self.cache_size = cache_size or settings.RERANK_CACHE_SIZE
+        self.model = CrossEncoder(
+            self.model_name, max_length=settings.RERANK_MAX_LENGTH, device="cpu"
+        )
+        self._cache: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+        # 指标
+        self.requests = 0
+        self.cache_hits = 0
+        self.scored = 0
+        self.budget_exhausted = 0
+
+        logger.info(f"重排序模型加载完成: {self.model_name}")
+
+    @staticmethod
+    def _chunk_key(result: SearchResult) -> str:
+        """分块的缓存标识，没有 ID 时使用内容哈希"""
+        if result.id:
+            return result.id
+        return hashlib.sha1(result.page_content.encode("utf-8")).hexdigest()
+
+    def _get_cached(self, key: Tuple[str, str]) -> Optional[float]:
+        with self._cache_lock:
+            score = self._cache.get(key)
+            if score is not None:
+                self._cache.move_to_end(key)
+            return score
+
+    def _set_cached(self, key: Tuple[str, str], score: float) -> None:
+        with self._cache_lock:
+            self._cache[key] = score
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def rerank(
+        self,
+        query: str,
+        results: List[SearchResult],
+        limit: int,
+        time_budget_ms: Optional[int] = None,
+    ) -> List[SearchResult]:
+        """
+        重排序检索结果
+
+        按向量检索的顺序分批打分，超出时间预算时停止：已打分的候选按交叉编码器分数排在前面，
+        未打分的候选保持原有顺序排在后面。
+
+        Args:
+            query: 查询文本
+            results: 向量检索的候选结果（按相关度降序）
+            limit: 返回结果数量
+            time_budget_ms: 时间预算（毫秒），默认取 RERANK_TIME_BUDGET_MS
+
+        Returns:
+            List[SearchResult]: 重排序后的结果，rerank_score 为交叉编码器分数
+        """
+        self.requests += 1
+        if not results:
+            return []
+
+        budget = (time_budget_ms or settings.RERANK_TIME_BUDGET_MS) / 1000
+        deadline = time.perf_counter() + budget
+        query_hash = hashlib.sha1(query.encode("utf-8")).hexdigest()
+
+        scores: Dict[int, float] = {}
+        pending: List[int] = []
+        for i, result in enumerate(results):
+            cached = self._get_cached((query_hash, self._chunk_key(result)))
+            if cached is None:
+                pending.append(i)
+            else:
+                scores[i] = cached
+                self.cache_hits += 1
+
+        for start in range(0, len(pending), self.batch_size):
+            if time.perf_counter() >= deadline:
+                self.budget_exhausted += 1
+                logger.info(
+                    f"重排序超出时间预算 {budget * 1000:.0f} ms，"
+                    f"已打分 {len(scores)}/{len(results)} 个候选"
+                )
+                break
+            batch = pending[start : start + self.batch_size]
+            batch_scores = self.model.predict(
+                [(query, results[i].page_content) for i in batch],
+                batch_size=self.batch_size,
+                show_progress_bar=False,
+            )
+            for i, score in zip(batch, batch_scores):
+                scores[i] = float(score)
+                self._set_cached((query_hash, self._chunk_key(results[i])), scores[i])
+            self.scored += len(batch)
+
+        scored = sorted(scores, key=lambda i: scores[i], reverse=True)
+        unscored = [i for i in range(len(results)) if i not in scores]
+        return [
+            replace(results[i], rerank_score=scores.get(i))
+            for i in (scored + unscored)[:limit]
+        ]
+
+    def metrics(self) -> Dict[str, int]:
+        """
+        获取重排序指标
+
+        Returns:
+            Dict[str, int]: 指标
+        """
+        return {
+            "requests": self.requests,
+            "cache_hits": self.cache_hits,
+            "cache_size": len(self._cache),
+            "scored": self.scored,
+            "budget_exhausted": self.budget_exhausted,
+        }
+
+
+def get_reranker() -> CrossEncoderReranker:
+    """
+    获取进程内共享的重排序服务（首次使用时加载模型）
+
+    Returns:
+        CrossEncoderReranker: 重排序服务
+    """
+    global _reranker
+
+    if _reranker is None:
+        with _reranker_lock:
+            if _reranker is None:
+                _reranker = CrossEncoderReranker()
+    return _reranker
@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Office / HTML 文档的文本提取
+
+DOCX、PPTX 直接解析压缩包中的 XML（iterparse 逐元素处理并及时释放），HTML 用标准库解析器
+按块喂入，三者都不依赖 marker 的模型，输出与 PDF 转换结果一致的类 Markdown 文本：
+标题转为 #，列表项转为 -，表格转为 | 分隔的行。
+
+提取器是生成器，按段落批次输出文本，供入库流水线边提取边分块、嵌入。
+"""
+
+import posixpath
+import re
+import zipfile
+from html.parser import HTMLParser
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+from xml.etree.ElementTree import iterparse
+
+# 每批输出的最小字符数
+SEGMENT_SIZE = 8 * 1024
+
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+A_NS = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+P_NS = "{http://schemas.openxmlformats.org/presentationml/2006/main}"
+R_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+# Word 内置标题样式：Title、Heading1 ~ Heading9（中文版 Word 中也使用这些样式 ID）
+_HEADING_STYLE = re.compile(r"^(?:heading|标题)\s*(\d)$", re.IGNORECASE)
+
+
+def _batched(blocks: Iterable[str]) -> Iterator[str]:
+    """把段落合并成不小于 SEGMENT_SIZE 的文本片段"""
+    buffer: List[str] = []
+    size = 0
+    for block in blocks:
+        if not block:
+            continue
+        buffer.append(block)
+        size += len(block)
+        if size >= SEGMENT_SIZE:
+            yield "\n\n".join(buffer) + "\n\n"
+            buffer, size = [], 0
+    if buffer:
+        yield "\n\n".join(buffer) + "\n"
+
+
+def _table_row(cells: List[str]) -> str:
+    """表格行，单元格内的换行替换为空格"""
+    return "| " + " | ".join(" ".join(cell.split()) for cell in cells) + " |"
+
+
+def _markdown_table(rows: List[List[str]]) -> str:
+    """表格转为 Markdown，第一行作为表头"""
+    if not rows:
+        return ""
+    width = max(len(row) for row in rows)
+    rows = [row + [""] * (width - len(row)) for row in rows]
+    lines = [_table_row(rows[0]), "|" + " --- |" * width]
+    lines.extend(_table_row(row) for row in rows[1:])
+    return "\n".join(lines)
+
+
+# ---------------------------------------------------------------- DOCX
+
+
+def _docx_paragraph_prefix(paragraph) -> str:
+    """按段落样式返回 Markdown 前缀（标题 / 列表）"""
+    properties = paragraph.find(f"{W_NS}pPr")
+    if properties is None:
+        return ""
+    style = properties.find(f"{W_NS}pStyle")
+    if style is not None:
+        style_id = style.get(f"{W_NS}val", "")
+        if style_id.lower() == "title":
+            return "# "
+        match = _HEADING_STYLE.match(style_id)
+        if match:
+            return "#" * min(int(match.group(1)), 6) + " "
+    if properties.find(f"{W_NS}numPr") is not None:
+        return "- "
+    return ""
+
+
+def _docx_paragraph_text(paragraph) -> str:
+    """段落中的文本，制表符和换行保留"""
+    parts = []
+    for node in paragraph.iter():
+        if node.tag == f"{W_NS}t":
+            parts.append(node.text or "")
+        elif node.tag == f"{W_NS}tab":
+            parts.append("\t")
+        elif node.tag in (f"{W_NS}br", f"{W_NS}cr"):
+            parts.append("\n")
+    return "".join(parts).strip()
+
+
+def iter_docx_blocks(file_path: str) -> Iterator[str]:
+    """
+    逐段提取 DOCX 正文（段落和表格，按文档顺序）
+
+    Args:
+        file_path: 文件路径
+
+    Yields:
+        str: 段落或表格的文本
+    """
+    with zipfile.ZipFile(file_path) as archive:
+        with archive.open("word/document.xml") as document:
+            # 表格可以嵌套，每层保存 (行列表, 当前行)
+            tables: List[List] = []
+            for event, node in iterparse(document, events=("start", "end")):
+                tag = node.tag
+                if event == "start":
+                    if tag == f"{W_NS}tbl":
+                        tables.append([[], None])
+                    elif tag == f"{W_NS}tr" and tables:
+                        tables[-1][1] = []
+                    continue
+
+                if tag == f"{W_NS}p":
+                    if tables:
+                        # 表格中的段落由所在单元格统一处理
+                        continue
+                    text = _docx_paragraph_text(node)
+                    prefix = _docx_paragraph_prefix(node)
+                    node.clear()
+                    if text:
+                        yield prefix + text
+                elif tag == f"{W_NS}tc" and tables:
+                    paragraphs = [
+                        _docx_paragraph_text(paragraph)
+                        for paragraph in node.iter(f"{W_NS}p")
+                    ]
+                    row = tables[-1][1]
+                    if row is not None:
+                        row.append(" ".join(p for p in paragraphs if p))
+                    node.clear()
+                elif tag == f"{W_NS}tr" and tables:
+                    rows, row = tables[-1]
+                    if row:
+                        rows.append(row)
+                    tables[-1][1] = None
+                    node.clear()
+                elif tag == f"{W_NS}tbl" and tables:
+                    rows, _ = tables.pop()
+                    node.clear()
+                    table = _markdown_table(rows)
+                    if tables:
+                        # 嵌套表格并入外层单元格
+                        if tables[-1][1] is not None:
+                            tables[-1][1].append(table.replace("\n", " "))
+                    elif table:
+                        yield table
+
+
+def extract_docx(file_path: str) -> Iterator[str]:
+    """
+    提取 DOCX 文本
+
+    Args:
+        file_path: 文件路径
+
+    Yields:
+        str: 文本片段
+    """
+    return _batched(iter_docx_blocks(file_path))
+
+
+# ---------------------------------------------------------------- PPTX
+
+
+def _read_relationships(archive: zipfile.ZipFile, part: str) -> Dict[str, str]:
+    """读取部件的关系表，返回 关系 ID -> 目标部件路径"""
+    directory, name = posixpath.split(part)
+    rels_path = posixpath.join(directory, "_rels", f"{name}.rels")
+    if rels_path not in archive.namelist():
+        return {}
+    relationships = {}
+    with archive.open(rels_path) as rels:
+        for _, node in iterparse(rels):
+            if node.tag == f"{REL_NS}Relationship":
+                target = node.get("Target", "")
+                if node.get("TargetMode") != "External":
+                    target = posixpath.normpath(posixpath.join(directory, target))
+                relationships[node.get("Id")] = target
+    return relationships
+
+
+def _pptx_slide_parts(archive: zipfile.ZipFile) -> List[str]:
+    """按演示文稿中的顺序返回幻灯片部件路径"""
+    relationships = _read_relationships(archive, "ppt/presentation.xml")
+    slides = []
+    with archive.open("ppt/presentation.xml") as presentation:
+        for _, node in iterparse(presentation):
+            if node.tag == f"{P_NS}sldId":
+                target = relationships.get(node.get(f"{R_NS}id"))
+                if target:
+                    slides.append(target)
+    return slides
+
+
+def _pptx_slide_text(archive: zipfile.ZipFile, part: str) -> str:
+    """一张幻灯片的文本：标题占位符转为标题，表格转为 Markdown 表格"""
+    title: Optional[str] = None
+    blocks: List[str] = []
+    with archive.open(part) as slide:
+        for _, node in iterparse(slide):
+            if node.tag == f"{P_NS}sp":
+                placeholder = node.find(f"{P_NS}nvSpPr/{P_NS}nvPr/{P_NS}ph")
+                paragraphs = [
+                    "".join(text.text or "" for text in paragraph.iter(f"{A_NS}t"))
+                    for paragraph in node.iter(f"{A_NS}p")
+                ]
+                paragraphs = [p.strip() for p in paragraphs if p.strip()]
+                node.clear()
+                if not paragraphs:
+                    continue
+                if (
+                    placeholder is not None
+                    and placeholder.get("type") in ("title", "ctrTitle")
+                    and title is None
+                ):
+                    title = " ".join(paragraphs)
+                else:
+                    blocks.append("\n".join(paragraphs))
+            elif node.tag == f"{A_NS}tbl":
+                rows = [
+                    [
+                        " ".join(
+                            "".join(text.text or "" for text in cell.iter(f"{A_NS}t")).split()
+                        )
+                        for cell in row.iter(f"{A_NS}tc")
+                    ]
+                    for row in node.iter(f"{A_NS}tr")
+                ]
+                table = _markdown_table([row for row in rows if any(row)])
+                if table:
+                    blocks.append(table)
+                node.clear()
+    if title:
+        blocks.insert(0, f"## {title}")
+    return "\n\n".join(blocks)
+
+
+def extract_pptx(file_path: str) -> Iterator[str]:
+    """
+    提取 PPTX 文本，每张幻灯片一段
+
+    Args:
+        file_path: 文件路径
+
+    Yields:
+        str: 文本片段
+    """
+    with zipfile.ZipFile(file_path) as archive:
+        slides = _pptx_slide_parts(archive)
+        yield from _batched(_pptx_slide_text(archive, part) for part in slides)
+
+
+# ---------------------------------------------------------------- HTML
+
+# 块级元素：前后换行
+_BLOCK_TAGS = {
+    "p", "div", "section", "article", "header", "footer", "main", "aside",
+    "nav", "blockquote", "figure", "figcaption", "form", "dl", "dt", "dd",
+    "ul", "ol", "table", "address", "hr",
+}  # fmt: skip
+# 内容不输出的元素
+_SKIP_TAGS = {"script", "style", "head", "noscript", "template", "svg", "iframe"}
+
+
+class _HtmlTextParser(HTMLParser):
+    """HTML 转类 Markdown 文本，文本通过 emit 回调按块输出"""
+
+    def __init__(self, emit: Callable[[str], None]):
+        super().__init__(convert_charrefs=True)
+        self._emit = emit
+        self._skip_depth = 0
+        self._pre_depth = 0
+        self._line: List[str] = []
+        self._row: Optional[List[str]] = None
+        self._cell: Optional[List[str]] = None
+        self._header_row = False
+        self._table_rows = 0
+
+    def _flush(self) -> None:
+        """结束当前行"""
+        line = "".join(self._line)
+        self._line = []
+        if self._pre_depth:
+            self._emit(line + "\n")
+            return
+        line = " ".join(line.split())
+        if line:
+            self._emit(line + "\n\n")
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIP_TAGS:
+            self._skip_depth += 1
+            return
+        if self._skip_depth:
+            return
+        if tag == "tr":
+            self._row = []
+        elif tag in ("td", "th"):
+            self._cell = []
+            if tag == "th":
+                self._header_row = True
+        elif self._cell is not None:
+            return
+        elif re.fullmatch(r"h[1-6]", tag):
+            self._flush()
+            self._line.append("#" * int(tag[1]) + " ")
+        elif tag == "li":
+            self._flush()
+            self._line.append("- ")
+        elif tag == "pre":
+            self._flush()
+            self._pre_depth += 1
+            self._emit("```\n")
+        elif tag == "br":
+            self._flush()
+        elif tag in _BLOCK_TAGS:
+            self._flush()
+            if tag == "table":
+                self._table_rows = 0
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+            return
+        if self._skip_depth:
+            return
+        if tag in ("td", "th") and self._cell is not None:
+            if self._row is not None:
+                self._row.append(" ".join("".join(self._cell).split()))
+            self._cell = None
+        elif tag == "tr" and self._row is not None:
+            if any(self._row):
+                self._emit(_table_row(self._row) + "\n")
+                if self._table_rows == 0 and self._header_row:
+                    self._emit("|" + " --- |" * len(self._row) + "\n")
+                self._table_rows += 1
+            self._row = None
+            self._header_row = False
+        elif self._cell is not None:
+            return
+        elif tag == "pre" and self._pre_depth:
+            self._flush()
+            self._pre_depth -= 1
+            self._emit("```\n\n")
+        elif tag == "table":
+            self._emit("\n")
+        elif re.fullmatch(r"h[1-6]", tag) or tag == "li" or tag in _BLOCK_TAGS:
+            self._flush()
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        if self._cell is not None:
+            self._cell.append(data)
+        else:
+            self._line.append(data)
+
+    def close(self):
+        super().close()
+        self._flush()
+
+
+_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?([\w-]+)""", re.IGNORECASE)
+
+
+def extract_html(file_path: str, block_size: int = 64 * 1024) -> Iterator[str]:
+    """
+    提取 HTML 文本，按块读取和解析
+
+    编码取 <meta charset> 声明，未声明时按 UTF-8 解码。
+
+    Args:
+        file_path: 文件路径
+        block_size: 每次读取的字节数
+
+    Yields:
+        str: 文本片段
+    """
+    import codecs
+
+    pending: List[str] = []
+    parser = _HtmlTextParser(pending.append)
+
+    with open(file_path, "rb") as f:
+        head = f.read(block_size)
+        match = _CHARSET.search(head[:4096])
+        encoding = "utf-8"
+        if match:
+            try:
+                encoding = codecs.lookup(match.group(1).decode("ascii")).name
+            except LookupError:
+                pass
+        decoder = codecs.getincrementaldecoder(encoding)(errors="ignore")
+
+        block = head
+        while block:
+            parser.feed(decoder.decode(block))
+            if sum(len(text) for text in pending) >= SEGMENT_SIZE:
+                yield "".join(pending)
+                pending.clear()
+            block = f.read(block_size)
+        parser.feed(decoder.decode(b"", final=True))
+        parser.close()
+    if pending:
+        yield "".join(pending)
+
+
+# 文件类型 -> 提取器
+EXTRACTORS: Dict[str, Callable[[str], Iterator[str]]] = {
+    "docx": extract_docx,
+    "pptx": extract_pptx,
+    "html": extract_html,
+    "htm": extract_html,
+}
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分片上传（断点续传）
+
+大文件按固定大小分片上传，每个分片对应 MinIO multipart upload 的一个 part：
+
+1. 创建会话：在临时路径 uploads/{uuid}.{扩展名} 上创建 multipart upload
+2. 上传分片：客户端按偏移量并行上传，可附带分片的 SHA-256 校验，失败的分片单独重试
+3. 完成：合并分片，流式计算整个文件的 SHA-256，按内容寻址复制到正式路径
+
+中断后客户端查询会话获得已上传的分片，只需上传其余分片。
+超过 UPLOAD_SESSION_TTL_HOURS 未活动的会话由定时任务取消，已上传的分片随之删除。
+
+配置 MINIO_PUBLIC_ENDPOINT 后也可以直传：API 签发预签名 PUT URL，客户端直接上传到
+uploads/direct/ 下，文件内容不经过 API 进程；哈希计算和按内容寻址转存由处理任务完成。
+"""
+
+import logging
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List
+
+from app.core.config import settings
+from app.core.redis import get_async_redis
+from app.modules.knowledge.services.minio import MinioService, file_lock
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_STAGING_PREFIX = "uploads"
+# 客户端直传的临时路径，处理任务开始时按内容寻址转存
+DIRECT_UPLOAD_PREFIX = f"{UPLOAD_STAGING_PREFIX}/direct"
+
+# S3 multipart 限制：除最后一片外每片不小于 5MB，最多 10000 片
+MIN_PART_SIZE = 5 * 1024 * 1024
+MAX_PART_COUNT = 10000
+
+# 完成会话的锁：同一会话的重复完成请求不会同时合并分片、创建任务
+COMPLETE_LOCK_KEY = "upload_session_complete:{session_id}"
+COMPLETE_LOCK_TIMEOUT = 600  # 锁的最长持有时间（秒），覆盖大文件的合并和复制
+
+
+@asynccontextmanager
+async def complete_lock(session_id: int) -> AsyncIterator[bool]:
+    """
+    按上传会话加 Redis 锁，不等待
+
+    Args:
+        session_id: 上传会话 ID
+
+    Yields:
+        bool: 是否加锁成功，Redis 不可用或其他请求正在完成该会话时为 False
+    """
+    lock = get_async_redis().lock(
+        COMPLETE_LOCK_KEY.format(session_id=session_id),
+        timeout=COMPLETE_LOCK_TIMEOUT,
+    )
+    try:
+        acquired = bool(await lock.acquire(blocking=False))
+    except Exception as e:
+        logger.warning(f"获取上传会话锁失败: {session_id}, {e}")
+        acquired = False
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            try:
+                await lock.release()
+            except Exception as e:
+                logger.warning(f"释放上传会话锁失败: {session_id}, {e}")
+
+
+class UploadIncompleteError(Exception):
+    """分片不完整，无法合并"""
+
+    def __init__(self, missing_parts: List[int]):
+        self.missing_parts = missing_parts
+        super().__init__(f"缺少分片: {missing_parts[:20]}")
+
+
+def choose_part_size(file_size: int) -> int:
+    """
+    选择分片大小
+
+    Args:
+        file_size: 文件大小（字节）
+
+    Returns:
+        int: 分片大小（字节）
+    """
+    part_size = max(settings.UPLOAD_PART_SIZE_MB * 1024 * 1024, MIN_PART_SIZE)
+    if file_size > part_size * MAX_PART_COUNT:
+        # 超过 10000 片时增大分片，按 MB 向上取整
+        part_size = -(-file_size // MAX_PART_COUNT)
+        part_size = -(-part_size // (1024 * 1024)) * 1024 * 1024
+    return part_size
+
+
+def staging_object_name(file_type: str) -> str:
+    """
+    生成分片合并的临时路径
+
+    Args:
+        file_type: 文件类型（不含点号）
+
+    Returns:
+        str: 对象路径
+    """
+    return f"{UPLOAD_STAGING_PREFIX}/{uuid.uuid4().hex}.{file_type}"
+
+
+def direct_upload_object_name(file_type: str) -> str:
+    """
+    生成直传的临时路径
+
+    Args:
+        file_type: 文件类型（不含点号）
+
+    Returns:
+        str: 对象路径
+    """
+    return f"{DIRECT_UPLOAD_PREFIX}/{uuid.uuid4().hex}.{file_type}"
+
+
+def list_uploaded_parts(minio_service: MinioService, upload_session) -> Dict[int, int]:
+    """
+    获取已上传的分片
+
+    Args:
+        minio_service: MinIO 服务
+        upload_session: 上传会话
+
+    Returns:
+        Dict[int, int]: 分片序号 -> 分片大小
+    """
+    return {
+        part.part_number: part.size
+        for part in minio_service.list_parts(
+            upload_session.object_name, upload_session.upload_id
+        )
+    }
+
+
+def assemble_upload(minio_service: MinioService, upload_session) -> str:
+    """
+    合并分片并计算文件的 SHA-256
+
+    重复调用时（上次合并后未能完成后续步骤）直接使用已合并的对象。
+
+    Args:
+        minio_service: MinIO 服务
+        upload_session: 上传会话
+
+    Returns:
+        str: 文件内容的 SHA-256
+
+    Raises:
+        UploadIncompleteError: 分片缺失或大小不符
+    """
+    object_name = upload_session.object_name
+    if not minio_service.file_exists(object_name):
+        parts = minio_service.list_parts(object_name, upload_session.upload_id)
+        sizes = {part.part_number: part.size for part in parts}
+        part_count = upload_session.part_count
+        missing = [
+            number
+            for number in range(1, part_count + 1)
+            if sizes.get(number)
+            != min(
+                upload_session.part_size,
+                upload_session.file_size - (number - 1) * upload_session.part_size,
+            )
+        ]
+        if missing:
+            raise UploadIncompleteError(missing)
+        minio_service.complete_multipart_upload(
+            object_name,
+            upload_session.upload_id,
+            [part for part in parts if part.part_number <= part_count],
+        )
+        logger.info(f"分片合并完成: {object_name}，共 {part_count} 片")
+
+    return minio_service.hash_file(object_name)
+
+
+def store_assembled_upload(
+    minio_service: MinioService, upload_session, file_hash: str
+) -> str:
+    """
+    将合并后的文件按内容寻址存储（服务端复制），并删除临时对象
+
+    调用前需先创建引用该文件的任务，避免与删除并发时文件被删掉。
+
+    Args:
+        minio_service: MinIO 服务
+        upload_session: 上传会话
+        file_hash: 文件内容的 SHA-256
+
+    Returns:
+        str: 文件路径
+
+    Raises:
+        RuntimeError: 无法获取文件锁
+    """
+    file_path = MinioService.content_addressed_path(file_hash)
+    with file_lock(file_path) as locked:
+        if not locked:
+            raise RuntimeError(f"无法获取文件锁: {file_path}")
+        if minio_service.file_exists(file_path):
+            logger.info(f"文件内容已存在，跳过复制: {file_path}")
+        else:
+            minio_service.copy_file(upload_session.object_name, file_path)
+    minio_service.delete_file(upload_session.object_name)
+    return file_path
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+向量压缩
+
+- EmbeddingReducer：PCA 或截断（Matryoshka 风格）降维，降低 HNSW 索引的内存占用
+- ScalarQuantizer：逐向量的 int8 标量量化，用于保存全维向量以便对候选结果做精排
+"""
+
+import base64
+import hashlib
+import logging
+import os
+import threading
+from typing import Optional
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_reducer: Optional["EmbeddingReducer"] = None
+_reducer_lock = threading.Lock()
+
+
+class EmbeddingReducer:
+    """嵌入向量降维"""
+
+    METHODS = ("pca", "truncate")
+
+    def __init__(
+        self,
+        method: str,
+        dim: int,
+        mean: Optional[np.ndarray] = None,
+        components: Optional[np.ndarray] = None,
+    ):
+        """
+        初始化降维器
+
+        Args:
+            method: 降维方法，pca 或 truncate
+            dim: 目标维度
+            mean: PCA 均值向量
+            components: PCA 主成分矩阵 (dim, 原始维度)
+        """
+        if method not in self.METHODS:
+            raise ValueError(f"不支持的降维方法: {method}")
+        self.method = method
+        self.dim = dim
+        self.mean = mean
+        self.components = components
+
+    @property
+    def fitted(self) -> bool:
+        """是否可以直接使用（截断不需要训练）"""
+        return self.method == "truncate" or self.components is not None
+
+    @property
+    def fingerprint(self) -> str:
+        """降维参数的指纹，写入集合元数据以发现降维器被替换"""
+        digest = hashlib.sha1(f"{self.method}:{self.dim}".encode())
+        if self.components is not None:
+            digest.update(self.mean.tobytes())
+            digest.update(self.components.tobytes())
+        return digest.hexdigest()[:16]
+
+    def fit(self, embeddings: np.ndarray) -> "EmbeddingReducer":
+        """
+        在样本向量上训练 PCA
+
+        Args:
+            embeddings: 样本向量 (n, 原始维度)
+
+        Returns:
+            EmbeddingReducer: 自身
+        """
+        if self.method != "pca":
+            return self
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        self.mean = matrix.mean(axis=0)
+        # 右奇异向量即协方差矩阵的特征向量，按方差从大到小排列
+        _, _, vt = np.linalg.svd(matrix - self.mean, full_matrices=False)
+        self.components = vt[: self.dim].astype(np.float32)
+        return self
+
+    def transform(self, embeddings: np.ndarray) -> np.ndarray:
+        """
+        降维
+
+        Args:
+            embeddings: 向量 (n, 原始维度) 或 (原始维度,)
+
+        Returns:
+            np.ndarray: 降维后的向量
+        """
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if self.method == "truncate":
+            reduced = matrix[..., : self.dim]
+            # 截断后重新归一化，保持余弦 / 内积检索的尺度
+            norms = np.linalg.norm(reduced, axis=-1, keepdims=True)
+            return reduced / np.where(norms == 0, 1, norms)
+        if self.components is None:
+            raise RuntimeError("PCA 降维器尚未训练")
+        return (matrix - self.mean) @ self.components.T
+
+    def save(self, path: str) -> None:
+        """
+        保存降维参数
+
+        Args:
+            path: 文件路径（.npz）
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.savez(
+            path,
+            method=self.method,
+            dim=self.dim,
+            mean=self.mean if self.mean is not None else np.zeros(0),
+            components=(
+                self.components if self.components is not None else np.zeros((0, 0))
+            ),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "EmbeddingReducer":
+        """
+        加载降维参数
+
+        Args:
+            path: 文件路径（.npz）
+
+        Returns:
+            EmbeddingReducer: 降维器
+        """
+        data = np.load(path)
+        components = data["components"]
+        return cls(
+            method=str(data["method"]),
+            dim=int(data["dim"]),
+            mean=data["mean"] if components.size else None,
+            components=components if components.size else None,
+        )
+
+
+class ScalarQuantizer:
+    """
+    逐向量的对称 int8 标量量化
+
+    每个向量保存 int8 编码和一个 float32 缩放系数，体积约为 float32 的 1/4，
+    不需要训练，新旧向量可以混用。
+    """
+
+    @staticmethod
+    def encode(embedding: np.ndarray) -> bytes:
+        """
+        量化
+
+        Args:
+            embedding: 向量 (dim,)
+
+        Returns:
+            bytes: float32 缩放系数 + int8 编码
+        """
+        vector = np.asarray(embedding, dtype=np.float32)
+        scale = float(np.abs(vector).max()) / 127 or 1.0
+        codes = np.clip(np.round(vector / scale), -127, 127).astype(np.int8)
+        return np.float32(scale).tobytes() + codes.tobytes()
+
+    @staticmethod
+    def decode(data: bytes) -> np.ndarray:
+        """
+        反量化
+
+        Args:
+            data: encode 的输出
+
+        Returns:
+            np.ndarray: float32 向量
+        """
+        scale = np.frombuffer(data[:4], dtype=np.float32)[0]
+        return np.frombuffer(data[4:], dtype=np.int8).astype(np.float32) * scale
+
+    @classmethod
+    def encode_str(cls, embedding: np.ndarray) -> str:
+        """量化并编码为 base64 字符串（用于写入 Chroma 元数据）"""
+        return base64.b64encode(cls.encode(embedding)).decode("ascii")
+
+    @classmethod
+    def decode_str(cls, data: str) -> np.ndarray:
+        """从 base64 字符串反量化"""
+        return cls.decode(base64.b64decode(data))
+
+
+def get_reducer() -> EmbeddingReducer:
+    """
+    获取紧凑向量模式使用的降维器（进程内只加载一次）
+
+    PCA 需要先用 scripts/evaluate_vector_compression.py --save-reducer 训练并保存；
+    截断模式不需要训练。
+
+    Returns:
+        EmbeddingReducer: 降维器
+    """
+    global _reducer
+
+    if _reducer is None:
+        with _reducer_lock:
+            if _reducer is None:
+                if os.path.exists(settings.VECTOR_REDUCER_PATH):
+                    reducer = EmbeddingReducer.load(settings.VECTOR_REDUCER_PATH)
+                else:
+                    reducer = EmbeddingReducer(
+                        settings.VECTOR_COMPACT_METHOD, settings.VECTOR_COMPACT_DIM
+                    )
+                if not reducer.fitted:
+                    raise RuntimeError(
+                        f"紧凑向量模式需要已训练的 PCA 降维器: {settings.VECTOR_REDUCER_PATH}"
+                    )
+                logger.info(
+                    f"加载向量降维器: {reducer.method}, 维度 {reducer.dim}, "
+                    f"指纹 {reducer.fingerprint}"
+                )
+                _reducer = reducer
+    return _reducer
@@ -6,16 +6,218 @@
 
 import logging
 import os
+import threading
 import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
 
-import chromadb
+import numpy as np
 from app.core.config import settings
-from chromadb.config import Settings
+from app.modules.knowledge.services.index_backends import (
+    DISK_BACKENDS,
+    CollectionNotFoundError,
+    compute_distances,
+    create_index_backend,
+    default_persist_directory,
+)
+from app.modules.knowledge.services.vector_compression import (
+    EmbeddingReducer,
+    ScalarQuantizer,
+    get_reducer,
+)
 from sentence_transformers import SentenceTransformer
 
 logger = logging.getLogger(__name__)
 
+_vector_store: Optional["VectorStore"] = None
+_vector_store_lock = threading.Lock()
+
+# 紧凑向量模式下保存 int8 全维向量的元数据键（存放在 Chroma 的 SQLite 中，不占用 HNSW 内存）
+QUANTIZED_VECTOR_KEY = "_vq"
+
+
+@dataclass
+class SearchResult:
+    """向量检索结果"""
+
+    page_content: str
+    metadata: Dict[str, Any]
+    score: float
+    id: str = ""
+    rerank_score: Optional[float] = None
+
+
+def metadata_timestamp(value: datetime) -> int:
+    """
+    将时间转换为写入分块元数据的时间戳（Chroma 只支持对数值做范围比较）
+
+    Args:
+        value: 时间，不带时区时按 UTC 处理
+
+    Returns:
+        int: Unix 时间戳（秒）
+    """
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+def build_metadata_filter(
+    document_ids: Optional[List[int]] = None,
+    file_types: Optional[List[str]] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    构建 Chroma 的元数据过滤条件
+
+    Args:
+        document_ids: 限定的文档 ID
+        file_types: 限定的文件类型
+        created_after: 文档创建时间下限（含）
+        created_before: 文档创建时间上限（含）
+
+    Returns:
+        Optional[Dict[str, Any]]: where 条件，没有任何限制时为 None
+    """
+    conditions: List[Dict[str, Any]] = []
+    if document_ids:
+        conditions.append({"document_id": {"$in": list(document_ids)}})
+    if file_types:
+        conditions.append(
+            {"file_type": {"$in": [file_type.lower() for file_type in file_types]}}
+        )
+    if created_after is not None:
+        conditions.append({"created_at": {"$gte": metadata_timestamp(created_after)}})
+    if created_before is not None:
+        conditions.append(
+            {"created_at": {"$lte": metadata_timestamp(created_before)}}
+        )
+
+    if not conditions:
+        return None
+    if len(conditions) == 1:
+        return conditions[0]
+    return {"$and": conditions}
+
+
+def hnsw_metadata(index_profile: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    构建新建集合的 HNSW 索引参数（写入集合元数据）
+
+    Args:
+        index_profile: 知识库的索引参数（space、m、construction_ef、search_ef），
+            未指定的项使用配置中的默认值
+
+    Returns:
+        Dict[str, Any]: Chroma 的 hnsw:* 集合元数据
+    """
+    profile = {
+        key: value for key, value in (index_profile or {}).items() if value is not None
+    }
+    return {
+        "hnsw:space": profile.get("space", settings.VECTOR_INDEX_SPACE),
+        "hnsw:M": profile.get("m", settings.HNSW_M),
+        "hnsw:construction_ef": profile.get(
+            "construction_ef", settings.HNSW_CONSTRUCTION_EF
+        ),
+        "hnsw:search_ef": profile.get("search_ef", settings.HNSW_SEARCH_EF),
+    }
+
+
+def collection_space(collection: Any) -> str:
+    """
+    获取集合的距离度量（未指定时为 Chroma 的默认值 l2）
+
+    Args:
+        collection: 集合
+
+    Returns:
+        str: l2 / cosine / ip
+    """
+    return (collection.metadata or {}).get("hnsw:space", "l2")
+
+
+def distance_to_score(space: str, distance: float) -> float:
+    """
+    将距离转换为相似度分数（越大越相似）
+
+    Args:
+        space: 距离度量
+        distance: 距离
+
+    Returns:
+        float: cosine 为余弦相似度，ip 为内积，l2 为 1 / (1 + 平方欧氏距离)
+    """
+    if space == "l2":
+        return 1 / (1 + distance)
+    return 1 - distance
+
+
+def maximal_marginal_relevance(
+    query_embedding: np.ndarray,
+    candidate_embeddings: np.ndarray,
+    k: int,
+    lambda_mult: float = 0.5,
+    group_ids: Optional[List[Any]] = None,
+    max_per_group: Optional[int] = None,
+) -> List[int]:
+    """
+    最大边际相关性（MMR）选择
+
+    每一步选择 lambda * 与查询的相似度 - (1 - lambda) * 与已选结果的最大相似度 最高的候选，
+    与已选结果的最大相似度增量更新，整体为 O(n * k) 次向量化计算。
+
+    Args:
+        query_embedding: 查询向量 (dim,)
+        candidate_embeddings: 候选向量 (n, dim)
+        k: 选择数量
+        lambda_mult: 相关性权重，1 为只看相关性，0 为只看多样性
+        group_ids: 每个候选所属的分组（如 document_id）
+        max_per_group: 每个分组最多选择的数量
+
+    Returns:
+        List[int]: 选中的候选下标，按选择顺序
+    """
+    n = len(candidate_embeddings)
+    if n == 0 or k <= 0:
+        return []
+
+    def normalize(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        return matrix / np.where(norms == 0, 1, norms)
+
+    candidates = normalize(np.asarray(candidate_embeddings, dtype=np.float32))
+    query = normalize(np.asarray(query_embedding, dtype=np.float32))
+    relevance = candidates @ query
+
+    max_similarity = np.full(n, -np.inf, dtype=np.float32)
+    available = np.ones(n, dtype=bool)
+    groups = np.asarray(group_ids, dtype=object) if group_ids is not None else None
+    group_counts: Dict[Any, int] = {}
+    selected: List[int] = []
+
+    while len(selected) < k and available.any():
+        if selected:
+            mmr = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        else:
+            mmr = relevance.copy()
+        mmr[~available] = -np.inf
+        best = int(np.argmax(mmr))
+
+        selected.append(best)
+        available[best] = False
+        max_similarity = np.maximum(max_similarity, candidates @ candidates[best])
+
+        if groups is not None and max_per_group:
+            group = groups[best]
+            group_counts[group] = group_counts.get(group, 0) + 1
+            if group_counts[group] >= max_per_group:
+                available &= groups != group
+
+    return selected
+
 
 class VectorStore:
     """向量数据库服务"""
@@ -25,27 +227,29 @@ class VectorStore:
         初始化向量数据库服务
 
         Args:
-            persist_directory: 持久化目录，如果为 None，则使用内存存储
+            persist_directory: 持久化目录，如果为 None，则使用所选索引后端的默认目录
         """
-        self.persist_directory = persist_directory or os.path.join(
-            settings.DATA_DIR, "chroma_db"
+        self.backend = settings.VECTOR_INDEX_BACKEND
+        self.persist_directory = persist_directory or default_persist_directory(
+            self.backend
         )
 
-        # 确保目录存在
-        os.makedirs(self.persist_directory, exist_ok=True)
+        # 确保目录存在（远程服务不需要本地目录）
+        if self.backend in DISK_BACKENDS:
+            os.makedirs(self.persist_directory, exist_ok=True)
 
-        # 初始化 Chroma 客户端
-        self.client = chromadb.PersistentClient(
-            path=self.persist_directory,
-            settings=Settings(anonymized_telemetry=False, allow_reset=True),
-        )
+        # 初始化索引后端（Chroma、远程 Chroma 或本地引擎，接口与 Chroma 客户端一致）
+        self.client = create_index_backend(self.backend, self.persist_directory)
 
         # 初始化文本嵌入模型
         self.embedding_model = SentenceTransformer(
             "paraphrase-multilingual-MiniLM-L12-v2"
         )
 
-        logger.info(f"向量数据库服务初始化完成，持久化目录: {self.persist_directory}")
+        logger.info(
+            f"向量数据库服务初始化完成，索引后端: {self.backend}，"
+            f"持久化目录: {self.persist_directory}"
+        )
 
     def get_embedding(self, text: str) -> List[float]:
         """
@@ -59,8 +263,27 @@ class VectorStore:
         """
         return self.embedding_model.encode(text).tolist()
 
+    def get_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        批量获取文本的嵌入向量（一次前向计算多条文本）
+
+        Args:
+            texts: 输入文本列表
+
+        Returns:
+            嵌入向量列表
+        """
+        if not texts:
+            return []
+        return self.embedding_model.encode(
+            texts, batch_size=settings.INGEST_EMBED_BATCH_SIZE
+        ).tolist()
+
     def get_collection(
-        self, collection_name: str, create_if_not_exists: bool = True
+        self,
+        collection_name: str,
+        create_if_not_exists: bool = True,
+        index_profile: Optional[Dict[str, Any]] = None,
     ) -> Any:
         """
         获取集合
@@ -68,23 +291,55 @@ class VectorStore:
         Args:
             collection_name: 集合名称
             create_if_not_exists: 如果集合不存在，是否创建
+            index_profile: 新建集合时使用的索引参数，已有集合不受影响
 
         Returns:
             集合对象
         """
         try:
             return self.client.get_collection(name=collection_name)
-        except ValueError:
+        except (ValueError, CollectionNotFoundError):
             if create_if_not_exists:
-                return self.client.create_collection(name=collection_name)
+                metadata = hnsw_metadata(index_profile)
+                if settings.VECTOR_COMPACT_MODE:
+                    reducer = get_reducer()
+                    metadata.update(
+                        vector_reducer=reducer.fingerprint, vector_dim=reducer.dim
+                    )
+                return self.client.create_collection(
+                    name=collection_name, metadata=metadata
+                )
             raise
 
+    def _get_collection_reducer(self, collection: Any) -> Optional[EmbeddingReducer]:
+        """
+        获取紧凑集合使用的降维器，普通集合返回 None
+
+        Args:
+            collection: 集合
+
+        Returns:
+            Optional[EmbeddingReducer]: 降维器
+        """
+        fingerprint = (collection.metadata or {}).get("vector_reducer")
+        if not fingerprint:
+            return None
+        reducer = get_reducer()
+        if reducer.fingerprint != fingerprint:
+            raise RuntimeError(
+                f"集合 {collection.name} 的降维器 ({fingerprint}) 与当前配置 "
+                f"({reducer.fingerprint}) 不一致，需要重建索引"
+            )
+        return reducer
+
     def add_texts(
         self,
         collection_name: str,
         texts: List[str],
         metadatas: Optional[List[Dict[str, Any]]] = None,
         ids: Optional[List[str]] = None,
+        index_profile: Optional[Dict[str, Any]] = None,
+        embeddings: Optional[List[List[float]]] = None,
     ) -> List[str]:
         """
         添加文本到向量数据库
@@ -94,6 +349,8 @@ class VectorStore:
             texts: 文本列表
             metadatas: 元数据列表
             ids: ID 列表
+            index_profile: 集合不存在时，新建集合使用的索引参数
+            embeddings: 已计算好的嵌入向量，为 None 时在此处生成
 
         Returns:
             添加的文档 ID 列表
@@ -106,7 +363,9 @@ class VectorStore:
 
         try:
             # 获取集合
-            collection = self.get_collection(collection_name)
+            collection = self.get_collection(
+                collection_name, index_profile=index_profile
+            )
             logger.info(f"成功获取集合: {collection_name}")
 
             # 如果没有提供 ID，则生成 UUID
@@ -122,22 +381,38 @@ class VectorStore:
                 raise ValueError("元数据数量与文本数量不匹配")
 
             # 获取嵌入向量
-            logger.info("开始生成文本嵌入向量")
-            embeddings = []
-            for i, text in enumerate(texts):
-                try:
-                    embedding = self.get_embedding(text)
-                    embeddings.append(embedding)
-                except Exception as e:
-                    logger.error(f"为文本 {i} 生成嵌入向量时出错: {str(e)}")
-                    raise
-            logger.info(f"成功生成 {len(embeddings)} 个嵌入向量")
+            if embeddings is None:
+                logger.info("开始生成文本嵌入向量")
+                embeddings = self.get_embeddings(texts)
+                logger.info(f"成功生成 {len(embeddings)} 个嵌入向量")
+            elif len(embeddings) != len(texts):
+                raise ValueError("嵌入向量数量与文本数量不匹配")
+
+            # 紧凑集合：HNSW 中保存降维后的向量，全维向量量化为 int8 存入元数据用于精排
+            reducer = self._get_collection_reducer(collection)
+            if reducer is not None:
+                metadatas = [
+                    {
+                        **(metadatas[i] if metadatas else {}),
+                        QUANTIZED_VECTOR_KEY: ScalarQuantizer.encode_str(embedding),
+                    }
+                    for i, embedding in enumerate(embeddings)
+                ]
+                embeddings = reducer.transform(np.asarray(embeddings)).tolist()
 
             # 添加到集合
             logger.info("开始添加文档到向量数据库")
-            collection.add(
-                documents=texts, embeddings=embeddings, metadatas=metadatas, ids=ids
-            )
+            # 按后端允许的批大小分批写入（远程服务时复用同一个 HTTP 连接）
+            batch_size = self.client.max_batch_size
+            for start in range(0, len(ids), batch_size):
+                end = start + batch_size
+                collection.add(
+                    documents=texts[start:end],
+                    embeddings=embeddings[start:end],
+                    metadatas=metadatas[start:end] if metadatas else None,
+                    ids=ids[start:end],
+                )
+            self.client.persist()
 
             logger.info(f"成功向集合 {collection_name} 添加了 {len(texts)} 个文档")
 
@@ -154,7 +429,12 @@ class VectorStore:
         query: str,
         limit: int = 5,
         filter: Optional[Dict[str, Any]] = None,
-    ) -> List[Any]:
+        query_embedding: Optional[List[float]] = None,
+        mmr: bool = False,
+        fetch_k: Optional[int] = None,
+        lambda_mult: Optional[float] = None,
+        max_per_document: Optional[int] = None,
+    ) -> List[SearchResult]:
         """
         搜索向量数据库
 
@@ -163,18 +443,15 @@ class VectorStore:
             query: 查询文本
             limit: 返回结果数量
             filter: 过滤条件
+            query_embedding: 已计算好的查询向量，为空时根据 query 计算
+            mmr: 是否使用最大边际相关性选择多样化的结果
+            fetch_k: MMR 模式下先取回的候选数量
+            lambda_mult: MMR 的相关性权重
+            max_per_document: MMR 模式下每个文档最多返回的分块数
 
         Returns:
             搜索结果列表，每个结果包含文档内容、元数据和相似度分数
         """
-        from dataclasses import dataclass
-
-        @dataclass
-        class SearchResult:
-            page_content: str
-            metadata: Dict[str, Any]
-            score: float
-
         try:
             # 获取集合
             collection = self.get_collection(
@@ -182,20 +459,69 @@ class VectorStore:
             )
 
             # 获取查询文本的嵌入向量
-            query_embedding = self.get_embedding(query)
-
-            # 搜索
-            results = collection.query(
-                query_embeddings=[query_embedding], n_results=limit, where=filter
-            )
+            if query_embedding is None:
+                query_embedding = self.get_embedding(query)
+
+            # 搜索（MMR 模式下多取候选并带回向量）
+            n_results = limit
+            include = ["documents", "metadatas", "distances"]
+            if mmr:
+                n_results = max(fetch_k or settings.MMR_FETCH_K, limit)
+                include.append("embeddings")
+
+            reducer = self._get_collection_reducer(collection)
+
+            # 过滤条件选择性高时先按元数据取出候选，再精确计算距离
+            results = None
+            if filter:
+                results = self._exact_search(
+                    collection, query_embedding, filter, n_results, reducer
+                )
+            if results is None and reducer is not None:
+                # 紧凑集合：在降维索引中多取候选，再用 int8 全维向量精排
+                results = collection.query(
+                    query_embeddings=reducer.transform(query_embedding).tolist(),
+                    n_results=n_results * settings.VECTOR_RESCORE_FACTOR,
+                    where=filter,
+                    include=["documents", "metadatas"],
+                )
+                results = self._rescore(
+                    collection,
+                    query_embedding,
+                    {key: value[0] for key, value in results.items() if value},
+                    n_results,
+                )
+            if results is None:
+                results = collection.query(
+                    query_embeddings=[query_embedding],
+                    n_results=n_results,
+                    where=filter,
+                    include=include,
+                )
 
             # 解析结果
+            ids = results.get("ids", [[]])[0]
             documents = results.get("documents", [[]])[0]
             metadatas = results.get("metadatas", [[]])[0]
             distances = results.get("distances", [[]])[0]
 
-            # 计算相似度分数 (1 - 距离)
-            scores = [1 - distance for distance in distances]
+            # 按集合的距离度量将距离转换为相似度分数
+            space = collection_space(collection)
+            scores = [distance_to_score(space, distance) for distance in distances]
+
+            order = list(range(min(len(documents), limit)))
+            if mmr and documents:
+                embeddings = results.get("embeddings")[0]
+                order = maximal_marginal_relevance(
+                    np.asarray(query_embedding),
+                    np.asarray(embeddings),
+                    k=limit,
+                    lambda_mult=(
+                        settings.MMR_LAMBDA if lambda_mult is None else lambda_mult
+                    ),
+                    group_ids=[(m or {}).get("document_id") for m in metadatas],
+                    max_per_group=max_per_document or settings.MMR_MAX_PER_DOCUMENT,
+                )
 
             logger.info(
                 f"在集合 {collection_name} 中搜索 '{query}' 找到 {len(documents)} 个结果"
@@ -203,12 +529,15 @@ class VectorStore:
 
             # 构建结果列表
             search_results = []
-            for i in range(len(documents)):
+            for i in order:
+                metadata = dict(metadatas[i]) if i < len(metadatas) else {}
+                metadata.pop(QUANTIZED_VECTOR_KEY, None)
                 search_results.append(
                     SearchResult(
                         page_content=documents[i],
-                        metadata=metadatas[i] if i < len(metadatas) else {},
+                        metadata=metadata,
                         score=scores[i] if i < len(scores) else 0.0,
+                        id=ids[i] if i < len(ids) else "",
                     )
                 )
 
@@ -220,6 +549,113 @@ class VectorStore:
             logger.error(f"搜索集合 {collection_name} 时出错: {str(e)}")
             return []
 
+    def _exact_search(
+        self,
+        collection: Any,
+        query_embedding: List[float],
+        where: Dict[str, Any],
+        n_results: int,
+        reducer: Optional[EmbeddingReducer] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        元数据预过滤后的精确检索
+
+        先用元数据索引取出满足条件的分块 ID，数量不超过 VECTOR_EXACT_SEARCH_MAX_CANDIDATES 时
+        只对这些分块计算距离；否则返回 None，由 ANN 检索带过滤条件执行。
+        对小候选集精确计算既更快，也避免了 HNSW 在强过滤下召回不足的问题。
+
+        Args:
+            collection: 集合
+            query_embedding: 查询向量
+            where: 元数据过滤条件
+            n_results: 返回结果数量
+            reducer: 紧凑集合的降维器，此时使用元数据中的 int8 全维向量计算
+
+        Returns:
+            Optional[Dict[str, Any]]: 与 collection.query 格式相同的结果
+        """
+        # 多取一条即可判断是否超过上限，不必取出全部匹配的 ID
+        max_candidates = settings.VECTOR_EXACT_SEARCH_MAX_CANDIDATES
+        candidate_ids = collection.get(
+            where=where, include=[], limit=max_candidates + 1
+        )["ids"]
+        if len(candidate_ids) > max_candidates:
+            return None
+
+        if reducer is not None and candidate_ids:
+            data = collection.get(ids=candidate_ids, include=["documents", "metadatas"])
+            return self._rescore(collection, query_embedding, data, n_results)
+
+        results: Dict[str, Any] = {
+            "ids": [[]],
+            "documents": [[]],
+            "metadatas": [[]],
+            "distances": [[]],
+            "embeddings": [[]],
+        }
+        if not candidate_ids:
+            return results
+
+        data = collection.get(
+            ids=candidate_ids, include=["embeddings", "documents", "metadatas"]
+        )
+        embeddings = np.asarray(data["embeddings"], dtype=np.float32)
+        distances = compute_distances(
+            collection_space(collection),
+            np.asarray(query_embedding, dtype=np.float32),
+            embeddings,
+        )
+        top = np.argsort(distances)[:n_results]
+
+        results["ids"][0] = [data["ids"][i] for i in top]
+        results["documents"][0] = [data["documents"][i] for i in top]
+        results["metadatas"][0] = [data["metadatas"][i] for i in top]
+        results["distances"][0] = [float(distances[i]) for i in top]
+        results["embeddings"][0] = embeddings[top]
+        return results
+
+    def _rescore(
+        self,
+        collection: Any,
+        query_embedding: List[float],
+        candidates: Dict[str, Any],
+        n_results: int,
+    ) -> Dict[str, Any]:
+        """
+        用元数据中的 int8 全维向量对候选重新计算距离并排序
+
+        Args:
+            collection: 集合
+            query_embedding: 全维查询向量
+            candidates: 候选（ids、documents、metadatas 为平铺列表）
+            n_results: 返回结果数量
+
+        Returns:
+            Dict[str, Any]: 与 collection.query 格式相同的结果，embeddings 为反量化后的全维向量
+        """
+        ids = candidates.get("ids") or []
+        if not ids:
+            keys = ("ids", "documents", "metadatas", "distances", "embeddings")
+            return {key: [[]] for key in keys}
+
+        metadatas = candidates["metadatas"]
+        embeddings = np.stack(
+            [ScalarQuantizer.decode_str(m[QUANTIZED_VECTOR_KEY]) for m in metadatas]
+        )
+        distances = compute_distances(
+            collection_space(collection),
+            np.asarray(query_embedding, dtype=np.float32),
+            embeddings,
+        )
+        top = np.argsort(distances)[:n_results]
+        return {
+            "ids": [[ids[i] for i in top]],
+            "documents": [[candidates["documents"][i] for i in top]],
+            "metadatas": [[metadatas[i] for i in top]],
+            "distances": [[float(distances[i]) for i in top]],
+            "embeddings": [embeddings[top]],
+        }
+
     def delete_collection(self, collection_name: str) -> bool:
         """
         删除集合
@@ -234,10 +670,29 @@ class VectorStore:
             self.client.delete_collection(name=collection_name)
             logger.info(f"删除集合 {collection_name}")
             return True
-        except ValueError as e:
+        except (ValueError, CollectionNotFoundError) as e:
             logger.error(f"删除集合 {collection_name} 时出错: {str(e)}")
             return False
 
+    def set_search_ef(self, collection_name: str, search_ef: int) -> bool:
+        """
+        调整集合检索时的 HNSW 候选队列长度（ef），立即对后续检索生效
+
+        Args:
+            collection_name: 集合名称
+            search_ef: 候选队列长度，越大召回越高、延迟越高
+
+        Returns:
+            是否调整成功（集合尚未创建时返回 False）
+        """
+        try:
+            self.client.set_search_ef(collection_name, search_ef)
+            logger.info(f"集合 {collection_name} 的 search_ef 调整为 {search_ef}")
+            return True
+        except (ValueError, CollectionNotFoundError) as e:
+            logger.warning(f"调整集合 {collection_name} 的 search_ef 时出错: {str(e)}")
+            return False
+
     def delete_by_metadata(
         self,
         collection_name: str,
@@ -264,15 +719,8 @@ class VectorStore:
             # 构建过滤条件
             where_filter = {metadata_key: metadata_value}
 
-            # 查询匹配的文档
-            results = collection.query(
-                query_embeddings=None,
-                where=where_filter,
-                include=["documents", "metadatas", "embeddings", "distances", "ids"],
-            )
-
-            # 获取文档ID
-            ids = results.get("ids", [[]])[0]
+            # 通过元数据索引查询匹配的分块 ID
+            ids = collection.get(where=where_filter, include=[])["ids"]
 
             if not ids:
                 logger.warning(
@@ -305,3 +753,21 @@ class VectorStore:
             集合名称
         """
         return f"kb_{knowledge_base_id}"
+
+
+def get_vector_store() -> VectorStore:
+    """
+    获取进程内共享的向量数据库服务
+
+    嵌入模型和索引后端初始化耗时较长，每个进程只初始化一次。
+
+    Returns:
+        VectorStore: 向量数据库服务
+    """
+    global _vector_store
+
+    if _vector_store is None:
+        with _vector_store_lock:
+            if _vector_store is None:
+                _vector_store = VectorStore()
+    return _vector_store
@@ -4,16 +4,19 @@
 文档处理任务
 """
 
+import json
 import logging
 import os
 import tempfile
 import time
-from typing import Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
 
 from celery_app.celery import celery_app
 
 from app.core.config import settings
 from app.db.session import SessionLocal
+from app.modules.chat.services.answer_cache import invalidate_knowledge_base
 from app.modules.knowledge.crud import document as document_crud
 from app.modules.knowledge.crud import document_process_task as task_crud
 from app.modules.knowledge.schemas.knowledge_base import (
@@ -21,30 +24,313 @@ from app.modules.knowledge.schemas.knowledge_base import (
     DocumentProcessTaskUpdate,
     TaskStatus,
 )
-from app.modules.knowledge.services.document_processor import DocumentProcessor
-from app.modules.knowledge.services.minio import MinioService
-from app.modules.knowledge.services.vector_store import VectorStore
+from app.modules.knowledge.services.conversion_cache import ConversionCache
+from app.modules.knowledge.services.document_processor import (
+    LIGHT_FILE_TYPES,
+    TEXT_FILE_TYPES,
+    DocumentProcessor,
+    get_pdf_model_dict,
+    iter_decoded_text,
+)
+from app.modules.knowledge.services.ingest_pipeline import IngestPipeline
+from app.modules.knowledge.services.file_references import release_file
+from app.modules.knowledge.services.minio import MinioService, file_lock
+from app.modules.knowledge.services.upload_sessions import DIRECT_UPLOAD_PREFIX
+from app.modules.knowledge.services.vector_store import (
+    get_vector_store,
+    metadata_timestamp,
+)
+from app.modules.knowledge.tasks.routing import acquire_user_slot, release_user_slot
 
 logger = logging.getLogger(__name__)
 
 
-@celery_app.task(name="process_document")
-def process_document(task_id: int) -> Dict:
+def _link_task_document(db, task, document) -> None:
+    """
+    将任务关联到文档，关联失败不中断处理流程
+
+    Args:
+        db: 数据库会话
+        task: 文档处理任务
+        document: 文档
+    """
+    logger.info(f"开始关联任务 {task.id} 和文档 {document.id}")
+    try:
+        # 直接使用 SQLAlchemy 更新
+        task.document_id = document.id
+        db.commit()
+        db.refresh(task)
+        logger.info(
+            f"使用 SQLAlchemy 直接更新成功，任务 {task.id} 现在关联到文档 {document.id}"
+        )
+
+        # 再次检查关联是否成功
+        updated_task = task_crud.get(db=db, id=task.id)
+        logger.info(
+            f"更新后的任务 {updated_task.id} 关联的文档 ID: {updated_task.document_id}"
+        )
+
+        if updated_task.document_id != document.id:
+            logger.warning("直接更新失败，尝试使用 CRUD 更新")
+            # 如果直接更新失败，尝试使用 CRUD 更新
+            task_crud.update(
+                db=db,
+                db_obj=task,
+                obj_in=DocumentProcessTaskUpdate(document_id=document.id),
+            )
+            logger.info(
+                f"使用 CRUD 更新成功，任务 {task.id} 现在关联到文档 {document.id}"
+            )
+    except Exception as e:
+        logger.error(f"关联任务和文档时出错: {str(e)}")
+        # 继续执行，不要因为关联失败而中断整个处理流程
+
+
+def _discard_document(db, task, document, collection_name: str) -> None:
+    """
+    处理失败时删除已写入索引的分块和文档记录
+
+    Args:
+        db: 数据库会话
+        task: 文档处理任务
+        document: 文档
+        collection_name: 集合名称
+    """
+    try:
+        get_vector_store().delete_by_metadata(
+            collection_name, "document_id", document.id
+        )
+        task.document_id = None
+        db.commit()
+        document_crud.remove(db=db, id=document.id)
+        logger.info(f"已删除处理失败的文档 {document.id}")
+    except Exception as e:
+        db.rollback()
+        logger.error(f"删除处理失败的文档 {document.id} 时出错: {str(e)}")
+
+
+def _adopt_direct_upload(db, task, minio_service: MinioService) -> None:
+    """
+    将客户端直传的文件按内容寻址转存
+
+    直传的文件先落在临时路径，API 不读取文件内容，哈希在这里流式计算。
+    确认（或复制）按内容寻址的文件与更新任务的文件路径在文件锁内完成，
+    期间同一文件的引用释放不会删除它；之后再删除临时对象。
+
+    Args:
+        db: 数据库会话
+        task: 文档处理任务
+        minio_service: MinIO 服务
+
+    Raises:
+        RuntimeError: 无法获取文件锁
+    """
+    if task.file_hash or not task.file_path.startswith(f"{DIRECT_UPLOAD_PREFIX}/"):
+        return
+
+    staging_path = task.file_path
+    file_hash = minio_service.hash_file(staging_path)
+    file_path = MinioService.content_addressed_path(file_hash)
+    with file_lock(file_path) as locked:
+        if not locked:
+            raise RuntimeError(f"无法获取文件锁: {file_path}")
+        if minio_service.file_exists(file_path):
+            logger.info(f"文件内容已存在，跳过复制: {file_path}")
+        else:
+            minio_service.copy_file(staging_path, file_path)
+        task.file_path = file_path
+        task.file_hash = file_hash
+        db.commit()
+    minio_service.delete_file(staging_path)
+    logger.info(f"直传文件已转存: {staging_path} -> {file_path}")
+
+
+def _release_failed_task_file(db, task) -> None:
+    """
+    任务失败且未生成文档时释放其引用的文件
+
+    失败的任务不再计为文件的引用，文件没有其他引用时从 MinIO 中删除。
+
+    Args:
+        db: 数据库会话
+        task: 文档处理任务，可以为 None
+    """
+    if task is None:
+        return
+    try:
+        db.rollback()
+        db.refresh(task)
+        if task.status != TaskStatus.FAILED or task.document_id is not None:
+            return
+        file_path = task.file_path
+    except Exception as e:
+        logger.error(f"读取任务 {task.id} 状态时出错: {str(e)}")
+        return
+    release_file(file_path)
+
+
+@celery_app.task(bind=True, name="process_document", max_retries=None)
+def process_document(self, task_id: int, user_id: Optional[int] = None) -> Dict:
     """
     处理文档任务
 
-    此函数设计为在Celery worker中运行，不会阻塞主应用程序
+    此函数设计为在Celery worker中运行，不会阻塞主应用程序。
+    同一用户同时处理的文档数超过上限时，任务延后重试，把 worker 让给其他用户。
 
     Args:
         task_id: 任务ID
+        user_id: 上传用户 ID，用于按用户限流
 
     Returns:
         处理结果
     """
-    logger.info(f"开始处理文档任务: {task_id}")
+    slot_id = self.request.id or str(task_id)
+    if not acquire_user_slot(user_id, slot_id):
+        logger.info(
+            f"用户 {user_id} 正在处理的文档数已达上限，任务 {task_id} "
+            f"{settings.INGEST_USER_RETRY_DELAY} 秒后重试"
+        )
+        raise self.retry(countdown=settings.INGEST_USER_RETRY_DELAY)
+
+    try:
+        return _process_document(task_id)
+    finally:
+        release_user_slot(user_id, slot_id)
+
+
+def _ingest_segments(
+    db,
+    task,
+    segments: Iterable[str],
+    result: Dict,
+    chunker=None,
+    processing_stats: Optional[Dict] = None,
+    conversion_cache: Optional[str] = None,
+) -> Dict:
+    """
+    创建文档记录，通过流水线完成分块、嵌入和写索引，并更新任务状态
+
+    出错时删除已写入索引的分块和文档记录后抛出异常，任务状态由调用方更新。
+
+    Args:
+        db: 数据库会话
+        task: 文档处理任务（状态已为处理中）
+        segments: 文本片段（惰性产生，迭代它即驱动下载或转换）
+        result: 处理结果，原地更新
+        chunker: 分块函数，默认使用 DocumentProcessor.iter_chunks
+        processing_stats: 转换过程的统计（如 PDF 按页路由情况），转换结束后写入指标
+        conversion_cache: 转换结果缓存的命中情况（hit / miss），写入指标
+
+    Returns:
+        Dict: 处理结果
+    """
+    document = None
+    vector_store = get_vector_store()
+    collection_name = vector_store.get_knowledge_base_collection_name(
+        task.knowledge_base_id
+    )
+    try:
+        # 先创建文档记录（分块元数据需要文档 ID），全文在转换结束后补上
+        logger.info("创建文档记录")
+        document_in = DocumentCreate(
+            title=task.file_name,
+            content="",
+            file_type=task.file_type,
+            file_path=task.file_path,
+        )
+        document = document_crud.create_with_knowledge_base(
+            db=db, obj_in=document_in, knowledge_base_id=task.knowledge_base_id
+        )
+        logger.info(f"文档记录创建成功，ID: {document.id}")
+        _link_task_document(db, task, document)
+
+        # 流水线：转换、分块、嵌入、写索引并行，前面的分块先可检索
+        logger.info(f"开始处理文档: {task.file_path}，向量数据库集合名称: {collection_name}")
+        pipeline = IngestPipeline(
+            vector_store=vector_store,
+            collection_name=collection_name,
+            # document_id、file_type、created_at 用于检索时的预过滤
+            chunk_metadata={
+                "document_id": document.id,
+                "document_title": document.title,
+                "knowledge_base_id": task.knowledge_base_id,
+                "file_type": (document.file_type or "").lower(),
+                "created_at": metadata_timestamp(document.created_at),
+            },
+            index_profile=task.knowledge_base.index_profile,
+        )
+        metrics = pipeline.run(segments, chunker or DocumentProcessor().iter_chunks)
+        if pipeline.first_indexed_at is not None:
+            metrics["first_searchable_after_upload_seconds"] = round(
+                pipeline.first_indexed_at - metadata_timestamp(task.created_at), 3
+            )
+        if processing_stats:
+            metrics["pages"] = dict(processing_stats)
+        if conversion_cache:
+            metrics["conversion_cache"] = conversion_cache
+
+        text = pipeline.text
+        logger.info(f"文档处理完成，文本长度: {len(text)}, 分块数量: {metrics['chunks']}")
+
+        if not text:
+            logger.error("无法从文档中提取文本内容")
+            _discard_document(db, task, document, collection_name)
+            document = None
+            task_crud.update(
+                db=db,
+                db_obj=task,
+                obj_in=DocumentProcessTaskUpdate(
+                    status=TaskStatus.FAILED,
+                    error_message="无法从文档中提取文本内容",
+                ),
+            )
+            result["error"] = "无法从文档中提取文本内容"
+            return result
+
+        document.content = text
+        db.commit()
+
+        if metrics["chunks"]:
+            # 知识库内容已变化，已缓存的回答可能过期
+            invalidate_knowledge_base(task.knowledge_base_id)
+
+        # 更新任务状态为完成，记录流水线指标
+        task_crud.update(
+            db=db,
+            db_obj=task,
+            obj_in=DocumentProcessTaskUpdate(
+                status=TaskStatus.COMPLETED,
+                result=json.dumps(metrics, ensure_ascii=False),
+            ),
+        )
+
+        logger.info(f"文件处理任务完成: {task.file_name}")
+
+        # 设置结果
+        result["success"] = True
+        result["document_id"] = document.id
+        result["metrics"] = metrics
+        return result
+
+    except Exception:
+        # 已写入索引的分块和文档记录不再保留，避免检索到不完整的文档
+        if document is not None:
+            db.rollback()
+            _discard_document(db, task, document, collection_name)
+        raise
 
-    # 添加延迟，避免立即处理，给服务器一些喘息时间
-    time.sleep(1)
+
+def _process_document(task_id: int) -> Dict:
+    """
+    处理文档
+
+    Args:
+        task_id: 任务ID
+
+    Returns:
+        处理结果
+    """
+    logger.info(f"开始处理文档任务: {task_id}")
 
     # 创建新的数据库会话
     db = SessionLocal()
@@ -56,6 +342,7 @@ def process_document(task_id: int) -> Dict:
     result = {"success": False, "task_id": task_id, "document_id": None, "error": None}
 
     temp_file_path = None
+    task = None
 
     try:
         # 获取任务信息
@@ -65,28 +352,6 @@ def process_document(task_id: int) -> Dict:
             result["error"] = "任务不存在"
             return result
 
-        # 记录文件大小信息
-        file_size_mb = 0
-        try:
-            minio_service = MinioService()
-            file_size = minio_service.get_file_size(task.file_path)
-            file_size_mb = file_size / (1024 * 1024)
-            logger.info(f"任务 {task_id} 文件大小: {file_size_mb:.2f} MB")
-
-            # 根据文件大小调整超时时间
-            if file_size_mb > 50:
-                MAX_PROCESSING_TIME = 30 * 60  # 30分钟
-                logger.info(
-                    f"文件较大，调整最大处理时间为 {MAX_PROCESSING_TIME / 60} 分钟"
-                )
-            elif file_size_mb > 20:
-                MAX_PROCESSING_TIME = 20 * 60  # 20分钟
-                logger.info(
-                    f"文件中等大小，调整最大处理时间为 {MAX_PROCESSING_TIME / 60} 分钟"
-                )
-        except Exception as e:
-            logger.warning(f"获取文件大小失败: {str(e)}")
-
         # 更新任务状态为处理中
         task_crud.update(
             db=db,
@@ -95,178 +360,125 @@ def process_document(task_id: int) -> Dict:
         )
 
         try:
-            # 从 MinIO 下载文件
             minio_service = MinioService()
-            file_content = minio_service.download_file(task.file_path)
-
-            if not file_content:
-                logger.error(f"从 MinIO 下载文件失败: {task.file_path}")
-                task_crud.update(
-                    db=db,
-                    db_obj=task,
-                    obj_in=DocumentProcessTaskUpdate(
-                        status=TaskStatus.FAILED,
-                        error_message="从 MinIO 下载文件失败",
-                    ),
+            _adopt_direct_upload(db, task, minio_service)
+
+            # 文本文件：边下载边解码、分块和嵌入，不经过临时文件和 marker
+            if task.file_type.lower() in TEXT_FILE_TYPES:
+                _ingest_segments(
+                    db,
+                    task,
+                    iter_decoded_text(minio_service.iter_file(task.file_path)),
+                    result,
                 )
-                result["error"] = "从 MinIO 下载文件失败"
                 return result
 
-            # 创建临时文件
-            with tempfile.NamedTemporaryFile(
-                delete=False, suffix=f".{task.file_type}"
-            ) as temp_file:
-                temp_file.write(file_content)
-                temp_file_path = temp_file.name
+            # PDF 转换结果按文件哈希缓存，同一文件再次处理时跳过下载和转换
+            use_llm = settings.USE_LLM_FOR_DOCUMENT_PROCESSING
+            conversion_cache = ConversionCache(minio_service, use_llm)
+            cache_conversion = (
+                task.file_type.lower() not in LIGHT_FILE_TYPES and bool(task.file_hash)
+            )
+            if cache_conversion:
+                cached = conversion_cache.get(task.file_hash)
+                if cached is not None:
+                    _ingest_segments(
+                        db,
+                        task,
+                        iter_decoded_text(cached),
+                        result,
+                        conversion_cache="hit",
+                    )
+                    return result
 
+            # 记录文件大小信息
             try:
-                # 处理文档
-                logger.info(f"开始处理文档: {task.file_path}")
-                document_processor = DocumentProcessor(
-                    use_llm=settings.USE_LLM_FOR_DOCUMENT_PROCESSING
-                )
+                file_size = minio_service.get_file_size(task.file_path)
+                file_size_mb = file_size / (1024 * 1024)
+                logger.info(f"任务 {task_id} 文件大小: {file_size_mb:.2f} MB")
 
-                # 检查是否已经超时
-                elapsed_time = time.time() - start_time
-                if (
-                    elapsed_time > MAX_PROCESSING_TIME * 0.1
-                ):  # 如果已经用了10%的时间仅仅是准备工作
-                    logger.warning(
-                        f"准备工作耗时过长: {elapsed_time:.2f}秒，可能会导致整体处理超时"
+                # 根据文件大小调整超时时间
+                if file_size_mb > 50:
+                    MAX_PROCESSING_TIME = 30 * 60  # 30分钟
+                    logger.info(
+                        f"文件较大，调整最大处理时间为 {MAX_PROCESSING_TIME / 60} 分钟"
                     )
-
-                # 处理文件，设置更严格的超时
-                remaining_time = max(
-                    int(MAX_PROCESSING_TIME - elapsed_time), 60
-                )  # 至少给60秒
-                logger.info(f"文件处理剩余时间: {remaining_time}秒")
-
-                # 处理文件
-                text, _, chunks = document_processor.process_file(
-                    temp_file_path, task.file_type, timeout=remaining_time
-                )  # 使用 _ 忽略不需要的 images 变量
-
-                # 再次检查是否超时
-                elapsed_time = time.time() - start_time
-                if elapsed_time > MAX_PROCESSING_TIME * 0.8:  # 如果已经用了80%的时间
-                    logger.warning(
-                        f"文件处理耗时过长: {elapsed_time:.2f}秒，可能会影响后续处理"
+                elif file_size_mb > 20:
+                    MAX_PROCESSING_TIME = 20 * 60  # 20分钟
+                    logger.info(
+                        f"文件中等大小，调整最大处理时间为 {MAX_PROCESSING_TIME / 60} 分钟"
                     )
+            except Exception as e:
+                logger.warning(f"获取文件大小失败: {str(e)}")
 
-                # 检查处理结果
-                if text.startswith("文件处理超时") or text.startswith("处理文件时出错"):
-                    logger.error(f"文件处理失败: {text}")
-                    raise Exception(text)
+            # 下载文件的同时加载文档转换模型（两者分别受限于网络和 CPU）
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                if task.file_type.lower() == "pdf":
+                    executor.submit(get_pdf_model_dict)
 
-                logger.info(
-                    f"文档处理完成，文本长度: {len(text)}, 分块数量: {len(chunks)}"
-                )
+                # 从 MinIO 下载文件
+                file_content = minio_service.download_file(task.file_path)
 
-                if not text:
-                    logger.error("无法从文档中提取文本内容")
+                if not file_content:
+                    logger.error(f"从 MinIO 下载文件失败: {task.file_path}")
                     task_crud.update(
                         db=db,
                         db_obj=task,
                         obj_in=DocumentProcessTaskUpdate(
                             status=TaskStatus.FAILED,
-                            error_message="无法从文档中提取文本内容",
+                            error_message="从 MinIO 下载文件失败",
                         ),
                     )
-                    result["error"] = "无法从文档中提取文本内容"
+                    result["error"] = "从 MinIO 下载文件失败"
                     return result
 
-                # 创建文档记录
-                logger.info("创建文档记录")
-                document_in = DocumentCreate(
-                    title=task.file_name,
-                    content=text,
-                    file_type=task.file_type,
-                    file_path=task.file_path,
+                # 创建临时文件
+                with tempfile.NamedTemporaryFile(
+                    delete=False, suffix=f".{task.file_type}"
+                ) as temp_file:
+                    temp_file.write(file_content)
+                    temp_file_path = temp_file.name
+                del file_content
+
+            # 检查是否已经超时
+            elapsed_time = time.time() - start_time
+            if (
+                elapsed_time > MAX_PROCESSING_TIME * 0.1
+            ):  # 如果已经用了10%的时间仅仅是准备工作
+                logger.warning(
+                    f"准备工作耗时过长: {elapsed_time:.2f}秒，可能会导致整体处理超时"
                 )
-                document = document_crud.create_with_knowledge_base(
-                    db=db, obj_in=document_in, knowledge_base_id=task.knowledge_base_id
-                )
-                logger.info(f"文档记录创建成功，ID: {document.id}")
-
-                # 更新任务，关联文档
-                logger.info(f"开始关联任务 {task.id} 和文档 {document.id}")
-                try:
-                    # 直接使用 SQLAlchemy 更新
-                    task.document_id = document.id
-                    db.commit()
-                    db.refresh(task)
-                    logger.info(
-                        f"使用 SQLAlchemy 直接更新成功，任务 {task.id} 现在关联到文档 {document.id}"
-                    )
 
-                    # 再次检查关联是否成功
-                    updated_task = task_crud.get(db=db, id=task.id)
-                    logger.info(
-                        f"更新后的任务 {updated_task.id} 关联的文档 ID: {updated_task.document_id}"
-                    )
+            # 处理文件，设置更严格的超时
+            remaining_time = max(
+                int(MAX_PROCESSING_TIME - elapsed_time), 60
+            )  # 至少给60秒
+            logger.info(f"文件处理剩余时间: {remaining_time}秒")
 
-                    if updated_task.document_id != document.id:
-                        logger.warning("直接更新失败，尝试使用 CRUD 更新")
-                        # 如果直接更新失败，尝试使用 CRUD 更新
-                        task_crud.update(
-                            db=db,
-                            db_obj=task,
-                            obj_in=DocumentProcessTaskUpdate(document_id=document.id),
-                        )
-                        logger.info(
-                            f"使用 CRUD 更新成功，任务 {task.id} 现在关联到文档 {document.id}"
-                        )
-                except Exception as e:
-                    logger.error(f"关联任务和文档时出错: {str(e)}")
-                    # 继续执行，不要因为关联失败而中断整个处理流程
-
-                # 将文档分块添加到向量数据库
-                if chunks:
-                    logger.info(f"开始将 {len(chunks)} 个分块添加到向量数据库")
-                    vector_store = VectorStore()
-                    collection_name = vector_store.get_knowledge_base_collection_name(
-                        task.knowledge_base_id
-                    )
-                    logger.info(f"向量数据库集合名称: {collection_name}")
-
-                    # 准备元数据
-                    metadatas = [
-                        {
-                            "document_id": document.id,
-                            "document_title": document.title,
-                            "chunk_index": i,
-                            "knowledge_base_id": task.knowledge_base_id,
-                        }
-                        for i in range(len(chunks))
-                    ]
-
-                    # 添加到向量数据库
-                    logger.info("添加文本到向量数据库")
-                    vector_store.add_texts(
-                        collection_name=collection_name,
-                        texts=chunks,
-                        metadatas=metadatas,
-                    )
-                    logger.info("向量数据库添加完成")
-
-                # 更新任务状态为完成
-                task_crud.update(
-                    db=db,
-                    db_obj=task,
-                    obj_in=DocumentProcessTaskUpdate(status=TaskStatus.COMPLETED),
+            document_processor = DocumentProcessor(use_llm=use_llm)
+            segments = document_processor.iter_text(
+                temp_file_path, task.file_type, timeout=remaining_time
+            )
+            if cache_conversion:
+                segments = conversion_cache.cache_segments(
+                    task.file_hash, segments, document_processor.images
                 )
+            _ingest_segments(
+                db,
+                task,
+                segments,
+                result,
+                chunker=document_processor.iter_chunks,
+                processing_stats=document_processor.stats,
+                conversion_cache="miss" if cache_conversion else None,
+            )
 
-                logger.info(f"文件处理任务完成: {task.file_name}")
-
-                # 设置结果
-                result["success"] = True
-                result["document_id"] = document.id
-
-            finally:
-                # 删除临时文件
-                if temp_file_path and os.path.exists(temp_file_path):
-                    os.unlink(temp_file_path)
-                    logger.info(f"临时文件已删除: {temp_file_path}")
+            # 再次检查是否超时
+            elapsed_time = time.time() - start_time
+            if elapsed_time > MAX_PROCESSING_TIME * 0.8:  # 如果已经用了80%的时间
+                logger.warning(
+                    f"文件处理耗时过长: {elapsed_time:.2f}秒，可能会影响后续处理"
+                )
 
         except Exception as e:
             logger.error(f"处理文档时出错: {str(e)}")
@@ -285,6 +497,7 @@ def process_document(task_id: int) -> Dict:
         result["error"] = str(e)
 
     finally:
+        _release_failed_task_file(db, task)
         # 关闭数据库会话
         db.close()
 
@@ -303,3 +516,53 @@ def process_document(task_id: int) -> Dict:
     )
 
     return result
+
+
+def ingest_text_inline(task_id: int, file_content: bytes) -> Dict:
+    """
+    在当前进程内直接处理小文本文件（上传接口调用，不经过 Celery）
+
+    文件内容已在内存中，无需再从 MinIO 下载；失败时任务恢复为待处理，
+    由调用方提交到队列。任务始终计为文件的引用，期间并发的释放不会删除文件。
+
+    Args:
+        task_id: 任务ID
+        file_content: 文件内容
+
+    Returns:
+        处理结果
+    """
+    start_time = time.time()
+    db = SessionLocal()
+    result = {"success": False, "task_id": task_id, "document_id": None, "error": None}
+    try:
+        task = task_crud.get(db=db, id=task_id)
+        if not task:
+            result["error"] = "任务不存在"
+            return result
+        task_crud.update(
+            db=db,
+            db_obj=task,
+            obj_in=DocumentProcessTaskUpdate(status=TaskStatus.PROCESSING),
+        )
+        try:
+            _ingest_segments(db, task, iter_decoded_text([file_content]), result)
+        except Exception as e:
+            logger.error(f"直接处理文本文件时出错: {str(e)}")
+            db.rollback()
+            task_crud.update(
+                db=db,
+                db_obj=task,
+                obj_in=DocumentProcessTaskUpdate(
+                    status=TaskStatus.PENDING, error_message=str(e)
+                ),
+            )
+            result["error"] = str(e)
+    finally:
+        db.close()
+
+    logger.info(
+        f"任务 {task_id} 直接处理完成，总耗时: {time.time() - start_time:.3f}秒，"
+        f"结果: {result['success']}"
+    )
+    return result
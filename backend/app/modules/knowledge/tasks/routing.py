@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文档处理任务的队列路由和按用户限流
+
+按文件类型和大小把任务分到三个队列，worker 可以只订阅其中一部分（celery worker -Q）：
+
+- ingest_fast：文本、Word、PPT、HTML 等不需要版面分析的文件，几秒内完成
+- ingest_standard：普通 PDF，以及较大的轻量文件
+- ingest_heavy：大文件或启用 LLM 增强的 PDF，单个任务可能持续数十分钟
+
+同一用户同时处理的文档数有上限，超出的任务延后重试，避免批量上传独占 worker。
+"""
+
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.modules.knowledge.services.document_processor import LIGHT_FILE_TYPES
+
+logger = logging.getLogger(__name__)
+
+INGEST_QUEUE_FAST = "ingest_fast"
+INGEST_QUEUE_STANDARD = "ingest_standard"
+INGEST_QUEUE_HEAVY = "ingest_heavy"
+INGEST_QUEUES = (INGEST_QUEUE_FAST, INGEST_QUEUE_STANDARD, INGEST_QUEUE_HEAVY)
+
+# 队列内的优先级（Redis broker 中数值越小越先执行）
+INGEST_QUEUE_PRIORITIES = {
+    INGEST_QUEUE_FAST: 0,
+    INGEST_QUEUE_STANDARD: 3,
+    INGEST_QUEUE_HEAVY: 6,
+}
+
+IN_FLIGHT_KEY = "ingest:in_flight:user:{user_id}"
+
+
+def select_ingest_route(file_type: str, file_size: int) -> Dict[str, Any]:
+    """
+    按文件类型和大小选择任务队列
+
+    Args:
+        file_type: 文件类型（不含点号）
+        file_size: 文件大小（字节）
+
+    Returns:
+        Dict[str, Any]: apply_async 的 queue 和 priority 参数
+    """
+    file_type = (file_type or "").lower()
+    heavy = file_size >= settings.INGEST_HEAVY_FILE_SIZE_MB * 1024 * 1024
+
+    if file_type in LIGHT_FILE_TYPES:
+        queue = INGEST_QUEUE_STANDARD if heavy else INGEST_QUEUE_FAST
+    elif heavy or (file_type == "pdf" and settings.USE_LLM_FOR_DOCUMENT_PROCESSING):
+        queue = INGEST_QUEUE_HEAVY
+    else:
+        queue = INGEST_QUEUE_STANDARD
+
+    priority = INGEST_QUEUE_PRIORITIES[queue]
+    # 同一队列中小文件先于大文件
+    if file_size >= settings.INGEST_HEAVY_FILE_SIZE_MB * 1024 * 1024 // 4:
+        priority += 1
+    return {"queue": queue, "priority": priority}
+
+
+def acquire_user_slot(user_id: Optional[int], slot_id: str) -> bool:
+    """
+    为用户占用一个处理名额
+
+    名额在 INGEST_USER_SLOT_TTL 秒后自动过期，worker 异常退出时不会一直占用。
+    Redis 不可用时不限流。
+
+    Args:
+        user_id: 用户 ID，为 None 时不限流
+        slot_id: 名额标识（Celery 任务 ID，重试时不变）
+
+    Returns:
+        bool: 是否占用成功
+    """
+    limit = settings.INGEST_USER_MAX_IN_FLIGHT
+    if user_id is None or limit <= 0:
+        return True
+
+    key = IN_FLIGHT_KEY.format(user_id=user_id)
+    now = time.time()
+    try:
+        redis = get_redis()
+        pipe = redis.pipeline()
+        pipe.zremrangebyscore(key, "-inf", now - settings.INGEST_USER_SLOT_TTL)
+        pipe.zadd(key, {slot_id: now})
+        pipe.zrank(key, slot_id)
+        pipe.expire(key, settings.INGEST_USER_SLOT_TTL)
+        _, _, rank, _ = pipe.execute()
+        # 按占用时间排序，排在上限之外的任务让出名额
+        if rank is not None and rank < limit:
+            return True
+        redis.zrem(key, slot_id)
+        return False
+    except Exception as e:
+        logger.warning(f"检查用户 {user_id} 的处理名额失败，跳过限流: {str(e)}")
+        return True
+
+
+def release_user_slot(user_id: Optional[int], slot_id: str) -> None:
+    """
+    释放用户的处理名额
+
+    Args:
+        user_id: 用户 ID
+        slot_id: 名额标识
+    """
+    if user_id is None or settings.INGEST_USER_MAX_IN_FLIGHT <= 0:
+        return
+    try:
+        get_redis().zrem(IN_FLIGHT_KEY.format(user_id=user_id), slot_id)
+    except Exception as e:
+        logger.warning(f"释放用户 {user_id} 的处理名额失败: {str(e)}")
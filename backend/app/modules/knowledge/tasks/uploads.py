@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分片上传会话和直传临时文件清理任务
+"""
+
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict
+
+from celery_app.celery import celery_app
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.modules.knowledge.crud import document as document_crud
+from app.modules.knowledge.crud import upload_session as upload_session_crud
+from app.modules.knowledge.models.knowledge_base import (
+    UploadSessionStatus,
+    get_now_datetime,
+)
+from app.modules.knowledge.services.minio import MinioService
+from app.modules.knowledge.services.upload_sessions import DIRECT_UPLOAD_PREFIX
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(name="cleanup_upload_sessions")
+def cleanup_upload_sessions(batch_size: int = 100) -> Dict:
+    """
+    清理过期的分片上传会话
+
+    超过有效期仍未完成的会话：取消 MinIO 中的 multipart upload（删除已上传的分片），
+    删除可能残留的合并临时对象（合并后未能完成后续步骤），并将会话标记为已过期。
+    随后删除过期的直传临时文件。
+
+    Args:
+        batch_size: 每批处理的会话数
+
+    Returns:
+        Dict: 清理结果
+    """
+    db = SessionLocal()
+    result = {"expired": 0, "failed": 0, "direct_removed": 0}
+    try:
+        minio_service = None
+        while True:
+            sessions = upload_session_crud.get_expired(
+                db=db, now=get_now_datetime(), limit=batch_size
+            )
+            if not sessions:
+                break
+            if minio_service is None:
+                minio_service = MinioService()
+
+            for upload_session in sessions:
+                if not minio_service.abort_multipart_upload(
+                    upload_session.object_name, upload_session.upload_id
+                ):
+                    # 下次清理时重试
+                    result["failed"] += 1
+                    continue
+                if minio_service.file_exists(upload_session.object_name):
+                    minio_service.delete_file(upload_session.object_name)
+                upload_session.status = UploadSessionStatus.EXPIRED
+                result["expired"] += 1
+            db.commit()
+
+            if len(sessions) < batch_size or result["failed"]:
+                break
+
+        result["direct_removed"] = _cleanup_direct_uploads(db, minio_service)
+    finally:
+        db.close()
+
+    if result["expired"] or result["failed"] or result["direct_removed"]:
+        logger.info(f"清理过期上传会话: {result}")
+    return result
+
+
+def _cleanup_direct_uploads(db, minio_service=None) -> int:
+    """
+    删除过期的直传临时文件
+
+    签发 URL 后客户端未调用完成接口、或处理任务未能转存的文件会留在临时路径；
+    超过 UPLOAD_SESSION_TTL_HOURS 且没有待处理任务引用的文件被删除。
+
+    Args:
+        db: 数据库会话
+        minio_service: MinIO 服务，为空时新建
+
+    Returns:
+        int: 删除的文件数
+    """
+    if minio_service is None:
+        minio_service = MinioService()
+
+    cutoff = datetime.now(timezone.utc) - timedelta(
+        hours=settings.UPLOAD_SESSION_TTL_HOURS
+    )
+    removed = 0
+    for object_name, last_modified in minio_service.list_files(
+        f"{DIRECT_UPLOAD_PREFIX}/"
+    ):
+        if last_modified is None or last_modified > cutoff:
+            continue
+        if document_crud.count_file_references(db=db, file_path=object_name):
+            continue
+        if minio_service.delete_file(object_name):
+            removed += 1
+    return removed
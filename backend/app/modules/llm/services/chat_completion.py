@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+OpenAI 兼容的对话补全服务
+"""
+
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from app.core.config import settings
+from app.modules.llm.models.llm_config import LLMConfig
+from app.modules.llm.services.provider_pool import LLMServiceError, llm_client_pool
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LLMEndpoint:
+    """一次 LLM 调用所需的连接信息与模型参数"""
+
+    api_base: str
+    api_key: str
+    model: str
+    parameters: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_config(cls, llm_config: Optional[LLMConfig]) -> "LLMEndpoint":
+        """
+        从 LLM 配置构建调用信息，未配置时使用系统默认模型
+
+        Args:
+            llm_config: LLM 配置
+
+        Returns:
+            LLMEndpoint: 调用信息
+        """
+        if llm_config is None:
+            return cls(
+                api_base=settings.OPENAI_API_BASE,
+                api_key=settings.OPENAI_API_KEY,
+                model=settings.OPENAI_MODEL,
+            )
+
+        parameters: Dict[str, Any] = {}
+        if llm_config.parameters:
+            try:
+                parameters = json.loads(llm_config.parameters)
+            except ValueError:
+                logger.warning(f"LLM 配置 {llm_config.id} 的参数不是合法的 JSON，已忽略")
+
+        return cls(
+            api_base=llm_config.api_base or settings.OPENAI_API_BASE,
+            api_key=llm_config.api_key,
+            model=llm_config.model,
+            parameters=parameters,
+        )
+
+    @property
+    def completions_url(self) -> str:
+        """对话补全接口地址"""
+        return f"{self.api_base.rstrip('/')}/chat/completions"
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        """请求头"""
+        return {"Authorization": f"Bearer {self.api_key}"}
+
+
+async def stream_chat_completion(
+    endpoint: LLMEndpoint, messages: List[Dict[str, str]]
+) -> AsyncIterator[str]:
+    """
+    流式调用对话补全接口，逐段返回生成的文本
+
+    Args:
+        endpoint: 调用信息
+        messages: 对话消息列表
+
+    Yields:
+        str: 增量文本
+
+    Raises:
+        LLMServiceError: 接口返回错误
+    """
+    payload = {
+        **endpoint.parameters,
+        "model": endpoint.model,
+        "messages": messages,
+        "stream": True,
+    }
+
+    # 复用同一提供商的长连接客户端，避免每次请求重新握手
+    client = llm_client_pool.get(endpoint.api_base, endpoint.api_key)
+    async with client.stream(
+        endpoint.completions_url, payload, endpoint.headers
+    ) as response:
+        if response.status_code != 200:
+            body = await response.aread()
+            raise LLMServiceError(
+                f"LLM 接口返回错误 {response.status_code}: {body[:500]!r}"
+            )
+
+        done = False
+        async for line in response.aiter_lines():
+            # SSE 格式: "data: {...}"，以 "data: [DONE]" 结束；
+            # 收到 [DONE] 后仍读完响应体，连接才能放回连接池复用
+            if done or not line.startswith("data:"):
+                continue
+            data = line[len("data:") :].strip()
+            if data == "[DONE]":
+                done = True
+                continue
+            try:
+                chunk = json.loads(data)
+            except ValueError:
+                logger.warning(f"无法解析 LLM 流式响应: {data[:200]}")
+                continue
+            for choice in chunk.get("choices", []):
+                content = (choice.get("delta") or {}).get("content")
+                if content:
+                    yield content
+
+
+async def create_chat_completion(
+    endpoint: LLMEndpoint, messages: List[Dict[str, str]], **parameters: Any
+) -> str:
+    """
+    非流式调用对话补全接口
+
+    Args:
+        endpoint: 调用信息
+        messages: 对话消息列表
+        parameters: 覆盖配置中的模型参数（如 max_tokens）
+
+    Returns:
+        str: 生成的文本
+
+    Raises:
+        LLMServiceError: 接口返回错误
+    """
+    payload = {
+        **endpoint.parameters,
+        **parameters,
+        "model": endpoint.model,
+        "messages": messages,
+        "stream": False,
+    }
+    client = llm_client_pool.get(endpoint.api_base, endpoint.api_key)
+    response = await client.post(endpoint.completions_url, payload, endpoint.headers)
+    if response.status_code != 200:
+        raise LLMServiceError(
+            f"LLM 接口返回错误 {response.status_code}: {response.text[:500]}"
+        )
+    choices = response.json().get("choices") or [{}]
+    return (choices[0].get("message") or {}).get("content") or ""
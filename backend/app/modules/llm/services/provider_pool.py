@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LLM 提供商 HTTP 客户端连接池
+
+按 (api_base, api_key) 复用长连接的异步 HTTP/2 客户端，并提供并发限制、
+带抖动的指数退避重试、熔断以及连接复用指标。
+"""
+
+import asyncio
+import hashlib
+import importlib.util
+import logging
+import random
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Set, Tuple
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 未安装 h2 时退回 HTTP/1.1 keep-alive
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# 可以重试的响应状态码
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class LLMServiceError(Exception):
+    """LLM 服务调用失败"""
+
+
+class CircuitOpenError(LLMServiceError):
+    """熔断器处于打开状态，请求被直接拒绝"""
+
+
+class CircuitBreaker:
+    """
+    熔断器
+
+    连续失败达到阈值后打开，拒绝请求；冷却时间过后进入半开状态，
+    放行一个探测请求，成功则关闭，失败则重新打开。探测请求超过冷却时间仍未有结果时
+    放行新的探测请求。
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_started_at = 0.0
+        self.open_count = 0
+
+    def allow_request(self) -> bool:
+        """
+        判断是否放行请求
+
+        Returns:
+            bool: 是否放行
+        """
+        if self.state == self.CLOSED:
+            return True
+        now = time.monotonic()
+        if self.state == self.OPEN:
+            if now - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self.probe_started_at = now
+                return True
+            return False
+        # 半开状态下只放行一个探测请求；探测请求迟迟没有结果时再放行一个
+        if now - self.probe_started_at >= self.reset_timeout:
+            self.probe_started_at = now
+            return True
+        return False
+
+    def record_success(self) -> None:
+        """记录一次成功请求"""
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+
+    def record_failure(self) -> None:
+        """记录一次失败请求"""
+        self.consecutive_failures += 1
+        if (
+            self.state == self.HALF_OPEN
+            or self.consecutive_failures >= self.failure_threshold
+        ):
+            if self.state != self.OPEN:
+                self.open_count += 1
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+class ProviderClient:
+    """单个 (api_base, api_key) 对应的持久化客户端"""
+
+    def __init__(self, api_base: str, label: str):
+        """
+        初始化客户端
+
+        Args:
+            api_base: 接口地址
+            label: 用于日志和指标的标识（不含密钥明文）
+        """
+        self.api_base = api_base
+        self.label = label
+        self.client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(
+                max_connections=settings.LLM_MAX_CONNECTIONS_PER_PROVIDER,
+                max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(
+                settings.DASHSCOPE_TIMEOUT, connect=settings.LLM_CONNECT_TIMEOUT
+            ),
+        )
+        self.semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY_PER_PROVIDER)
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.LLM_CIRCUIT_FAILURE_THRESHOLD,
+            reset_timeout=settings.LLM_CIRCUIT_RESET_TIMEOUT,
+        )
+
+        # 指标
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.rejected = 0
+        self.connections_opened = 0
+        self.in_flight = 0
+
+    async def _trace(self, event_name: str, info: Dict[str, Any]) -> None:
+        # httpcore 在新建 TCP 连接时触发该事件，复用连接时不会触发
+        if event_name == "connection.connect_tcp.complete":
+            self.connections_opened += 1
+
+    @staticmethod
+    def _backoff(attempt: int, retry_after: Optional[str] = None) -> float:
+        """
+        计算重试等待时间：优先使用 Retry-After，否则为带完全抖动的指数退避
+
+        Args:
+            attempt: 已失败次数（从 0 开始）
+            retry_after: 响应中的 Retry-After 头
+
+        Returns:
+            float: 等待秒数
+        """
+        if retry_after:
+            try:
+                return min(float(retry_after), settings.LLM_RETRY_BACKOFF_MAX)
+            except ValueError:
+                pass
+        ceiling = min(
+            settings.LLM_RETRY_BACKOFF_MAX,
+            settings.LLM_RETRY_BACKOFF_BASE * (2**attempt),
+        )
+        return random.uniform(0, ceiling)
+
+    async def _send(
+        self, url: str, payload: Dict[str, Any], headers: Dict[str, str], stream: bool
+    ) -> httpx.Response:
+        """
+        发送请求，对连接错误和可重试状态码进行重试
+
+        只在收到响应头之前重试；流式响应开始输出后不再重试。
+
+        Args:
+            url: 请求地址
+            payload: 请求体
+            headers: 请求头
+            stream: 是否以流式方式读取响应
+
+        Returns:
+            httpx.Response: 响应（状态码可能为不可重试的 4xx）
+
+        Raises:
+            CircuitOpenError: 熔断器打开
+            LLMServiceError: 重试耗尽
+        """
+        max_retries = settings.DASHSCOPE_MAX_RETRIES
+        attempt = 0
+        while True:
+            if not self.breaker.allow_request():
+                self.rejected += 1
+                raise CircuitOpenError(f"LLM 提供商 {self.label} 暂时不可用（熔断中）")
+
+            retry_after = None
+            request = self.client.build_request(
+                "POST", url, json=payload, headers=headers, extensions={"trace": self._trace}
+            )
+            try:
+                response = await self.client.send(request, stream=stream)
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    # 不重试的 5xx（如 501）同样计为失败
+                    if response.status_code < 500:
+                        self.breaker.record_success()
+                    else:
+                        self.breaker.record_failure()
+                    return response
+                retry_after = response.headers.get("retry-after")
+                body = await response.aread()
+                await response.aclose()
+                error = LLMServiceError(
+                    f"LLM 提供商 {self.label} 返回错误 {response.status_code}: {body[:500]!r}"
+                )
+            except httpx.TransportError as e:
+                error = LLMServiceError(f"请求 LLM 提供商 {self.label} 失败: {e!r}")
+            except BaseException as e:
+                # 其他异常计为失败；请求被取消（如客户端断开）不代表提供商故障，
+                # 只在探测请求被取消时重新打开，避免熔断器停留在半开状态
+                if (
+                    isinstance(e, Exception)
+                    or self.breaker.state == CircuitBreaker.HALF_OPEN
+                ):
+                    self.breaker.record_failure()
+                raise
+
+            self.breaker.record_failure()
+            if attempt >= max_retries:
+                self.failures += 1
+                raise error
+
+            delay = self._backoff(attempt, retry_after)
+            self.retries += 1
+            logger.warning(f"{error}，{delay:.2f} 秒后第 {attempt + 1} 次重试")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    @asynccontextmanager
+    async def stream(
+        self, url: str, payload: Dict[str, Any], headers: Dict[str, str]
+    ) -> AsyncIterator[httpx.Response]:
+        """
+        发起流式请求，在并发限制内执行
+
+        Args:
+            url: 请求地址
+            payload: 请求体
+            headers: 请求头
+
+        Yields:
+            httpx.Response: 流式响应
+        """
+        async with self.semaphore:
+            self.requests += 1
+            self.in_flight += 1
+            try:
+                response = await self._send(url, payload, headers, stream=True)
+                try:
+                    yield response
+                finally:
+                    await response.aclose()
+            finally:
+                self.in_flight -= 1
+
+    async def post(
+        self, url: str, payload: Dict[str, Any], headers: Dict[str, str]
+    ) -> httpx.Response:
+        """
+        发起普通请求，在并发限制内执行
+
+        Args:
+            url: 请求地址
+            payload: 请求体
+            headers: 请求头
+
+        Returns:
+            httpx.Response: 已读取完毕的响应
+        """
+        async with self.semaphore:
+            self.requests += 1
+            self.in_flight += 1
+            try:
+                return await self._send(url, payload, headers, stream=False)
+            finally:
+                self.in_flight -= 1
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        获取客户端指标
+
+        Returns:
+            Dict[str, Any]: 指标
+        """
+        return {
+            "api_base": self.api_base,
+            "client": self.label,
+            "http2": HTTP2_AVAILABLE,
+            "requests": self.requests,
+            "in_flight": self.in_flight,
+            "connections_opened": self.connections_opened,
+            "connections_reused": max(self.requests - self.connections_opened, 0),
+            "retries": self.retries,
+            "failures": self.failures,
+            "rejected_by_circuit": self.rejected,
+            "circuit_state": self.breaker.state,
+            "circuit_open_count": self.breaker.open_count,
+        }
+
+    async def close(self) -> None:
+        """关闭客户端及其连接"""
+        await self.client.aclose()
+
+
+class LLMClientPool:
+    """按 (api_base, api_key) 缓存 ProviderClient 的连接池"""
+
+    def __init__(self, max_size: Optional[int] = None):
+        self.max_size = max_size or settings.LLM_CLIENT_POOL_MAX_SIZE
+        self._clients: "OrderedDict[Tuple[str, str], ProviderClient]" = OrderedDict()
+        self.evicted = 0
+        # 被淘汰的客户端的关闭任务，保留引用避免任务在完成前被回收
+        self._closing: Set[asyncio.Task] = set()
+
+    def get(self, api_base: str, api_key: str) -> ProviderClient:
+        """
+        获取（或创建）对应的客户端
+
+        Args:
+            api_base: 接口地址
+            api_key: API 密钥
+
+        Returns:
+            ProviderClient: 客户端
+        """
+        key = (api_base.rstrip("/"), api_key)
+        client = self._clients.get(key)
+        if client is not None:
+            self._clients.move_to_end(key)
+            return client
+
+        key_hash = hashlib.sha256(api_key.encode()).hexdigest()[:8]
+        client = ProviderClient(api_base=key[0], label=f"{key[0]}#{key_hash}")
+        self._clients[key] = client
+        logger.info(f"创建 LLM 客户端: {client.label}")
+
+        # 超出容量时淘汰最久未使用且空闲的客户端
+        if len(self._clients) > self.max_size:
+            for old_key, old_client in list(self._clients.items()):
+                if old_client.in_flight == 0 and old_key != key:
+                    del self._clients[old_key]
+                    self.evicted += 1
+                    task = asyncio.get_running_loop().create_task(old_client.close())
+                    self._closing.add(task)
+                    task.add_done_callback(self._closing.discard)
+                    break
+        return client
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        获取连接池指标
+
+        Returns:
+            Dict[str, Any]: 指标
+        """
+        return {
+            "clients": len(self._clients),
+            "evicted": self.evicted,
+            "providers": [client.metrics() for client in self._clients.values()],
+        }
+
+    async def close(self) -> None:
+        """关闭所有客户端，并等待被淘汰的客户端关闭完成"""
+        clients = list(self._clients.values())
+        self._clients.clear()
+        await asyncio.gather(
+            *(client.close() for client in clients), *list(self._closing)
+        )
+
+
+# 进程内共享的连接池
+llm_client_pool = LLMClientPool()
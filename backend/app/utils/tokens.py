@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Token 计数工具
+"""
+
+from functools import lru_cache
+
+import tiktoken
+
+# 通用的 BPE 编码，用于估算 OpenAI 兼容模型的 prompt 长度
+DEFAULT_ENCODING = "cl100k_base"
+
+
+@lru_cache(maxsize=4)
+def get_tokenizer(encoding_name: str = DEFAULT_ENCODING) -> tiktoken.Encoding:
+    """
+    获取分词器（进程内缓存，只加载一次）
+
+    Args:
+        encoding_name: 编码名称
+
+    Returns:
+        tiktoken.Encoding: 分词器
+    """
+    return tiktoken.get_encoding(encoding_name)
+
+
+def count_tokens(text: str) -> int:
+    """
+    计算文本的 token 数
+
+    Args:
+        text: 输入文本
+
+    Returns:
+        int: token 数
+    """
+    if not text:
+        return 0
+    return len(get_tokenizer().encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    将文本截断到指定 token 数以内
+
+    Args:
+        text: 输入文本
+        max_tokens: 最大 token 数
+
+    Returns:
+        str: 截断后的文本
+    """
+    if max_tokens <= 0:
+        return ""
+    tokenizer = get_tokenizer()
+    tokens = tokenizer.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return tokenizer.decode(tokens[:max_tokens])
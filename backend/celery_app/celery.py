@@ -5,7 +5,15 @@ Celery 配置
 """
 
 from app.core.config import settings
+from app.db.session import configure_worker_engine
+from app.modules.knowledge.tasks.routing import (
+    INGEST_QUEUE_FAST,
+    INGEST_QUEUE_STANDARD,
+    INGEST_QUEUES,
+)
 from celery import Celery
+from celery.signals import worker_init, worker_process_init
+from kombu import Queue
 
 # 创建 Celery 实例
 celery_app = Celery(
@@ -14,6 +22,7 @@ celery_app = Celery(
     backend=settings.CELERY_RESULT_BACKEND,
     include=[
         "app.modules.knowledge.tasks.document_processing",
+        "app.modules.knowledge.tasks.uploads",
     ],
 )
 
@@ -27,7 +36,39 @@ celery_app.conf.update(
     worker_max_tasks_per_child=1000,
     task_acks_late=True,
     worker_prefetch_multiplier=1,
+    # 文档处理任务按文件类型和大小投递到不同队列（见 routing.select_ingest_route），
+    # worker 通过 -Q 选择订阅的队列；未指定队列的任务进入 standard 队列
+    task_queues=[Queue(name) for name in INGEST_QUEUES],
+    task_default_queue=INGEST_QUEUE_STANDARD,
+    # Redis broker 按优先级拆分列表，数值越小越先被取走
+    broker_transport_options={
+        "priority_steps": list(range(10)),
+        "queue_order_strategy": "priority",
+    },
+    # 定时任务（worker 以 -B 启动时运行）
+    beat_schedule={
+        "cleanup-upload-sessions": {
+            "task": "cleanup_upload_sessions",
+            "schedule": settings.UPLOAD_SESSION_CLEANUP_INTERVAL,
+            "options": {"queue": INGEST_QUEUE_FAST},
+        },
+    },
 )
 
 # 自动发现任务
 celery_app.autodiscover_tasks()
+
+
+@worker_init.connect
+@worker_process_init.connect
+def init_worker_db(**kwargs):
+    """worker 启动（以及 prefork 子进程启动）时使用 worker 专用的数据库连接池"""
+    configure_worker_engine()
+
+
+@worker_process_init.connect
+def reset_worker_minio_client(**kwargs):
+    """prefork 子进程不复用父进程的 MinIO 连接，首次使用时在子进程内重新创建"""
+    from app.modules.knowledge.services.minio import reset_minio_client
+
+    reset_minio_client()
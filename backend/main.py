@@ -5,20 +5,28 @@
 """
 
 import uvicorn
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from sqlalchemy.exc import OperationalError
 
 from app.core.config import settings
 from app.core.logging import setup_logging
 from app.core.middleware import setup_middlewares
 from app.db.base_class import Base
-from app.db.session import engine
+from app.db.monitoring import get_pool_metrics
+from app.db.session import async_engine, engine
+from app.modules.auth.api.deps import get_current_active_superuser
 
 # 导入各模块的路由
 from app.modules.auth.api.routes import router as auth_router
 from app.modules.chat.api.routes import router as chat_router
+from app.modules.chat.services.answer_cache import answer_cache
 from app.modules.knowledge.api.routes import router as knowledge_router
+from app.modules.knowledge.services.minio import (
+    get_minio_client,
+    get_minio_pool_metrics,
+)
 from app.modules.llm.api.routes import router as llm_router
+from app.modules.llm.services.provider_pool import llm_client_pool
 
 # 设置日志
 logger = setup_logging()
@@ -35,6 +43,16 @@ except OperationalError as e:
 
     sys.exit(1)
 
+# 创建共享的 MinIO 客户端并检查存储桶，之后的对象操作不再检查
+try:
+    get_minio_client()
+except Exception as e:
+    logger.error(f"MinIO 服务不可用: {e}")
+    logger.error("MinIO 是应用的核心依赖，请确保 MinIO 服务已启动并且配置正确")
+    import sys
+
+    sys.exit(1)
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
     description=settings.PROJECT_DESCRIPTION,
@@ -57,10 +75,35 @@ app.include_router(
 app.include_router(llm_router, prefix=f"{settings.API_V1_STR}/llm", tags=["LLM配置"])
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """关闭异步数据库连接池和 LLM 客户端连接"""
+    await llm_client_pool.close()
+    await async_engine.dispose()
+
+
 @app.get("/")
 async def root():
     return {"message": "欢迎使用智能体综合应用平台 API"}
 
 
+@app.get(
+    f"{settings.API_V1_STR}/metrics",
+    tags=["监控"],
+    dependencies=[Depends(get_current_active_superuser)],
+)
+def read_metrics():
+    """
+    获取运行时指标（仅超级用户，指标中包含模型接口地址等内部信息）
+    """
+    return {
+        "db_pool": get_pool_metrics(engine),
+        "async_db_pool": get_pool_metrics(async_engine.sync_engine),
+        "llm_clients": llm_client_pool.metrics(),
+        "minio_pool": get_minio_pool_metrics(),
+        "answer_cache": answer_cache.metrics(),
+    }
+
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+更新 conversation / message 表结构：
+添加滚动摘要列 summary、summary_message_id，并为 message.conversation_id 添加索引
+"""
+
+import sys
+import os
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, text
+from app.core.config import settings
+
+
+def column_exists(conn, table_name: str, column_name: str) -> bool:
+    """检查列是否存在"""
+    result = conn.execute(text(
+        "SELECT COUNT(*) FROM information_schema.columns "
+        "WHERE table_schema = DATABASE() AND table_name = :table_name "
+        "AND column_name = :column_name"
+    ), {"table_name": table_name, "column_name": column_name})
+    return result.scalar() > 0
+
+
+def index_exists(conn, table_name: str, index_name: str) -> bool:
+    """检查索引是否存在"""
+    result = conn.execute(text(
+        "SELECT COUNT(*) FROM information_schema.statistics "
+        "WHERE table_schema = DATABASE() AND table_name = :table_name "
+        "AND index_name = :index_name"
+    ), {"table_name": table_name, "index_name": index_name})
+    return result.scalar() > 0
+
+
+def add_conversation_summary_columns():
+    """添加对话摘要列和消息索引"""
+    # 创建数据库连接
+    engine = create_engine(settings.SQLALCHEMY_DATABASE_URI)
+
+    # 连接数据库
+    with engine.connect() as conn:
+        # 开始事务
+        trans = conn.begin()
+        try:
+            if column_exists(conn, "conversation", "summary"):
+                print("列 summary 已存在，无需添加")
+            else:
+                conn.execute(text(
+                    "ALTER TABLE conversation "
+                    "ADD COLUMN summary TEXT NULL, "
+                    "ADD COLUMN summary_message_id INT NULL"
+                ))
+                print("已添加 summary、summary_message_id 列")
+
+            if index_exists(conn, "message", "ix_message_conversation_id"):
+                print("索引 ix_message_conversation_id 已存在，无需添加")
+            else:
+                conn.execute(text(
+                    "CREATE INDEX ix_message_conversation_id "
+                    "ON message (conversation_id)"
+                ))
+                print("已添加索引 ix_message_conversation_id")
+
+            # 提交事务
+            trans.commit()
+            print("表 conversation、message 更新完成")
+
+        except Exception as e:
+            # 回滚事务
+            trans.rollback()
+            print(f"更新表结构时出错: {str(e)}")
+            raise
+
+
+if __name__ == "__main__":
+    add_conversation_summary_columns()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+更新 document_process_task 表结构：
+添加客户端直传临时路径列 direct_upload_path 及唯一索引
+
+处理任务开始后 file_path 会改为按内容寻址的路径，重复完成直传时按该列查找已创建的任务。
+"""
+
+import os
+import sys
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import create_engine, text
+
+from app.core.config import settings
+
+
+def column_exists(conn, table_name: str, column_name: str) -> bool:
+    """检查列是否存在"""
+    result = conn.execute(
+        text(
+            "SELECT COUNT(*) FROM information_schema.columns "
+            "WHERE table_schema = DATABASE() AND table_name = :table_name "
+            "AND column_name = :column_name"
+        ),
+        {"table_name": table_name, "column_name": column_name},
+    )
+    return result.scalar() > 0
+
+
+def add_direct_upload_path_column():
+    """添加 direct_upload_path 列和唯一索引"""
+    engine = create_engine(settings.SQLALCHEMY_DATABASE_URI)
+
+    with engine.connect() as conn:
+        trans = conn.begin()
+        try:
+            if column_exists(conn, "document_process_task", "direct_upload_path"):
+                print("direct_upload_path 列已存在，无需添加")
+            else:
+                conn.execute(
+                    text(
+                        "ALTER TABLE document_process_task "
+                        "ADD COLUMN direct_upload_path VARCHAR(512) NULL, "
+                        "ADD UNIQUE INDEX direct_upload_path (direct_upload_path)"
+                    )
+                )
+                print("已添加 direct_upload_path 列和唯一索引")
+
+            trans.commit()
+            print("表 document_process_task 更新完成")
+
+        except Exception as e:
+            trans.rollback()
+            print(f"更新表结构时出错: {str(e)}")
+            raise
+
+
+if __name__ == "__main__":
+    add_direct_upload_path_column()
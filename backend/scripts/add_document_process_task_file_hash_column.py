@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+更新 document_process_task 表结构：
+添加文件内容哈希列 file_hash（SHA-256）及索引，可选地为已有任务回填哈希
+
+用法：
+    python scripts/add_document_process_task_file_hash_column.py
+    python scripts/add_document_process_task_file_hash_column.py --backfill
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import create_engine, text
+
+from app.core.config import settings
+
+
+def column_exists(conn, table_name: str, column_name: str) -> bool:
+    """检查列是否存在"""
+    result = conn.execute(
+        text(
+            "SELECT COUNT(*) FROM information_schema.columns "
+            "WHERE table_schema = DATABASE() AND table_name = :table_name "
+            "AND column_name = :column_name"
+        ),
+        {"table_name": table_name, "column_name": column_name},
+    )
+    return result.scalar() > 0
+
+
+def add_file_hash_column(engine) -> None:
+    """添加 file_hash 列和索引"""
+    with engine.connect() as conn:
+        trans = conn.begin()
+        try:
+            if column_exists(conn, "document_process_task", "file_hash"):
+                print("file_hash 列已存在，无需添加")
+            else:
+                conn.execute(
+                    text(
+                        "ALTER TABLE document_process_task "
+                        "ADD COLUMN file_hash VARCHAR(64) NULL, "
+                        "ADD INDEX ix_document_process_task_file_hash (file_hash)"
+                    )
+                )
+                print("已添加 file_hash 列和索引")
+            trans.commit()
+        except Exception as e:
+            trans.rollback()
+            print(f"更新表结构时出错: {str(e)}")
+            raise
+
+
+def backfill_file_hashes(engine) -> None:
+    """从 MinIO 流式读取已有任务的文件，回填 file_hash"""
+    from app.modules.knowledge.services.minio import MinioService
+
+    minio_service = MinioService()
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text(
+                "SELECT id, file_path FROM document_process_task "
+                "WHERE file_hash IS NULL"
+            )
+        ).fetchall()
+        print(f"需要回填哈希的任务: {len(rows)} 个")
+
+        updated = 0
+        for task_id, file_path in rows:
+            try:
+                digest = hashlib.sha256()
+                for block in minio_service.iter_file(file_path):
+                    digest.update(block)
+            except Exception as e:
+                print(f"读取任务 {task_id} 的文件 {file_path} 失败，跳过: {str(e)}")
+                continue
+            conn.execute(
+                text("UPDATE document_process_task SET file_hash = :hash WHERE id = :id"),
+                {"hash": digest.hexdigest(), "id": task_id},
+            )
+            conn.commit()
+            updated += 1
+        print(f"已回填 {updated} 个任务的文件哈希")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="添加 document_process_task.file_hash 列")
+    parser.add_argument(
+        "--backfill", action="store_true", help="为已有任务计算并回填文件哈希"
+    )
+    args = parser.parse_args()
+
+    engine = create_engine(settings.SQLALCHEMY_DATABASE_URI)
+    add_file_hash_column(engine)
+    if args.backfill:
+        backfill_file_hashes(engine)
+    print("表 document_process_task 更新完成")
+
+
+if __name__ == "__main__":
+    main()
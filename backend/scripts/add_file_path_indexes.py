@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+为 document.file_path 和 document_process_task.file_path 添加索引
+
+文件按内容寻址存储后，删除文档时需要按 file_path 统计引用数，
+决定是否从 MinIO 中删除文件。
+"""
+
+import os
+import sys
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import create_engine, text
+
+from app.core.config import settings
+
+INDEXES = {
+    "document": "ix_document_file_path",
+    "document_process_task": "ix_document_process_task_file_path",
+}
+
+
+def index_exists(conn, table_name: str, index_name: str) -> bool:
+    """检查索引是否存在"""
+    result = conn.execute(
+        text(
+            "SELECT COUNT(*) FROM information_schema.statistics "
+            "WHERE table_schema = DATABASE() AND table_name = :table_name "
+            "AND index_name = :index_name"
+        ),
+        {"table_name": table_name, "index_name": index_name},
+    )
+    return result.scalar() > 0
+
+
+def add_file_path_indexes():
+    """添加 file_path 索引"""
+    engine = create_engine(settings.SQLALCHEMY_DATABASE_URI)
+
+    with engine.connect() as conn:
+        trans = conn.begin()
+        try:
+            for table_name, index_name in INDEXES.items():
+                if index_exists(conn, table_name, index_name):
+                    print(f"索引 {index_name} 已存在，无需添加")
+                    continue
+                conn.execute(
+                    text(f"CREATE INDEX {index_name} ON {table_name} (file_path)")
+                )
+                print(f"已添加索引 {index_name}")
+
+            trans.commit()
+            print("file_path 索引更新完成")
+
+        except Exception as e:
+            trans.rollback()
+            print(f"更新索引时出错: {str(e)}")
+            raise
+
+
+if __name__ == "__main__":
+    add_file_path_indexes()
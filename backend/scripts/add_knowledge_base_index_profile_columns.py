@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+更新 knowledge_base 表结构：
+添加向量索引参数列 index_space、hnsw_m、hnsw_construction_ef、hnsw_search_ef
+"""
+
+import sys
+import os
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, text
+from app.core.config import settings
+
+
+def column_exists(conn, table_name: str, column_name: str) -> bool:
+    """检查列是否存在"""
+    result = conn.execute(text(
+        "SELECT COUNT(*) FROM information_schema.columns "
+        "WHERE table_schema = DATABASE() AND table_name = :table_name "
+        "AND column_name = :column_name"
+    ), {"table_name": table_name, "column_name": column_name})
+    return result.scalar() > 0
+
+
+def add_knowledge_base_index_profile_columns():
+    """添加知识库的向量索引参数列"""
+    # 创建数据库连接
+    engine = create_engine(settings.SQLALCHEMY_DATABASE_URI)
+
+    # 连接数据库
+    with engine.connect() as conn:
+        # 开始事务
+        trans = conn.begin()
+        try:
+            if column_exists(conn, "knowledge_base", "index_space"):
+                print("索引参数列已存在，无需添加")
+            else:
+                conn.execute(text(
+                    "ALTER TABLE knowledge_base "
+                    "ADD COLUMN index_space VARCHAR(16) NULL, "
+                    "ADD COLUMN hnsw_m INT NULL, "
+                    "ADD COLUMN hnsw_construction_ef INT NULL, "
+                    "ADD COLUMN hnsw_search_ef INT NULL"
+                ))
+                print("已添加 index_space、hnsw_m、hnsw_construction_ef、hnsw_search_ef 列")
+
+            # 提交事务
+            trans.commit()
+            print("表 knowledge_base 更新完成")
+
+        except Exception as e:
+            # 回滚事务
+            trans.rollback()
+            print(f"更新表结构时出错: {str(e)}")
+            raise
+
+
+if __name__ == "__main__":
+    add_knowledge_base_index_profile_columns()
@@ -12,9 +12,9 @@ import os
 # 添加项目根目录到 Python 路径
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from sqlalchemy.orm import Session, joinedload
 from app.db.session import SessionLocal
 from app.core.logging import setup_logging
+from app.modules.knowledge import crud
 from app.modules.knowledge.models.knowledge_base import Document, DocumentProcessTask
 from app.modules.knowledge.services.minio import MinioService
 
@@ -43,24 +43,27 @@ def associate_files_tasks():
         # 初始化 MinIO 服务
         minio_service = MinioService()
         
+        # 已有文档的任务在循环结束后一次性批量关联
+        task_updates = []
+
         # 关联处理任务和文档
         for task in tasks:
             logger.info(f"处理任务 ID: {task.id}, 文件路径: {task.file_path}")
             
-            # 根据文件路径查找对应的文档
+            # 根据文件路径和知识库查找对应的文档（同一文件可被多个知识库共享）
             document = (
                 db.query(Document)
-                .filter(Document.file_path == task.file_path)
+                .filter(
+                    Document.file_path == task.file_path,
+                    Document.knowledge_base_id == task.knowledge_base_id,
+                )
                 .first()
             )
             
             if document:
                 logger.info(f"找到对应文档 ID: {document.id}, 标题: {document.title}")
                 
-                # 关联处理任务和文档
-                task.document_id = document.id
-                db.commit()
-                logger.info(f"成功关联任务 {task.id} 和文档 {document.id}")
+                task_updates.append({"id": task.id, "document_id": document.id})
             else:
                 logger.warning(f"未找到任务 {task.id} 对应的文档，文件路径: {task.file_path}")
                 
@@ -86,6 +89,10 @@ def associate_files_tasks():
                 else:
                     logger.error(f"MinIO 中不存在文件: {task.file_path}")
         
+        if task_updates:
+            crud.document_process_task.update_many(db, objs_in=task_updates)
+            logger.info(f"成功批量关联 {len(task_updates)} 个任务和文档")
+        
         # 验证关联结果
         tasks_after = (
             db.query(DocumentProcessTask)
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+为已入库的分块补充 file_type、created_at 元数据
+
+检索过滤条件依赖这两个元数据字段，新处理的文档会自动写入，
+该脚本用于补齐在此之前入库的分块。
+"""
+
+import sys
+import os
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.logging import setup_logging
+from app.db.session import SessionLocal
+from app.modules.knowledge.models.knowledge_base import Document, KnowledgeBase
+from app.modules.knowledge.services.vector_store import (
+    CollectionNotFoundError,
+    get_vector_store,
+    metadata_timestamp,
+)
+
+# 设置日志
+logger = setup_logging()
+
+# 每次读取和更新的分块数
+BATCH_SIZE = 500
+
+
+def backfill_chunk_metadata():
+    """
+    为所有知识库集合中的分块补充元数据
+    """
+    db = SessionLocal()
+    vector_store = get_vector_store()
+    updated_total = 0
+
+    try:
+        for knowledge_base in db.query(KnowledgeBase).all():
+            collection_name = vector_store.get_knowledge_base_collection_name(
+                knowledge_base.id
+            )
+            try:
+                collection = vector_store.get_collection(
+                    collection_name, create_if_not_exists=False
+                )
+            except (ValueError, CollectionNotFoundError):
+                continue
+
+            documents = {
+                document.id: document
+                for document in db.query(Document).filter(
+                    Document.knowledge_base_id == knowledge_base.id
+                )
+            }
+
+            offset = 0
+            while True:
+                batch = collection.get(
+                    include=["metadatas"], limit=BATCH_SIZE, offset=offset
+                )
+                if not batch["ids"]:
+                    break
+                offset += len(batch["ids"])
+
+                ids, metadatas = [], []
+                for chunk_id, metadata in zip(batch["ids"], batch["metadatas"]):
+                    document = documents.get(metadata.get("document_id"))
+                    if document is None or "created_at" in metadata:
+                        continue
+                    ids.append(chunk_id)
+                    metadatas.append(
+                        {
+                            **metadata,
+                            "file_type": (document.file_type or "").lower(),
+                            "created_at": metadata_timestamp(document.created_at),
+                        }
+                    )
+
+                if ids:
+                    collection.update(ids=ids, metadatas=metadatas)
+                    updated_total += len(ids)
+
+            logger.info(f"知识库 {knowledge_base.id} 分块元数据补充完成")
+
+        logger.info(f"共更新 {updated_total} 个分块的元数据")
+        return True
+    except Exception as e:
+        logger.error(f"补充分块元数据时出错: {str(e)}")
+        return False
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    success = backfill_chunk_metadata()
+    sys.exit(0 if success else 1)
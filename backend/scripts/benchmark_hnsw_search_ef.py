@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HNSW search_ef 延迟 / 召回率曲线
+
+按给定的索引参数（距离度量、M、construction_ef）构建 Chroma 集合，
+依次调整 search_ef，测量每个取值下的检索延迟（p50 / p95）和 recall@k（以精确检索为基准），
+用于为知识库选择合适的 search_ef（PUT /knowledge-bases/{id}/index-profile）。
+
+用法：
+    python scripts/benchmark_hnsw_search_ef.py --vectors 50000 --dim 384
+    python scripts/benchmark_hnsw_search_ef.py --space cosine --m 32 --construction-ef 200 --efs 10,20,40,80,160
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.config import settings
+from app.modules.knowledge.services.index_backends import (
+    compute_distances,
+    create_index_backend,
+)
+from app.modules.knowledge.services.vector_store import hnsw_metadata
+
+ADD_BATCH_SIZE = 5000
+
+
+def make_data(args):
+    """生成低秩加噪声的向量（近似句向量的谱分布）和查询"""
+    rng = np.random.default_rng(args.seed)
+    rank = min(64, args.dim)
+    basis = rng.normal(size=(rank, args.dim)) / np.sqrt(np.arange(1, rank + 1))[:, None]
+    embeddings = rng.normal(size=(args.vectors, rank)) @ basis
+    embeddings += 0.05 * rng.normal(size=embeddings.shape)
+    embeddings = embeddings.astype(np.float32)
+
+    query_ids = rng.choice(args.vectors, size=args.queries, replace=False)
+    queries = embeddings[query_ids] + 0.02 * rng.normal(size=(args.queries, args.dim))
+    return embeddings, queries.astype(np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HNSW search_ef 延迟 / 召回率曲线")
+    parser.add_argument("--vectors", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument(
+        "--space", choices=("cosine", "l2", "ip"), default=settings.VECTOR_INDEX_SPACE
+    )
+    parser.add_argument("--m", type=int, default=settings.HNSW_M)
+    parser.add_argument(
+        "--construction-ef", type=int, default=settings.HNSW_CONSTRUCTION_EF
+    )
+    parser.add_argument("--efs", default="10,20,40,64,100,160,320")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    embeddings, queries = make_data(args)
+    expected = [
+        set(
+            np.argsort(compute_distances(args.space, query, embeddings))[
+                : args.k
+            ].tolist()
+        )
+        for query in queries
+    ]
+
+    directory = tempfile.mkdtemp(prefix="hnsw_benchmark_")
+    try:
+        backend = create_index_backend("chroma", directory)
+        collection = backend.create_collection(
+            "benchmark",
+            metadata=hnsw_metadata(
+                {"space": args.space, "m": args.m, "construction_ef": args.construction_ef}
+            ),
+        )
+        started = time.perf_counter()
+        for start in range(0, len(embeddings), ADD_BATCH_SIZE):
+            end = min(start + ADD_BATCH_SIZE, len(embeddings))
+            collection.add(
+                ids=[str(i) for i in range(start, end)],
+                embeddings=embeddings[start:end].tolist(),
+            )
+        build_seconds = time.perf_counter() - started
+
+        print(
+            f"向量数: {args.vectors}, 维度: {args.dim}, 查询数: {args.queries}, k={args.k}, "
+            f"space={args.space}, M={args.m}, construction_ef={args.construction_ef}, "
+            f"建索引 {build_seconds:.1f}s"
+        )
+        print(f"{'search_ef':>10}{'p50(ms)':>10}{'p95(ms)':>10}{'recall@k':>10}")
+
+        for ef in [int(value) for value in args.efs.split(",") if value]:
+            backend.set_search_ef("benchmark", ef)
+            collection = backend.get_collection("benchmark")
+            # 预热
+            for query in queries[:5]:
+                collection.query(query_embeddings=[query.tolist()], n_results=args.k)
+
+            latencies, recalls = [], []
+            for query, truth in zip(queries, expected):
+                started = time.perf_counter()
+                results = collection.query(
+                    query_embeddings=[query.tolist()], n_results=args.k
+                )
+                latencies.append((time.perf_counter() - started) * 1000)
+                found = {int(record_id) for record_id in results["ids"][0]}
+                recalls.append(len(found & truth) / args.k)
+
+            print(
+                f"{ef:>10}{np.percentile(latencies, 50):>10.2f}"
+                f"{np.percentile(latencies, 95):>10.2f}{np.mean(recalls):>10.3f}"
+            )
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
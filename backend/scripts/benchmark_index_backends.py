@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+向量索引后端基准测试
+
+用合成向量（低秩加噪声，近似句向量的谱分布）分别构建 Chroma 和本地引擎的集合，
+比较写入耗时、检索延迟（p50 / p95）、recall@k（以 float32 精确检索为基准）和进程 RSS。
+每个后端在独立的子进程中运行，RSS 互不影响。
+
+用法：
+    python scripts/benchmark_index_backends.py --vectors 50000 --dim 384
+    python scripts/benchmark_index_backends.py --vectors 200000 --ivf-min-vectors 100000
+"""
+
+import argparse
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+BACKENDS = ("chroma", "local")
+ADD_BATCH_SIZE = 5000
+
+
+def rss_mb() -> float:
+    """当前进程的常驻内存（MB）"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def make_data(args):
+    """生成库向量、查询向量和精确检索的 top-k"""
+    rng = np.random.default_rng(args.seed)
+    rank = min(64, args.dim)
+    basis = rng.normal(size=(rank, args.dim)) / np.sqrt(np.arange(1, rank + 1))[:, None]
+    embeddings = rng.normal(size=(args.vectors, rank)) @ basis
+    embeddings += 0.05 * rng.normal(size=embeddings.shape)
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    embeddings = embeddings.astype(np.float32)
+
+    query_ids = rng.choice(args.vectors, size=args.queries, replace=False)
+    queries = embeddings[query_ids] + 0.02 * rng.normal(size=(args.queries, args.dim))
+    queries = queries.astype(np.float32)
+
+    expected = []
+    for query in queries:
+        distances = ((embeddings - query) ** 2).sum(axis=1)
+        expected.append(set(np.argpartition(distances, args.k)[: args.k].tolist()))
+    return embeddings, queries, expected
+
+
+def run_backend(backend: str, args, directory: str, output) -> None:
+    """在子进程中构建集合并检索"""
+    os.environ["LOCAL_INDEX_IVF_MIN_VECTORS"] = str(args.ivf_min_vectors)
+    os.environ["LOCAL_INDEX_IVF_NPROBE"] = str(args.nprobe)
+    from app.modules.knowledge.services.index_backends import create_index_backend
+
+    embeddings, queries, expected = make_data(args)
+    baseline = rss_mb()
+
+    client = create_index_backend(backend, directory)
+    collection = client.create_collection("benchmark")
+    started = time.perf_counter()
+    for start in range(0, len(embeddings), ADD_BATCH_SIZE):
+        end = min(start + ADD_BATCH_SIZE, len(embeddings))
+        collection.add(
+            ids=[str(i) for i in range(start, end)],
+            embeddings=embeddings[start:end],
+            documents=[f"chunk {i}" for i in range(start, end)],
+            metadatas=[{"document_id": i % 100} for i in range(start, end)],
+        )
+    add_seconds = time.perf_counter() - started
+
+    # 预热，排除首次加载索引的开销
+    for query in queries[:5]:
+        collection.query(query_embeddings=[query.tolist()], n_results=args.k)
+
+    latencies, recalls = [], []
+    for query, truth in zip(queries, expected):
+        started = time.perf_counter()
+        results = collection.query(query_embeddings=[query.tolist()], n_results=args.k)
+        latencies.append((time.perf_counter() - started) * 1000)
+        found = {int(record_id) for record_id in results["ids"][0]}
+        recalls.append(len(found & truth) / args.k)
+
+    output.put(
+        {
+            "backend": backend,
+            "add_seconds": add_seconds,
+            "p50_ms": float(np.percentile(latencies, 50)),
+            "p95_ms": float(np.percentile(latencies, 95)),
+            "recall": float(np.mean(recalls)),
+            "rss_mb": rss_mb() - baseline,
+        }
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="向量索引后端基准测试")
+    parser.add_argument("--vectors", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument(
+        "--ivf-min-vectors",
+        type=int,
+        default=100000,
+        help="本地引擎训练 IVF 的向量数阈值（LOCAL_INDEX_IVF_MIN_VECTORS）",
+    )
+    parser.add_argument("--nprobe", type=int, default=16)
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(
+        f"向量数: {args.vectors}, 维度: {args.dim}, 查询数: {args.queries}, k={args.k}"
+    )
+    print(
+        f"{'后端':<8}{'写入(s)':>10}{'p50(ms)':>10}{'p95(ms)':>10}"
+        f"{'recall@k':>10}{'RSS 增量(MB)':>14}"
+    )
+
+    context = multiprocessing.get_context("spawn")
+    for backend in args.backends.split(","):
+        directory = tempfile.mkdtemp(prefix=f"index_benchmark_{backend}_")
+        output = context.Queue()
+        process = context.Process(
+            target=run_backend, args=(backend, args, directory, output)
+        )
+        try:
+            process.start()
+            stats = output.get()
+            process.join()
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+        print(
+            f"{stats['backend']:<8}{stats['add_seconds']:>10.2f}{stats['p50_ms']:>10.2f}"
+            f"{stats['p95_ms']:>10.2f}{stats['recall']:>10.3f}{stats['rss_mb']:>14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+向量压缩离线评估
+
+从已有的知识库集合读取全精度向量（或生成合成向量），以全精度精确检索的 top-k 为基准，
+比较不同降维方法 / 维度下的 recall@k 和每个向量的存储字节数：
+
+- reduced：只在降维后的向量上检索
+- rescore：在降维向量上取 k * VECTOR_RESCORE_FACTOR 个候选，再用 int8 全维向量精排（紧凑模式的实际做法）
+
+用法：
+    python scripts/evaluate_vector_compression.py --knowledge-base-id 1 --dims 64,128,192
+    python scripts/evaluate_vector_compression.py --synthetic 20000 --method truncate
+    python scripts/evaluate_vector_compression.py --knowledge-base-id 1 --dims 128 --save-reducer
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.config import settings
+from app.modules.knowledge.services.vector_compression import (
+    EmbeddingReducer,
+    ScalarQuantizer,
+)
+
+# HNSW 每个向量的链接开销（M=16 时约 2 * M 个 int32 邻居）
+HNSW_LINK_BYTES = 2 * 16 * 4
+
+
+def load_collection_embeddings(knowledge_base_id: int, limit: int) -> np.ndarray:
+    """读取知识库集合中的全精度向量"""
+    from app.modules.knowledge.services.vector_store import get_vector_store
+
+    vector_store = get_vector_store()
+    collection = vector_store.get_collection(
+        vector_store.get_knowledge_base_collection_name(knowledge_base_id),
+        create_if_not_exists=False,
+    )
+    if (collection.metadata or {}).get("vector_reducer"):
+        raise SystemExit("该集合已是紧凑模式，无法读取全精度向量")
+
+    batches = []
+    offset = 0
+    while offset < limit:
+        batch = collection.get(
+            include=["embeddings"], limit=min(1000, limit - offset), offset=offset
+        )
+        if not batch["ids"]:
+            break
+        batches.append(np.asarray(batch["embeddings"], dtype=np.float32))
+        offset += len(batch["ids"])
+    if not batches:
+        raise SystemExit("集合中没有向量")
+    return np.concatenate(batches)
+
+
+def synthetic_embeddings(
+    rng: np.random.Generator, count: int, dim: int, rank: int
+) -> np.ndarray:
+    """生成低秩加噪声的归一化向量，近似句向量的谱分布"""
+    basis = rng.normal(size=(rank, dim)) * (1 / np.arange(1, rank + 1) ** 0.5)[:, None]
+    matrix = rng.normal(size=(count, rank)) @ basis + 0.05 * rng.normal(size=(count, dim))
+    return (matrix / np.linalg.norm(matrix, axis=1, keepdims=True)).astype(np.float32)
+
+
+def top_k(queries: np.ndarray, matrix: np.ndarray, k: int) -> np.ndarray:
+    """按 L2 距离取 top-k（与 Chroma 默认的 l2 空间一致）"""
+    distances = (
+        (queries**2).sum(axis=1)[:, None]
+        - 2 * queries @ matrix.T
+        + (matrix**2).sum(axis=1)[None, :]
+    )
+    k = min(k, matrix.shape[0])
+    indices = np.argpartition(distances, k - 1, axis=1)[:, :k]
+    order = np.take_along_axis(distances, indices, axis=1).argsort(axis=1)
+    return np.take_along_axis(indices, order, axis=1)
+
+
+def recall(expected: np.ndarray, actual: np.ndarray) -> float:
+    """平均 recall@k"""
+    hits = [len(set(e) & set(a)) / len(e) for e, a in zip(expected, actual)]
+    return float(np.mean(hits))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="向量压缩离线评估")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--knowledge-base-id", type=int, help="从该知识库集合读取向量")
+    source.add_argument("--synthetic", type=int, help="生成指定数量的合成向量")
+    parser.add_argument("--synthetic-dim", type=int, default=384)
+    parser.add_argument("--limit", type=int, default=50000, help="最多读取的向量数")
+    parser.add_argument("--method", choices=EmbeddingReducer.METHODS, default="pca")
+    parser.add_argument("--dims", default="64,128,192", help="逗号分隔的目标维度")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument(
+        "--rescore-factor", type=int, default=settings.VECTOR_RESCORE_FACTOR
+    )
+    parser.add_argument(
+        "--save-reducer",
+        action="store_true",
+        help=f"将最后一个维度的降维器保存到 {settings.VECTOR_REDUCER_PATH}",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    if args.synthetic:
+        embeddings = synthetic_embeddings(rng, args.synthetic, args.synthetic_dim, 64)
+    else:
+        embeddings = load_collection_embeddings(args.knowledge_base_id, args.limit)
+
+    count, full_dim = embeddings.shape
+    # 用库内向量加少量扰动作为查询，排除查询自身带来的偏差
+    query_ids = rng.choice(count, size=min(args.queries, count), replace=False)
+    queries = embeddings[query_ids] + 0.01 * rng.normal(size=(len(query_ids), full_dim))
+    queries = queries.astype(np.float32)
+    expected = top_k(queries, embeddings, args.k)
+
+    # int8 全维向量只需量化一次，与降维方式无关
+    quantized = np.stack(
+        [ScalarQuantizer.decode(ScalarQuantizer.encode(vector)) for vector in embeddings]
+    )
+    quantized_bytes = 4 + full_dim
+
+    print(
+        f"向量数: {count}, 原始维度: {full_dim}, 查询数: {len(query_ids)}, "
+        f"k={args.k}, 精排候选倍数: {args.rescore_factor}"
+    )
+    print(
+        f"{'方案':<18}{'索引字节/向量':>14}{'总字节/向量':>14}"
+        f"{'recall@k':>12}{'精排 recall@k':>16}"
+    )
+    full_bytes = full_dim * 4 + HNSW_LINK_BYTES
+    print(f"{'float32 全维':<18}{full_bytes:>14}{full_bytes:>14}{1.0:>12.3f}{'-':>16}")
+
+    reducer = None
+    for dim in [int(value) for value in args.dims.split(",") if value]:
+        if dim >= full_dim:
+            continue
+        reducer = EmbeddingReducer(args.method, dim).fit(embeddings)
+        reduced = reducer.transform(embeddings)
+        reduced_queries = reducer.transform(queries)
+
+        plain = top_k(reduced_queries, reduced, args.k)
+        candidates = top_k(reduced_queries, reduced, args.k * args.rescore_factor)
+        rescored = np.stack(
+            [
+                ids[top_k(query[None, :], quantized[ids], args.k)[0]]
+                for query, ids in zip(queries, candidates)
+            ]
+        )
+
+        index_bytes = dim * 4 + HNSW_LINK_BYTES
+        print(
+            f"{f'{args.method}-{dim} + int8':<18}{index_bytes:>14}"
+            f"{index_bytes + quantized_bytes:>14}"
+            f"{recall(expected, plain):>12.3f}{recall(expected, rescored):>16.3f}"
+        )
+
+    if args.save_reducer:
+        if reducer is None:
+            raise SystemExit("没有可保存的降维器（目标维度需小于原始维度）")
+        reducer.save(settings.VECTOR_REDUCER_PATH)
+        print(
+            f"降维器已保存: {settings.VECTOR_REDUCER_PATH}（指纹 {reducer.fingerprint}）"
+        )
+
+
+if __name__ == "__main__":
+    main()
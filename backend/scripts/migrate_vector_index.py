@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+在向量索引后端之间迁移知识库集合
+
+例如从各进程各自打开的本地 Chroma 目录迁移到远程 Chroma 服务：
+
+    python scripts/migrate_vector_index.py --source chroma --target chroma_http
+    python scripts/migrate_vector_index.py --source chroma --target local --knowledge-base-id 3
+
+集合元数据（距离度量、HNSW 参数、紧凑向量的降维器指纹）、向量、文本和分块元数据原样复制，
+目标后端中已存在的集合会被跳过。
+"""
+
+import argparse
+import os
+import sys
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.logging import setup_logging
+from app.db.session import SessionLocal
+from app.modules.knowledge.models.knowledge_base import KnowledgeBase
+from app.modules.knowledge.services.index_backends import (
+    CollectionNotFoundError,
+    create_index_backend,
+)
+
+# 设置日志
+logger = setup_logging()
+
+
+def migrate_collection(source, target, name: str) -> int:
+    """
+    复制一个集合
+
+    Returns:
+        int: 复制的记录数，集合不存在或已迁移时为 -1
+    """
+    try:
+        collection = source.get_collection(name)
+    except (ValueError, CollectionNotFoundError):
+        return -1
+    try:
+        target.get_collection(name)
+        logger.info(f"目标后端中已存在集合 {name}，跳过")
+        return -1
+    except (ValueError, CollectionNotFoundError):
+        pass
+
+    destination = target.create_collection(name, metadata=collection.metadata)
+    batch_size = min(source.max_batch_size, target.max_batch_size)
+    copied = 0
+    while True:
+        batch = collection.get(
+            include=["embeddings", "documents", "metadatas"],
+            limit=batch_size,
+            offset=copied,
+        )
+        if not len(batch["ids"]):
+            break
+        destination.add(
+            ids=batch["ids"],
+            embeddings=batch["embeddings"],
+            documents=batch["documents"],
+            metadatas=batch["metadatas"],
+        )
+        copied += len(batch["ids"])
+    destination_count = destination.count()
+    if destination_count != copied:
+        raise RuntimeError(
+            f"集合 {name} 迁移后记录数不一致: {copied} -> {destination_count}"
+        )
+    return copied
+
+
+def main():
+    parser = argparse.ArgumentParser(description="在向量索引后端之间迁移知识库集合")
+    parser.add_argument("--source", required=True, help="源后端（chroma / local / chroma_http）")
+    parser.add_argument("--target", required=True, help="目标后端")
+    parser.add_argument("--source-dir", help="源后端的数据目录，默认按后端选择")
+    parser.add_argument("--target-dir", help="目标后端的数据目录，默认按后端选择")
+    parser.add_argument("--knowledge-base-id", type=int, help="只迁移指定知识库")
+    args = parser.parse_args()
+
+    source = create_index_backend(args.source, args.source_dir)
+    target = create_index_backend(args.target, args.target_dir)
+
+    db = SessionLocal()
+    try:
+        query = db.query(KnowledgeBase.id)
+        if args.knowledge_base_id:
+            query = query.filter(KnowledgeBase.id == args.knowledge_base_id)
+        knowledge_base_ids = [row.id for row in query.all()]
+    finally:
+        db.close()
+
+    total = 0
+    for knowledge_base_id in knowledge_base_ids:
+        name = f"kb_{knowledge_base_id}"
+        copied = migrate_collection(source, target, name)
+        if copied >= 0:
+            logger.info(f"集合 {name} 迁移完成，共 {copied} 条记录")
+            total += copied
+    target.persist()
+    logger.info(f"迁移完成，共复制 {total} 条记录")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地 OpenAI 兼容接口桩服务
+
+用于在没有真实 LLM 的情况下联调 /chat/conversations/{id}/completions：
+将 LLM 配置的 api_base 设置为 http://127.0.0.1:8100/v1 即可。
+
+用法：
+    python scripts/stub_openai_server.py --port 8100 --token-delay 0.02
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+app = FastAPI(title="OpenAI 兼容接口桩服务")
+
+# 由命令行参数覆盖
+config = {"first_token_delay": 0.05, "token_delay": 0.02}
+
+
+def build_answer(messages) -> str:
+    """根据最后一条用户消息生成确定性的回答"""
+    question = messages[-1]["content"] if messages else ""
+    has_context = any(
+        message["role"] == "system" and "参考资料" in message["content"]
+        for message in messages
+    )
+    source = "根据参考资料" if has_context else "没有检索到参考资料"
+    return f"{source}，这是对“{question}”的模拟回答。"
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    model = body.get("model", "stub-model")
+    answer = build_answer(body.get("messages", []))
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    created = int(time.time())
+
+    if not body.get("stream"):
+        return JSONResponse(
+            {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": answer},
+                        "finish_reason": "stop",
+                    }
+                ],
+            }
+        )
+
+    async def event_stream():
+        await asyncio.sleep(config["first_token_delay"])
+        for char in answer:
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": char}}],
+            }
+            yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+            await asyncio.sleep(config["token_delay"])
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OpenAI 兼容接口桩服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--first-token-delay", type=float, default=0.05)
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    args = parser.parse_args()
+
+    config["first_token_delay"] = args.first_token_delay
+    config["token_delay"] = args.token_delay
+    uvicorn.run(app, host=args.host, port=args.port)
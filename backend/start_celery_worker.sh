@@ -9,5 +9,16 @@ if [ -d "venv" ]; then
     source venv/bin/activate
 fi
 
+# 订阅的队列：ingest_fast（文本文件）、ingest_standard（普通 PDF / Word）、
+# ingest_heavy（大文件、LLM 增强的 PDF），可通过 CELERY_QUEUES 只订阅其中一部分
+CELERY_QUEUES="${CELERY_QUEUES:-ingest_fast,ingest_standard,ingest_heavy}"
+
+# 是否在该 worker 中运行定时任务（清理过期的分片上传等），多个 worker 中只需一个开启
+CELERY_BEAT="${CELERY_BEAT:-1}"
+BEAT_ARGS=""
+if [ "$CELERY_BEAT" = "1" ]; then
+    BEAT_ARGS="-B"
+fi
+
 # 启动Celery Worker
-celery -A celery_app.celery worker --loglevel=info -P solo
+celery -A celery_app.celery worker --loglevel=info -P solo -Q "$CELERY_QUEUES" $BEAT_ARGS
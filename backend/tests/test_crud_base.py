@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CRUD 基类批量操作测试
+"""
+
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, String, create_engine, select
+from sqlalchemy.orm import Session
+
+from app.crud.base import CRUDBase
+from app.db.base_class import Base
+
+
+class BulkItem(Base):
+    __tablename__ = "bulk_item"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(50))
+    kind = Column(String(20), default="plain")
+    created_at = Column(DateTime, default=datetime.now)
+
+
+def _session() -> Session:
+    engine = create_engine("sqlite://")
+    BulkItem.__table__.create(engine)
+    return Session(engine)
+
+
+def test_create_many_returns_ids_in_input_order_with_explicit_ids():
+    """部分行显式指定主键时，返回的 ID 仍与输入一一对应"""
+    crud = CRUDBase(BulkItem)
+    with _session() as db:
+        ids = crud.create_many(
+            db,
+            objs_in=[{"name": "a"}, {"id": 50, "name": "b"}, {"name": "c"}],
+            batch_size=2,
+        )
+        names = {item.id: item.name for item in db.scalars(select(BulkItem))}
+    assert ids[1] == 50
+    assert [names[item_id] for item_id in ids] == ["a", "b", "c"]
+
+
+def test_create_many_fills_defaults_per_row():
+    """只有部分行提供的字段，其余行使用列默认值"""
+    crud = CRUDBase(BulkItem)
+    with _session() as db:
+        ids = crud.create_many(db, objs_in=[{"name": "a"}, {"name": "b", "kind": "x"}])
+        items = {item.id: item for item in db.scalars(select(BulkItem))}
+    assert [items[item_id].kind for item_id in ids] == ["plain", "x"]
+    assert all(item.created_at is not None for item in items.values())
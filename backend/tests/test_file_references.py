@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文件引用释放测试
+"""
+
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.modules.knowledge.models.knowledge_base import (
+    Document,
+    DocumentProcessTask,
+    TaskStatus,
+)
+from app.modules.knowledge.services import file_references
+
+
+def test_release_file_sees_reference_added_between_releases(monkeypatch, tmp_path):
+    """逐个释放多个文件时，释放期间新增的引用不会被漏掉"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'references.db'}")
+    Document.metadata.create_all(
+        engine, tables=[Document.__table__, DocumentProcessTask.__table__]
+    )
+    session_factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(file_references, "SessionLocal", session_factory)
+
+    deleted = []
+
+    class FakeMinioService:
+        def delete_file(self, file_path):
+            deleted.append(file_path)
+            return True
+
+    monkeypatch.setattr(file_references, "MinioService", FakeMinioService)
+
+    @contextmanager
+    def fake_file_lock(file_path):
+        # 释放第二个文件前，另一个请求上传了相同内容并创建任务
+        if file_path == "objects/sha256/bb/bb":
+            with session_factory() as other:
+                other.add(
+                    DocumentProcessTask(
+                        file_name="b.pdf",
+                        file_path=file_path,
+                        file_type="pdf",
+                        status=TaskStatus.PENDING,
+                        user_id=1,
+                    )
+                )
+                other.commit()
+        yield True
+
+    monkeypatch.setattr(file_references, "file_lock", fake_file_lock)
+
+    # 调用方的会话在释放前已开始事务（如删除知识库时读取文件列表）
+    with session_factory() as db:
+        db.execute(select(func.count(Document.id))).scalar()
+        for file_path in ("objects/sha256/aa/aa", "objects/sha256/bb/bb"):
+            file_references.release_file(file_path)
+
+    assert deleted == ["objects/sha256/aa/aa"]
@@ -24,6 +24,11 @@ const DocumentList: React.FC<DocumentListProps> = ({ documents, onDocumentDelete
       case 'doc':
       case 'docx':
         return '📃';
+      case 'pptx':
+        return '📊';
+      case 'html':
+      case 'htm':
+        return '🌐';
       default:
         return '📄';
     }
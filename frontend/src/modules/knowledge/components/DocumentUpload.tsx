@@ -34,19 +34,20 @@ const DocumentUpload: React.FC<DocumentUploadProps> = ({
       'application/pdf',
       'text/plain',
       'text/markdown',
-      'application/msword',
-      'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+      'text/html',
+      'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+      'application/vnd.openxmlformats-officedocument.presentationml.presentation'
     ];
 
     if (!allowedTypes.includes(file.type)) {
-      setError('不支持的文件类型，请上传 PDF、TXT、Markdown 或 Word 文档');
+      setError('不支持的文件类型，请上传 PDF、TXT、Markdown、Word（.docx）、PowerPoint（.pptx）或 HTML 文档');
       return false;
     }
 
-    // 限制文件大小为 20MB
-    const maxSize = 20 * 1024 * 1024;
+    // 限制文件大小为 1GB（超过 64MB 的文件分片上传，可断点续传）
+    const maxSize = 1024 * 1024 * 1024;
     if (file.size > maxSize) {
-      setError('文件大小不能超过 20MB');
+      setError('文件大小不能超过 1GB');
       return false;
     }
 
@@ -435,11 +436,11 @@ const DocumentUpload: React.FC<DocumentUploadProps> = ({
             file:text-sm file:font-semibold
             file:bg-blue-50 file:text-blue-700
             hover:file:bg-blue-100"
-          accept=".pdf,.txt,.md,.doc,.docx"
+          accept=".pdf,.txt,.md,.docx,.pptx,.html,.htm"
           disabled={uploading}
         />
         <p className="mt-1 text-sm text-gray-500">
-          支持的文件格式: PDF, TXT, Markdown, Word (最大 20MB)
+          支持的文件格式: PDF, TXT, Markdown, Word (.docx), PowerPoint (.pptx), HTML (最大 1GB)
         </p>
       </div>
 
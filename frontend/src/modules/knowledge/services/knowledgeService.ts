@@ -1,11 +1,21 @@
+import axios from 'axios';
 import api from '../../../shared/services/api';
 
+// 向量索引参数（HNSW），未指定的项使用后端配置的默认值
+export interface IndexProfile {
+  space?: 'cosine' | 'l2' | 'ip' | null;
+  m?: number | null;
+  construction_ef?: number | null;
+  search_ef?: number | null;
+}
+
 // 知识库类型定义
 export interface KnowledgeBase {
   id: number;
   name: string;
   description?: string;
   user_id: number;
+  index_profile?: IndexProfile;
   created_at: string;
   updated_at: string;
   documents: Document[];
@@ -40,6 +50,7 @@ export interface DocumentProcessTask {
   id: number;
   file_name: string;
   file_path: string;
+  file_hash?: string;
   file_type: string;
   status: TaskStatus;
   error_message?: string;
@@ -53,15 +64,29 @@ export interface DocumentProcessTask {
 // 创建知识库
 export const createKnowledgeBase = async (
   name: string,
-  description?: string
+  description?: string,
+  indexProfile?: IndexProfile
 ): Promise<KnowledgeBase> => {
   const response = await api.post<KnowledgeBase>('/knowledge/knowledge-bases', {
     name,
     description,
+    index_profile: indexProfile,
   });
   return response.data;
 };
 
+// 调整知识库的检索参数 search_ef（越大召回越高、延迟越高）
+export const updateIndexProfile = async (
+  id: number,
+  searchEf: number
+): Promise<KnowledgeBase> => {
+  const response = await api.put<KnowledgeBase>(
+    `/knowledge/knowledge-bases/${id}/index-profile`,
+    { search_ef: searchEf }
+  );
+  return response.data;
+};
+
 // 获取所有知识库
 export const getKnowledgeBases = async (): Promise<KnowledgeBase[]> => {
   const response = await api.get<KnowledgeBase[]>('/knowledge/knowledge-bases');
@@ -99,12 +124,244 @@ export const getDocuments = async (knowledgeBaseId: number): Promise<Document[]>
   return response.data;
 };
 
+// 不超过该大小的文件先按内容哈希上传：相同内容已存储时无需再传输文件
+const HASH_FIRST_MAX_BYTES = 200 * 1024 * 1024;
+
+// 超过该大小的文件使用分片上传，失败的分片单独重试，中断后可续传
+const RESUMABLE_UPLOAD_MIN_BYTES = 64 * 1024 * 1024;
+const PART_UPLOAD_CONCURRENCY = 4;
+const PART_UPLOAD_RETRIES = 3;
+
+// 分片上传会话
+export interface UploadSession {
+  id: number;
+  file_name: string;
+  file_type: string;
+  file_size: number;
+  part_size: number;
+  part_count: number;
+  status: 'active' | 'completed' | 'aborted' | 'expired';
+  knowledge_base_id: number;
+  task_id?: number;
+  uploaded_parts: number[];
+  expires_at: string;
+}
+
+// 计算数据的 SHA-256（十六进制）
+const sha256Hex = async (data: ArrayBuffer): Promise<string> => {
+  const digest = await window.crypto.subtle.digest('SHA-256', data);
+  return Array.from(new Uint8Array(digest))
+    .map((byte) => byte.toString(16).padStart(2, '0'))
+    .join('');
+};
+
+// 计算文件的 SHA-256，浏览器不支持或文件过大时返回 null
+const computeFileHash = async (file: File): Promise<string | null> => {
+  if (!window.crypto?.subtle || file.size > HASH_FIRST_MAX_BYTES) {
+    return null;
+  }
+  return sha256Hex(await file.arrayBuffer());
+};
+
+// 按内容哈希上传文档，文件内容不存在时返回 null
+const uploadDocumentByHash = async (
+  knowledgeBaseId: number,
+  file: File
+): Promise<DocumentProcessTask | null> => {
+  const fileHash = await computeFileHash(file);
+  if (!fileHash) {
+    return null;
+  }
+  try {
+    const response = await api.post<DocumentProcessTask>(
+      `/knowledge/knowledge-bases/${knowledgeBaseId}/upload-by-hash`,
+      { file_name: file.name, file_hash: fileHash }
+    );
+    return response.data;
+  } catch (error: any) {
+    if (error?.response?.status === 404) {
+      return null;
+    }
+    throw error;
+  }
+};
+
+// 同一文件（名称、大小、修改时间相同）再次上传时继续未完成的会话
+const uploadSessionStorageKey = (knowledgeBaseId: number, file: File) =>
+  `upload-session:${knowledgeBaseId}:${file.name}:${file.size}:${file.lastModified}`;
+
+// 获取可续传的上传会话，没有时新建
+const getResumableUploadSession = async (
+  knowledgeBaseId: number,
+  file: File
+): Promise<UploadSession> => {
+  const storageKey = uploadSessionStorageKey(knowledgeBaseId, file);
+  const savedSessionId = localStorage.getItem(storageKey);
+  if (savedSessionId) {
+    try {
+      const response = await api.get<UploadSession>(
+        `/knowledge/upload-sessions/${savedSessionId}`
+      );
+      if (response.data.status === 'active') {
+        return response.data;
+      }
+    } catch (error) {
+      // 会话已过期或被删除，重新创建
+    }
+  }
+  const response = await api.post<UploadSession>(
+    `/knowledge/knowledge-bases/${knowledgeBaseId}/upload-sessions`,
+    { file_name: file.name, file_size: file.size }
+  );
+  localStorage.setItem(storageKey, String(response.data.id));
+  return response.data;
+};
+
+// 上传一个分片，失败时按指数退避重试，返回分片大小
+const uploadPart = async (
+  session: UploadSession,
+  file: File,
+  partNumber: number
+): Promise<number> => {
+  const offset = (partNumber - 1) * session.part_size;
+  const data = await file.slice(offset, offset + session.part_size).arrayBuffer();
+  const checksum = window.crypto?.subtle ? await sha256Hex(data) : null;
+
+  for (let attempt = 1; ; attempt++) {
+    try {
+      await api.put(`/knowledge/upload-sessions/${session.id}/parts`, data, {
+        params: { offset },
+        headers: {
+          'Content-Type': 'application/octet-stream',
+          ...(checksum ? { 'X-Content-SHA256': checksum } : {}),
+        },
+        timeout: 5 * 60 * 1000,
+      });
+      return data.byteLength;
+    } catch (error) {
+      if (attempt >= PART_UPLOAD_RETRIES) {
+        throw error;
+      }
+      console.log(`分片 ${partNumber} 上传失败，第 ${attempt} 次重试`);
+      await new Promise((resolve) => setTimeout(resolve, 1000 * 2 ** (attempt - 1)));
+    }
+  }
+};
+
+// 分片上传文档：并行上传分片，已上传的分片不再重复发送
+export const uploadDocumentResumable = async (
+  knowledgeBaseId: number,
+  file: File,
+  onProgress?: (progress: number) => void
+): Promise<DocumentProcessTask> => {
+  const session = await getResumableUploadSession(knowledgeBaseId, file);
+  const uploadedParts = new Set(session.uploaded_parts);
+  const pendingParts: number[] = [];
+  let uploadedBytes = 0;
+  for (let partNumber = 1; partNumber <= session.part_count; partNumber++) {
+    if (uploadedParts.has(partNumber)) {
+      uploadedBytes += Math.min(
+        session.part_size,
+        file.size - (partNumber - 1) * session.part_size
+      );
+    } else {
+      pendingParts.push(partNumber);
+    }
+  }
+  console.log(
+    `分片上传会话 ${session.id}: 共 ${session.part_count} 片，待上传 ${pendingParts.length} 片`
+  );
+
+  const reportProgress = () => onProgress?.(Math.round((uploadedBytes * 100) / file.size));
+  reportProgress();
+
+  const worker = async () => {
+    while (pendingParts.length > 0) {
+      const partNumber = pendingParts.shift()!;
+      uploadedBytes += await uploadPart(session, file, partNumber);
+      reportProgress();
+    }
+  };
+  await Promise.all(
+    Array.from({ length: Math.min(PART_UPLOAD_CONCURRENCY, pendingParts.length) }, worker)
+  );
+
+  // 合并分片并计算哈希，大文件需要较长时间
+  const response = await api.post<DocumentProcessTask>(
+    `/knowledge/upload-sessions/${session.id}/complete`,
+    undefined,
+    { timeout: 10 * 60 * 1000 }
+  );
+  localStorage.removeItem(uploadSessionStorageKey(knowledgeBaseId, file));
+  return response.data;
+};
+
+// 客户端直传信息
+interface DirectUpload {
+  upload_url: string;
+  upload_token: string;
+  method: string;
+  expires_at: string;
+}
+
+// 直传文档：文件直接上传到 MinIO，不经过后端；服务端未启用直传时返回 null
+const uploadDocumentDirect = async (
+  knowledgeBaseId: number,
+  file: File,
+  onProgress?: (progress: number) => void
+): Promise<DocumentProcessTask | null> => {
+  let directUpload: DirectUpload;
+  try {
+    const response = await api.post<DirectUpload>(
+      `/knowledge/knowledge-bases/${knowledgeBaseId}/direct-uploads`,
+      { file_name: file.name, file_size: file.size }
+    );
+    directUpload = response.data;
+  } catch (error: any) {
+    if (error?.response?.status === 404) {
+      return null;
+    }
+    throw error;
+  }
+
+  // 预签名 URL 自带签名，不能附加后端的 Authorization 头
+  await axios.put(directUpload.upload_url, file, {
+    headers: { 'Content-Type': 'application/octet-stream' },
+    timeout: 30 * 60 * 1000,
+    onUploadProgress: (progressEvent) => {
+      onProgress?.(Math.round((progressEvent.loaded * 100) / (progressEvent.total || file.size)));
+    },
+  });
+
+  const response = await api.post<DocumentProcessTask>(
+    '/knowledge/direct-uploads/complete',
+    { upload_token: directUpload.upload_token }
+  );
+  return response.data;
+};
+
 // 上传文档（异步处理）
 export const uploadDocument = async (
   knowledgeBaseId: number,
   file: File,
   onProgress?: (progress: number) => void
 ): Promise<DocumentProcessTask> => {
+  const existingTask = await uploadDocumentByHash(knowledgeBaseId, file);
+  if (existingTask) {
+    console.log(`文件内容已存在，跳过上传: ${file.name}`);
+    onProgress?.(100);
+    return existingTask;
+  }
+
+  if (file.size >= RESUMABLE_UPLOAD_MIN_BYTES) {
+    return uploadDocumentResumable(knowledgeBaseId, file, onProgress);
+  }
+
+  const directTask = await uploadDocumentDirect(knowledgeBaseId, file, onProgress);
+  if (directTask) {
+    return directTask;
+  }
+
   const formData = new FormData();
   formData.append('file', file);
 
@@ -162,11 +419,13 @@ export const getKnowledgeBaseDocumentTasks = async (
 export const searchKnowledgeBase = async (
   knowledgeBaseId: number,
   query: string,
-  limit: number = 5
+  limit: number = 5,
+  rerank: boolean = false
 ): Promise<SearchResult[]> => {
   const response = await api.post<SearchResult[]>(`/knowledge/knowledge-bases/${knowledgeBaseId}/search`, {
     query,
     limit,
+    rerank,
   });
   return response.data;
 };
@@ -22,7 +22,7 @@ export MINIO_SECRET_KEY
 export MINIO_BUCKET_NAME
 
 # 启动依赖服务
-echo "正在启动依赖服务（MySQL、Redis、MinIO）..."
+echo "正在启动依赖服务（MySQL、Redis、MinIO、Chroma）..."
 docker-compose -f docker-compose-deps.yml up -d
 
 # 等待服务启动
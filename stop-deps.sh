@@ -1,7 +1,7 @@
 #!/bin/bash
 
 # 停止依赖服务
-echo "正在停止依赖服务（MySQL、Redis、MinIO）..."
+echo "正在停止依赖服务（MySQL、Redis、MinIO、Chroma）..."
 docker-compose -f docker-compose-deps.yml down
 
 echo "依赖服务已停止。"